@@ -1,16 +1,20 @@
 import asyncio
+import json
+import sys
 from pathlib import Path
+from typing import Any
 
 from rich.console import Console
 from rich.markdown import Markdown
 from rich.progress import Progress
 
-from haiku.rag.client import HaikuRAG
+from haiku.rag.client import HaikuRAG, SearchMode
 from haiku.rag.config import Config
 from haiku.rag.mcp import create_mcp_server
 from haiku.rag.monitor import FileWatcher
 from haiku.rag.store.models.chunk import Chunk
-from haiku.rag.store.models.document import Document
+from haiku.rag.store.models.document import Document, DocumentHeader
+from haiku.rag.store.vector import VectorIndexRecall
 
 
 class HaikuRAGApp:
@@ -18,23 +22,26 @@ class HaikuRAGApp:
         self.db_path = db_path
         self.console = Console()
 
-    async def list_documents(self):
+    async def list_documents(self, collection: str | None = None):
         async with HaikuRAG(db_path=self.db_path) as self.client:
-            documents = await self.client.list_documents()
-            for doc in documents:
-                self._rich_print_document(doc, truncate=True)
+            async for doc in self.client.iter_document_headers(collection=collection):
+                self._rich_print_document_header(doc)
 
-    async def add_document_from_text(self, text: str):
+    async def add_document_from_text(self, text: str, collection: str = "default"):
         async with HaikuRAG(db_path=self.db_path) as self.client:
-            doc = await self.client.create_document(text)
+            doc = await self.client.create_document(text, collection=collection)
             self._rich_print_document(doc, truncate=True)
             self.console.print(
                 f"[b]Document with id [cyan]{doc.id}[/cyan] added successfully.[/b]"
             )
 
-    async def add_document_from_source(self, file_path: Path):
+    async def add_document_from_source(
+        self, file_path: Path, collection: str = "default"
+    ):
         async with HaikuRAG(db_path=self.db_path) as self.client:
-            doc = await self.client.create_document_from_source(file_path)
+            doc = await self.client.create_document_from_source(
+                file_path, collection=collection
+            )
             self._rich_print_document(doc, truncate=True)
             self.console.print(
                 f"[b]Document with id [cyan]{doc.id}[/cyan] added successfully.[/b]"
@@ -53,19 +60,110 @@ class HaikuRAGApp:
             await self.client.delete_document(doc_id)
             self.console.print(f"[b]Document {doc_id} deleted successfully.[/b]")
 
-    async def search(self, query: str, limit: int = 5, k: int = 60):
+    async def search(
+        self,
+        query: str,
+        limit: int = 5,
+        k: int = 60,
+        mode: SearchMode = "hybrid",
+        collection: str | None = None,
+        k_vector: int | None = None,
+        k_fts: int | None = None,
+    ):
         async with HaikuRAG(db_path=self.db_path) as self.client:
-            results = await self.client.search(query, limit=limit, k=k)
+            results = await self.client.search(
+                query,
+                limit=limit,
+                k=k,
+                mode=mode,
+                collection=collection,
+                k_vector=k_vector,
+                k_fts=k_fts,
+            )
             if not results:
                 self.console.print("[red]No results found.[/red]")
                 return
             for chunk, score in results:
                 self._rich_print_search_result(chunk, score)
 
-    async def ask(self, question: str):
+    async def search_batch(
+        self,
+        queries_file: Path,
+        limit: int = 5,
+        k: int = 60,
+        mode: SearchMode = "hybrid",
+        batch_size: int = 100,
+        collection: str | None = None,
+        k_vector: int | None = None,
+        k_fts: int | None = None,
+    ):
+        """Search for each query in a JSONL file, writing results as NDJSON.
+
+        Each input line is either a JSON string or an object with a `query` key and
+        an optional `id`. Results are written to stdout as soon as each batch of
+        queries completes.
+        """
+        async with HaikuRAG(db_path=self.db_path) as self.client:
+            with open(queries_file) as f:
+                batch: list[tuple[Any, str]] = []
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if isinstance(entry, str):
+                        batch.append((None, entry))
+                    else:
+                        batch.append((entry.get("id"), entry["query"]))
+                    if len(batch) >= batch_size:
+                        await self._write_search_batch(
+                            batch, limit, k, mode, collection, k_vector, k_fts
+                        )
+                        batch = []
+                if batch:
+                    await self._write_search_batch(
+                        batch, limit, k, mode, collection, k_vector, k_fts
+                    )
+
+    async def _write_search_batch(
+        self,
+        batch: list[tuple[Any, str]],
+        limit: int,
+        k: int,
+        mode: SearchMode,
+        collection: str | None = None,
+        k_vector: int | None = None,
+        k_fts: int | None = None,
+    ):
+        results = await self.client.search_many(
+            [query for _, query in batch],
+            limit=limit,
+            k=k,
+            mode=mode,
+            collection=collection,
+            k_vector=k_vector,
+            k_fts=k_fts,
+        )
+        for (query_id, query), query_results in zip(batch, results):
+            record: dict[str, Any] = {"query": query}
+            if query_id is not None:
+                record["id"] = query_id
+            record["results"] = [
+                {
+                    "chunk_id": chunk.id,
+                    "document_id": chunk.document_id,
+                    "document_uri": chunk.document_uri,
+                    "content": chunk.content,
+                    "score": score,
+                }
+                for chunk, score in query_results
+            ]
+            sys.stdout.write(json.dumps(record) + "\n")
+        sys.stdout.flush()
+
+    async def ask(self, question: str, collection: str | None = None):
         async with HaikuRAG(db_path=self.db_path) as self.client:
             try:
-                answer = await self.client.ask(question)
+                answer = await self.client.ask(question, collection=collection)
                 self.console.print(f"[bold blue]Question:[/bold blue] {question}")
                 self.console.print()
                 self.console.print("[bold green]Answer:[/bold green]")
@@ -76,8 +174,7 @@ class HaikuRAGApp:
     async def rebuild(self):
         async with HaikuRAG(db_path=self.db_path, skip_validation=True) as client:
             try:
-                documents = await client.list_documents()
-                total_docs = len(documents)
+                total_docs = await client.count_documents()
 
                 if total_docs == 0:
                     self.console.print(
@@ -94,9 +191,51 @@ class HaikuRAGApp:
                         progress.update(task, advance=1)
 
                 self.console.print("[b]Database rebuild completed successfully.[/b]")
+                if client.store.vector_index.name != "sqlite-vec":
+                    self._print_vector_recall(await client.measure_vector_recall())
             except Exception as e:
                 self.console.print(f"[red]Error rebuilding database: {e}[/red]")
 
+    async def maintain(self, full: bool = False):
+        async with HaikuRAG(db_path=self.db_path) as client:
+            try:
+                report = await client.maintain(full=full)
+            except Exception as e:
+                self.console.print(f"[red]Error maintaining database: {e}[/red]")
+                return
+            self.console.print(
+                f"[b]Removed[/b] {report.orphaned_chunks} orphaned chunks and "
+                f"{report.orphaned_embeddings} orphaned embeddings"
+            )
+            if report.fts_rebuilt:
+                self.console.print("[b]Rebuilt[/b] the full-text search index")
+            if report.documents_recompressed:
+                self.console.print(
+                    f"[b]Recompressed[/b] {report.documents_recompressed} documents"
+                )
+            if report.missing_embeddings:
+                self.console.print(
+                    f"[yellow]{report.missing_embeddings} chunks have no embedding; "
+                    "run `haiku-rag rebuild` to embed them.[/yellow]"
+                )
+            if full:
+                self.console.print(
+                    f"[b]Freed[/b] {report.vector_slots_freed} vector index slots"
+                )
+            self.console.print(
+                f"[b]Reclaimed[/b] {report.reclaimed_bytes / 1024:.1f} KiB "
+                f"({report.size_before / 1024:.1f} KiB -> "
+                f"{report.size_after / 1024:.1f} KiB)"
+            )
+
+    def _print_vector_recall(self, report: VectorIndexRecall):
+        self.console.print(
+            f"[b]Vector index {report.engine}:[/b] "
+            f"recall@{report.k} {report.recall:.3f} over {report.queries} queries, "
+            f"{report.latency_ms:.2f} ms/query "
+            f"(exact scan {report.exact_latency_ms:.2f} ms/query)"
+        )
+
     def show_settings(self):
         """Display current configuration settings."""
         self.console.print("[bold]haiku.rag configuration[/bold]")
@@ -137,6 +276,16 @@ class HaikuRAGApp:
         self.console.print(content)
         self.console.rule()
 
+    def _rich_print_document_header(self, doc: DocumentHeader):
+        """Format a document header for display."""
+        self.console.print(
+            f"[repr.attrib_name]id[/repr.attrib_name]: {doc.id} [repr.attrib_name]uri[/repr.attrib_name]: {doc.uri} [repr.attrib_name]meta[/repr.attrib_name]: {doc.metadata}"
+        )
+        self.console.print(
+            f"[repr.attrib_name]created at[/repr.attrib_name]: {doc.created_at} [repr.attrib_name]updated at[/repr.attrib_name]: {doc.updated_at} [repr.attrib_name]size[/repr.attrib_name]: {doc.size}"
+        )
+        self.console.rule()
+
     def _rich_print_search_result(self, chunk: Chunk, score: float):
         """Format a search result chunk for display."""
         content = Markdown(chunk.content)
@@ -0,0 +1,83 @@
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+
+V = TypeVar("V")
+
+
+class CacheStats(BaseModel):
+    """Hit/miss counters and occupancy of a cache."""
+
+    hits: int = 0
+    misses: int = 0
+    size: int = 0
+    maxsize: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LRUCache(Generic[V]):
+    """A bounded in-process cache evicting the least recently used entries.
+
+    Args:
+        maxsize: Maximum number of entries to keep. A size of 0 disables the cache.
+        ttl: Optional time-to-live of entries in seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[V, float | None]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable) -> V | None:
+        """Return the cached value for key, or None if it is not cached or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            self._misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self._hits += 1
+        return value
+
+    def set(self, key: Hashable, value: V) -> None:
+        """Cache a value, evicting the least recently used entries if full."""
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        self._data.clear()
+        self._hits = 0
+        self._misses = 0
+
+    def stats(self) -> CacheStats:
+        """Return hit/miss statistics for the cache."""
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            size=len(self._data),
+            maxsize=self.maxsize,
+        )
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -63,5 +63,36 @@ class Chunker:
             )  # Step forward, considering overlap
         return chunks
 
+    async def chunk_spans(self, text: str) -> list[tuple[int, int]]:
+        """Split the text like `chunk`, returning character offsets into it.
+
+        Args:
+            text: The text to be split into chunks.
+
+        Returns:
+            A list of (start, end) offsets, such that `text[start:end]` is a chunk.
+        """
+        if not text:
+            return []
+
+        encoded_tokens = self.encoder.encode(text, disallowed_special=())
+
+        if self.chunk_size > len(encoded_tokens):
+            return [(0, len(text))]
+
+        # The character at which each token starts
+        _, offsets = self.encoder.decode_with_offsets(encoded_tokens)
+        offsets.append(len(text))
+
+        spans = []
+        i = 0
+        while i < len(encoded_tokens):
+            end_i = min(i + self.chunk_size, len(encoded_tokens))
+            spans.append((offsets[i], offsets[end_i]))
+            if end_i == len(encoded_tokens):
+                break
+            i += self.chunk_size - self.chunk_overlap
+        return spans
+
 
 chunker = Chunker()
@@ -1,10 +1,13 @@
 import asyncio
+from enum import Enum
 from pathlib import Path
+from typing import cast
 
 import typer
 from rich.console import Console
 
 from haiku.rag.app import HaikuRAGApp
+from haiku.rag.client import SearchMode
 from haiku.rag.utils import get_default_data_dir, is_up_to_date
 
 cli = typer.Typer(
@@ -15,6 +18,15 @@ console = Console()
 event_loop = asyncio.get_event_loop()
 
 
+class SearchModeChoice(str, Enum):
+    """Choices of the search --mode option, one per `SearchMode`."""
+
+    hybrid = "hybrid"
+    vector = "vector"
+    fts = "fts"
+    auto = "auto"
+
+
 async def check_version():
     """Check if haiku.rag is up to date and show warning if not."""
     up_to_date, current_version, latest_version = await is_up_to_date()
@@ -34,6 +46,12 @@ def main():
 
 @cli.command("list", help="List all stored documents")
 def list_documents(
+    collection: str | None = typer.Option(
+        None,
+        "--collection",
+        "-c",
+        help="Only list documents in this collection",
+    ),
     db: Path = typer.Option(
         get_default_data_dir() / "haiku.rag.sqlite",
         "--db",
@@ -41,7 +59,7 @@ def list_documents(
     ),
 ):
     app = HaikuRAGApp(db_path=db)
-    event_loop.run_until_complete(app.list_documents())
+    event_loop.run_until_complete(app.list_documents(collection=collection))
 
 
 @cli.command("add", help="Add a document from text input")
@@ -49,6 +67,12 @@ def add_document_text(
     text: str = typer.Argument(
         help="The text content of the document to add",
     ),
+    collection: str = typer.Option(
+        "default",
+        "--collection",
+        "-c",
+        help="Collection to add the document to",
+    ),
     db: Path = typer.Option(
         get_default_data_dir() / "haiku.rag.sqlite",
         "--db",
@@ -56,7 +80,9 @@ def add_document_text(
     ),
 ):
     app = HaikuRAGApp(db_path=db)
-    event_loop.run_until_complete(app.add_document_from_text(text=text))
+    event_loop.run_until_complete(
+        app.add_document_from_text(text=text, collection=collection)
+    )
 
 
 @cli.command("add-src", help="Add a document from a file path or URL")
@@ -64,6 +90,12 @@ def add_document_src(
     file_path: Path = typer.Argument(
         help="The file path or URL of the document to add",
     ),
+    collection: str = typer.Option(
+        "default",
+        "--collection",
+        "-c",
+        help="Collection to add the document to",
+    ),
     db: Path = typer.Option(
         get_default_data_dir() / "haiku.rag.sqlite",
         "--db",
@@ -71,7 +103,9 @@ def add_document_src(
     ),
 ):
     app = HaikuRAGApp(db_path=db)
-    event_loop.run_until_complete(app.add_document_from_source(file_path=file_path))
+    event_loop.run_until_complete(
+        app.add_document_from_source(file_path=file_path, collection=collection)
+    )
 
 
 @cli.command("get", help="Get and display a document by its ID")
@@ -106,7 +140,8 @@ def delete_document(
 
 @cli.command("search", help="Search for documents by a query")
 def search(
-    query: str = typer.Argument(
+    query: str | None = typer.Argument(
+        None,
         help="The search query to use",
     ),
     limit: int = typer.Option(
@@ -120,6 +155,33 @@ def search(
         "--k",
         help="Reciprocal Rank Fusion k parameter",
     ),
+    k_vector: int | None = typer.Option(
+        None,
+        "--k-vector",
+        help="Number of vector search candidates fused in hybrid search",
+    ),
+    k_fts: int | None = typer.Option(
+        None,
+        "--k-fts",
+        help="Number of full-text search candidates fused in hybrid search",
+    ),
+    mode: SearchModeChoice = typer.Option(
+        SearchModeChoice.hybrid,
+        "--mode",
+        "-m",
+        help="Search mode",
+    ),
+    batch: Path | None = typer.Option(
+        None,
+        "--batch",
+        help="JSONL file of queries to search for, writing results as NDJSON",
+    ),
+    collection: str | None = typer.Option(
+        None,
+        "--collection",
+        "-c",
+        help="Only search documents in this collection",
+    ),
     db: Path = typer.Option(
         get_default_data_dir() / "haiku.rag.sqlite",
         "--db",
@@ -127,7 +189,33 @@ def search(
     ),
 ):
     app = HaikuRAGApp(db_path=db)
-    event_loop.run_until_complete(app.search(query=query, limit=limit, k=k))
+    search_mode = cast(SearchMode, mode.value)
+    if batch is not None:
+        event_loop.run_until_complete(
+            app.search_batch(
+                queries_file=batch,
+                limit=limit,
+                k=k,
+                mode=search_mode,
+                collection=collection,
+                k_vector=k_vector,
+                k_fts=k_fts,
+            )
+        )
+    elif query is not None:
+        event_loop.run_until_complete(
+            app.search(
+                query=query,
+                limit=limit,
+                k=k,
+                mode=search_mode,
+                collection=collection,
+                k_vector=k_vector,
+                k_fts=k_fts,
+            )
+        )
+    else:
+        raise typer.BadParameter("Provide a query or a --batch file of queries")
 
 
 @cli.command("ask", help="Ask a question using the QA agent")
@@ -135,6 +223,12 @@ def ask(
     question: str = typer.Argument(
         help="The question to ask",
     ),
+    collection: str | None = typer.Option(
+        None,
+        "--collection",
+        "-c",
+        help="Only answer from documents in this collection",
+    ),
     db: Path = typer.Option(
         get_default_data_dir() / "haiku.rag.sqlite",
         "--db",
@@ -142,7 +236,7 @@ def ask(
     ),
 ):
     app = HaikuRAGApp(db_path=db)
-    event_loop.run_until_complete(app.ask(question=question))
+    event_loop.run_until_complete(app.ask(question=question, collection=collection))
 
 
 @cli.command("settings", help="Display current configuration settings")
@@ -166,6 +260,26 @@ def rebuild(
     event_loop.run_until_complete(app.rebuild())
 
 
+@cli.command(
+    "maintain",
+    help="Repair orphaned chunks and embeddings, optimize the indexes and reclaim space",
+)
+def maintain(
+    db: Path = typer.Option(
+        get_default_data_dir() / "haiku.rag.sqlite",
+        "--db",
+        help="Path to the SQLite database file",
+    ),
+    full: bool = typer.Option(
+        False,
+        "--full",
+        help="Also compact the indexes and VACUUM the database, blocking writers",
+    ),
+):
+    app = HaikuRAGApp(db_path=db)
+    event_loop.run_until_complete(app.maintain(full=full))
+
+
 @cli.command(
     "serve", help="Start the haiku.rag MCP server (by default in streamable HTTP mode)"
 )
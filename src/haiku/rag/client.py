@@ -1,20 +1,46 @@
+import asyncio
 import hashlib
 import mimetypes
 import tempfile
+import uuid
 from collections.abc import AsyncGenerator
 from pathlib import Path
-from typing import Literal
+from typing import Any, Literal
 from urllib.parse import urlparse
 
 import httpx
 
+from haiku.rag.cache import LRUCache
 from haiku.rag.config import Config
+from haiku.rag.embeddings.cache import embed_queries
 from haiku.rag.reader import FileReader
-from haiku.rag.store.engine import Store
+from haiku.rag.singleflight import SingleFlight
+from haiku.rag.store.engine import MaintenanceReport, Store
+from haiku.rag.store.fts import looks_like_identifier
 from haiku.rag.store.models.chunk import Chunk
-from haiku.rag.store.models.document import Document
+from haiku.rag.store.models.document import Document, DocumentHeader
+from haiku.rag.store.models.filter import SearchFilter
 from haiku.rag.store.repositories.chunk import ChunkRepository
 from haiku.rag.store.repositories.document import DocumentRepository
+from haiku.rag.store.vector import VectorIndexRecall
+
+SearchMode = Literal["hybrid", "vector", "fts", "auto"]
+
+# Search results keyed by database and index generation; any write to the index
+# advances the generation, so stale entries are never returned.
+search_cache: LRUCache[list[tuple[Chunk, float]]] = LRUCache(
+    maxsize=Config.SEARCH_CACHE_SIZE, ttl=Config.SEARCH_CACHE_TTL
+)
+
+# Identical searches, and ingests of the same source, that run concurrently
+# share a single execution.
+search_flights: SingleFlight[list[tuple[Chunk, float]]] = SingleFlight()
+ingest_flights: SingleFlight[Document] = SingleFlight()
+
+
+def _copy_results(results: list[tuple[Chunk, float]]) -> list[tuple[Chunk, float]]:
+    """Copy search results that are shared through the cache or a flight."""
+    return [(chunk.model_copy(deep=True), score) for chunk, score in results]
 
 
 class HaikuRAG:
@@ -36,6 +62,10 @@ class HaikuRAG:
             if not db_path.parent.exists():
                 Path.mkdir(db_path.parent, parents=True)
         self.store = Store(db_path, skip_validation=skip_validation)
+        # In-memory databases are private to their connection, so never share cache entries.
+        self._cache_namespace = (
+            str(db_path.resolve()) if isinstance(db_path, Path) else uuid.uuid4().hex
+        )
         self.document_repository = DocumentRepository(self.store)
         self.chunk_repository = ChunkRepository(self.store)
 
@@ -49,7 +79,11 @@ class HaikuRAG:
         return False
 
     async def create_document(
-        self, content: str, uri: str | None = None, metadata: dict | None = None
+        self,
+        content: str,
+        uri: str | None = None,
+        metadata: dict | None = None,
+        collection: str = "default",
     ) -> Document:
         """Create a new document with optional URI and metadata.
 
@@ -57,6 +91,7 @@ class HaikuRAG:
             content: The text content of the document.
             uri: Optional URI identifier for the document.
             metadata: Optional metadata dictionary.
+            collection: The collection the document belongs to.
 
         Returns:
             The created Document instance.
@@ -65,22 +100,24 @@ class HaikuRAG:
             content=content,
             uri=uri,
             metadata=metadata or {},
+            collection=collection,
         )
         return await self.document_repository.create(document)
 
     async def create_document_from_source(
-        self, source: str | Path, metadata: dict = {}
+        self, source: str | Path, metadata: dict = {}, collection: str = "default"
     ) -> Document:
         """Create or update a document from a file path or URL.
 
         Checks if a document with the same URI already exists:
-        - If MD5 is unchanged, returns existing document
-        - If MD5 changed, updates the document
+        - If MD5 and collection are unchanged, returns existing document
+        - Otherwise, updates the document
         - If no document exists, creates a new one
 
         Args:
             source: File path (as string or Path) or URL to parse
             metadata: Optional metadata dictionary
+            collection: The collection the document belongs to
 
         Returns:
             Document instance (created, updated, or existing)
@@ -88,13 +125,32 @@ class HaikuRAG:
         Raises:
             ValueError: If the file/URL cannot be parsed or doesn't exist
             httpx.RequestError: If URL request fails
+
+        Concurrent calls for the same source share a single execution and result.
         """
+        source_str = str(source)
+        if urlparse(source_str).scheme not in ("http", "https"):
+            source_str = str(Path(source).absolute())
+
+        return await ingest_flights.do(
+            (self._cache_namespace, source_str, collection),
+            lambda: self._create_or_update_document_from_source(
+                source, metadata, collection
+            ),
+        )
+
+    async def _create_or_update_document_from_source(
+        self, source: str | Path, metadata: dict, collection: str = "default"
+    ) -> Document:
+        """Create or update a document from a file path or URL."""
 
         # Check if it's a URL
         source_str = str(source)
         parsed_url = urlparse(source_str)
         if parsed_url.scheme in ("http", "https"):
-            return await self._create_or_update_document_from_url(source_str, metadata)
+            return await self._create_or_update_document_from_url(
+                source_str, metadata, collection
+            )
 
         # Handle as file path
         source_path = Path(source) if isinstance(source, str) else source
@@ -107,11 +163,17 @@ class HaikuRAG:
         uri = source_path.as_uri()
         md5_hash = hashlib.md5(source_path.read_bytes()).hexdigest()
 
-        # Check if document already exists
-        existing_doc = await self.get_document_by_uri(uri)
-        if existing_doc and existing_doc.metadata.get("md5") == md5_hash:
+        # Check if document already exists, without loading its content
+        existing_doc = await self.get_document_header_by_uri(uri)
+        if (
+            existing_doc
+            and existing_doc.metadata.get("md5") == md5_hash
+            and existing_doc.collection == collection
+        ):
             # MD5 unchanged, return existing document
-            return existing_doc
+            document = await self.get_document_by_id(existing_doc.id)
+            assert document is not None
+            return document
 
         content = FileReader.parse_file(source_path)
 
@@ -125,17 +187,24 @@ class HaikuRAG:
 
         if existing_doc:
             # Update existing document
-            existing_doc.content = content
-            existing_doc.metadata = metadata
-            return await self.update_document(existing_doc)
+            return await self.update_document(
+                Document(
+                    id=existing_doc.id,
+                    content=content,
+                    uri=uri,
+                    metadata=metadata,
+                    collection=collection,
+                    created_at=existing_doc.created_at,
+                )
+            )
         else:
             # Create new document
             return await self.create_document(
-                content=content, uri=uri, metadata=metadata
+                content=content, uri=uri, metadata=metadata, collection=collection
             )
 
     async def _create_or_update_document_from_url(
-        self, url: str, metadata: dict = {}
+        self, url: str, metadata: dict = {}, collection: str = "default"
     ) -> Document:
         """Create or update a document from a URL by downloading and parsing the content.
 
@@ -147,6 +216,7 @@ class HaikuRAG:
         Args:
             url: URL to download and parse
             metadata: Optional metadata dictionary
+            collection: The collection the document belongs to
 
         Returns:
             Document instance (created, updated, or existing)
@@ -161,11 +231,17 @@ class HaikuRAG:
 
             md5_hash = hashlib.md5(response.content).hexdigest()
 
-            # Check if document already exists
-            existing_doc = await self.get_document_by_uri(url)
-            if existing_doc and existing_doc.metadata.get("md5") == md5_hash:
+            # Check if document already exists, without loading its content
+            existing_doc = await self.get_document_header_by_uri(url)
+            if (
+                existing_doc
+                and existing_doc.metadata.get("md5") == md5_hash
+                and existing_doc.collection == collection
+            ):
                 # MD5 unchanged, return existing document
-                return existing_doc
+                document = await self.get_document_by_id(existing_doc.id)
+                assert document is not None
+                return document
 
             # Get content type to determine file extension
             content_type = response.headers.get("content-type", "").lower()
@@ -193,12 +269,19 @@ class HaikuRAG:
             metadata.update({"contentType": content_type, "md5": md5_hash})
 
             if existing_doc:
-                existing_doc.content = content
-                existing_doc.metadata = metadata
-                return await self.update_document(existing_doc)
+                return await self.update_document(
+                    Document(
+                        id=existing_doc.id,
+                        content=content,
+                        uri=url,
+                        metadata=metadata,
+                        collection=collection,
+                        created_at=existing_doc.created_at,
+                    )
+                )
             else:
                 return await self.create_document(
-                    content=content, uri=url, metadata=metadata
+                    content=content, uri=url, metadata=metadata, collection=collection
                 )
 
     def _get_extension_from_content_type_or_url(
@@ -254,6 +337,19 @@ class HaikuRAG:
         """
         return await self.document_repository.get_by_uri(uri)
 
+    async def get_document_header_by_uri(self, uri: str) -> DocumentHeader | None:
+        """Get the header of a document by its URI, without loading its content.
+
+        Use this to check whether a document exists, or whether it changed.
+
+        Args:
+            uri: The URI identifier of the document.
+
+        Returns:
+            The DocumentHeader if found, None otherwise.
+        """
+        return await self.document_repository.get_header_by_uri(uri)
+
     async def update_document(self, document: Document) -> Document:
         """Update an existing document."""
         return await self.document_repository.update(document)
@@ -262,47 +358,373 @@ class HaikuRAG:
         """Delete a document by its ID."""
         return await self.document_repository.delete(document_id)
 
+    async def delete_documents(
+        self,
+        ids: list[int] | None = None,
+        uris: list[str] | None = None,
+        uri_prefix: str | None = None,
+    ) -> int:
+        """Delete several documents at once, by ID, URI or URI prefix.
+
+        Documents, chunks and embeddings are removed with a few set-based
+        statements, so that removing a whole directory is a single operation.
+
+        Args:
+            ids: The IDs of the documents to delete.
+            uris: The URIs of the documents to delete.
+            uri_prefix: Delete the documents whose URI starts with this prefix,
+                such as "file:///data/archive/".
+
+        Returns:
+            The number of deleted documents.
+        """
+        if [ids, uris, uri_prefix].count(None) != 2:
+            raise ValueError("Exactly one of ids, uris or uri_prefix is required")
+        if uris is not None:
+            ids = await self.document_repository.get_ids_by_uri(uris)
+        elif uri_prefix is not None:
+            ids = await self.document_repository.get_ids_by_uri_prefix(uri_prefix)
+        assert ids is not None
+        return await self.document_repository.delete_many(ids)
+
     async def list_documents(
-        self, limit: int | None = None, offset: int | None = None
-    ) -> list[Document]:
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        collection: str | None = None,
+        where: dict[str, Any] | None = None,
+    ) -> list[DocumentHeader]:
         """List all documents with optional pagination.
 
+        Only the headers of the documents are read; their content is loaded on
+        demand with `get_document_by_id`.
+
         Args:
             limit: Maximum number of documents to return.
             offset: Number of documents to skip.
+            collection: Only list documents in this collection, if given.
+            where: Only list documents whose metadata has these values, e.g.
+                {"contentType": "application/pdf"}. Lookups by contentType, md5
+                and the keys in METADATA_INDEXES use an index.
 
         Returns:
-            List of Document instances.
+            List of DocumentHeader instances.
         """
-        return await self.document_repository.list_all(limit=limit, offset=offset)
+        return await self.document_repository.list_headers(
+            limit=limit, offset=offset, collection=collection, where=where
+        )
+
+    async def iter_documents(
+        self, collection: str | None = None, batch_size: int = 100
+    ) -> AsyncGenerator[Document, None]:
+        """Iterate over all documents, with their content, in ID order.
+
+        Documents are read in batches by keyset pagination, so that arbitrarily
+        large databases can be processed in constant memory.
+
+        Args:
+            collection: Only iterate over documents in this collection, if given.
+            batch_size: The number of documents read at a time.
+        """
+        async for document in self.document_repository.iter_all(batch_size, collection):
+            yield document
+
+    async def iter_document_headers(
+        self, collection: str | None = None, batch_size: int = 100
+    ) -> AsyncGenerator[DocumentHeader, None]:
+        """Iterate over the headers of all documents, newest first.
+
+        Args:
+            collection: Only iterate over documents in this collection, if given.
+            batch_size: The number of headers read at a time.
+        """
+        async for header in self.document_repository.iter_headers(
+            batch_size, collection
+        ):
+            yield header
+
+    async def iter_chunks(
+        self, collection: str | None = None, batch_size: int = 100
+    ) -> AsyncGenerator[Chunk, None]:
+        """Iterate over all chunks in ID order, reading them in batches.
+
+        Args:
+            collection: Only iterate over chunks of documents in this collection,
+                if given.
+            batch_size: The number of chunks read at a time.
+        """
+        async for chunk in self.chunk_repository.iter_all(batch_size, collection):
+            yield chunk
+
+    async def count_documents(self, collection: str | None = None) -> int:
+        """Count the documents, optionally in one collection."""
+        return await self.document_repository.count(collection)
 
     async def search(
-        self, query: str, limit: int = 5, k: int = 60
+        self,
+        query: str,
+        limit: int = 5,
+        k: int = 60,
+        mode: SearchMode = "hybrid",
+        collection: str | None = None,
+        filters: SearchFilter | None = None,
+        k_vector: int | None = None,
+        k_fts: int | None = None,
     ) -> list[tuple[Chunk, float]]:
-        """Search for relevant chunks using hybrid search (vector similarity + full-text search).
+        """Search for relevant chunks.
 
         Args:
             query: The search query string.
             limit: Maximum number of results to return.
             k: Parameter for Reciprocal Rank Fusion (default: 60).
+            mode: The search strategy:
+                - "hybrid": vector similarity + full-text search fused with RRF (default)
+                - "vector": vector similarity only
+                - "fts": full-text search only, without embedding the query
+                - "auto": full-text search when the query looks like an identifier
+                  and a chunk contains it verbatim, hybrid search otherwise
+            collection: Only search documents in this collection, if given; only
+                that collection's embeddings are scanned.
+            filters: Only search documents matching these conditions, if given.
+                They are applied within the vector and full-text scans, so up
+                to `limit` matching chunks are still returned.
+            k_vector: Number of vector candidates fused by hybrid search
+                (default: SEARCH_VECTOR_CANDIDATES, or 3 * limit if unset).
+            k_fts: Number of full-text candidates fused by hybrid search
+                (default: SEARCH_FTS_CANDIDATES, or 3 * limit if unset).
 
         Returns:
             List of (chunk, score) tuples ordered by relevance.
+
+        Results are served from the search result cache when SEARCH_CACHE_SIZE is set,
+        and identical searches running concurrently share a single execution.
         """
-        return await self.chunk_repository.search_chunks_hybrid(query, limit, k)
+        key = (
+            self._cache_namespace,
+            self._search_generation(),
+            query,
+            limit,
+            k,
+            mode,
+            collection,
+            filters,
+            k_vector,
+            k_fts,
+        )
+        results = search_cache.get(key)
+        if results is None:
+            results = await search_flights.do(
+                key,
+                lambda: self._search_and_cache(
+                    key,
+                    query,
+                    limit,
+                    k,
+                    mode,
+                    None,
+                    collection,
+                    filters,
+                    k_vector,
+                    k_fts,
+                ),
+            )
+        return _copy_results(results)
+
+    async def search_many(
+        self,
+        queries: list[str],
+        limit: int = 5,
+        k: int = 60,
+        mode: SearchMode = "hybrid",
+        collection: str | None = None,
+        filters: SearchFilter | None = None,
+        k_vector: int | None = None,
+        k_fts: int | None = None,
+    ) -> list[list[tuple[Chunk, float]]]:
+        """Search for relevant chunks for several queries at once.
+
+        Queries that are not cached are embedded together in batched provider
+        requests, and their searches then run concurrently on the read connections.
+
+        Args:
+            queries: The search query strings.
+            limit: Maximum number of results to return per query.
+            k: Parameter for Reciprocal Rank Fusion (default: 60).
+            mode: The search strategy, as for `search`.
+            collection: Only search documents in this collection, if given.
+            filters: Only search documents matching these conditions, if given.
+            k_vector: Number of vector candidates fused by hybrid search.
+            k_fts: Number of full-text candidates fused by hybrid search.
+
+        Returns:
+            A list of (chunk, score) tuples per query, in the order of the queries.
+        """
+        generation = self._search_generation()
+        keys = [
+            (
+                self._cache_namespace,
+                generation,
+                query,
+                limit,
+                k,
+                mode,
+                collection,
+                filters,
+                k_vector,
+                k_fts,
+            )
+            for query in queries
+        ]
+        cached = [search_cache.get(key) for key in keys]
+
+        # Identifier queries in auto mode are likely answered without an embedding,
+        # so only the remaining ones are embedded up front.
+        to_embed = list(
+            dict.fromkeys(
+                query
+                for query, results in zip(queries, cached)
+                if results is None
+                and mode != "fts"
+                and not (mode == "auto" and looks_like_identifier(query))
+            )
+        )
+        embeddings = dict(
+            zip(
+                to_embed,
+                await embed_queries(self.chunk_repository.embedder, to_embed),
+            )
+        )
 
-    async def ask(self, question: str) -> str:
+        if mode == "vector":
+            # Pure vector searches are scored together in one pass over the index
+            batched = dict(
+                zip(
+                    to_embed,
+                    await self.chunk_repository.search_chunks_many(
+                        to_embed,
+                        limit,
+                        [embeddings[query] for query in to_embed],
+                        collection,
+                        filters,
+                    ),
+                )
+            )
+            for key, query, results in zip(keys, queries, cached):
+                if results is None:
+                    search_cache.set(key, batched[query])
+            return [
+                _copy_results(results if results is not None else batched[query])
+                for query, results in zip(queries, cached)
+            ]
+
+        async def run(key: tuple, query: str) -> list[tuple[Chunk, float]]:
+            return await search_flights.do(
+                key,
+                lambda: self._search_and_cache(
+                    key,
+                    query,
+                    limit,
+                    k,
+                    mode,
+                    embeddings.get(query),
+                    collection,
+                    filters,
+                    k_vector,
+                    k_fts,
+                ),
+            )
+
+        fetched = await asyncio.gather(
+            *(
+                run(key, query)
+                for key, query, results in zip(keys, queries, cached)
+                if results is None
+            )
+        )
+        pending = iter(fetched)
+        return [
+            _copy_results(results if results is not None else next(pending))
+            for results in cached
+        ]
+
+    def _search_generation(self) -> int | None:
+        """Return the index generation that search results are cached for.
+
+        Reading it costs a query, so it is skipped while the cache is disabled.
+        """
+        if search_cache.maxsize <= 0:
+            return None
+        return self.store.get_generation()
+
+    async def _search_and_cache(
+        self,
+        key: tuple,
+        query: str,
+        limit: int,
+        k: int,
+        mode: SearchMode,
+        query_embedding: list[float] | None = None,
+        collection: str | None = None,
+        filters: SearchFilter | None = None,
+        k_vector: int | None = None,
+        k_fts: int | None = None,
+    ) -> list[tuple[Chunk, float]]:
+        """Run a search and store its results in the search cache."""
+        if mode == "auto":
+            mode = "hybrid"
+            if looks_like_identifier(query):
+                # Exact lookups skip the embedding call entirely when the
+                # identifier occurs verbatim in the best full-text match.
+                identifier = query.strip().strip("`'\"")
+                results = await self.chunk_repository.search_chunks_fts(
+                    f'"{identifier}"', limit, collection, filters
+                )
+                if results and identifier in results[0][0].content:
+                    search_cache.set(key, results)
+                    return results
+
+        if mode == "vector":
+            results = await self.chunk_repository.search_chunks(
+                query,
+                limit,
+                query_embedding=query_embedding,
+                collection=collection,
+                filters=filters,
+            )
+        elif mode == "fts":
+            results = await self.chunk_repository.search_chunks_fts(
+                query, limit, collection, filters
+            )
+        elif mode == "hybrid":
+            results = await self.chunk_repository.search_chunks_hybrid(
+                query,
+                limit,
+                k,
+                k_vector=k_vector,
+                k_fts=k_fts,
+                query_embedding=query_embedding,
+                collection=collection,
+                filters=filters,
+            )
+        else:
+            raise ValueError(f"Unsupported search mode: {mode}")
+
+        search_cache.set(key, results)
+        return results
+
+    async def ask(self, question: str, collection: str | None = None) -> str:
         """Ask a question using the configured QA agent.
 
         Args:
             question: The question to ask.
+            collection: Only answer from documents in this collection, if given.
 
         Returns:
             The generated answer as a string.
         """
         from haiku.rag.qa import get_qa_agent
 
-        qa_agent = get_qa_agent(self)
+        qa_agent = get_qa_agent(self, collection=collection)
         return await qa_agent.answer(question)
 
     async def rebuild_database(self) -> AsyncGenerator[int, None]:
@@ -320,9 +742,7 @@ class HaikuRAG:
         settings_repo = SettingsRepository(self.store)
         settings_repo.save()
 
-        documents = await self.list_documents()
-
-        for doc in documents:
+        async for doc in self.iter_documents():
             if doc.id is not None:
                 await self.chunk_repository.create_chunks_for_document(
                     doc.id, doc.content, commit=False
@@ -331,6 +751,38 @@ class HaikuRAG:
 
         if self.store._connection:
             self.store._connection.commit()
+            self.store.vector_index.train(self.store._connection)
+            self.store._connection.commit()
+        self.store.save_vector_index()
+
+    async def measure_vector_recall(
+        self, k: int = 10, samples: int = 100
+    ) -> VectorIndexRecall:
+        """Measure the recall and latency of vector search against an exact scan.
+
+        Args:
+            k: The number of results per query.
+            samples: The number of stored embeddings to use as queries.
+
+        Returns:
+            The recall of the configured vector index and the mean latency per query.
+        """
+        self.store.sync_vector_index()
+        return await self.store.run_read(
+            self.store.vector_index.measure_recall, k, samples
+        )
+
+    async def maintain(self, full: bool = False) -> MaintenanceReport:
+        """Repair inconsistencies between the tables and reclaim space.
+
+        Args:
+            full: Also compact the FTS and vector indexes and VACUUM the database,
+                which blocks writers while it runs.
+
+        Returns:
+            What was repaired and how many bytes were reclaimed.
+        """
+        return self.store.maintain(full=full)
 
     def close(self):
         """Close the underlying store connection."""
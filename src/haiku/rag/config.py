@@ -18,12 +18,37 @@ class AppConfig(BaseModel):
     EMBEDDINGS_PROVIDER: str = "ollama"
     EMBEDDINGS_MODEL: str = "mxbai-embed-large"
     EMBEDDINGS_VECTOR_DIM: int = 1024
+    EMBEDDINGS_BATCH_WINDOW_MS: float = 0
+    EMBEDDINGS_BATCH_SIZE: int = 32
+    EMBEDDINGS_CACHE_SIZE: int = 1024
 
     QA_PROVIDER: str = "ollama"
     QA_MODEL: str = "qwen3"
 
+    FTS_MAX_TERMS: int = 8
+    SEARCH_VECTOR_CANDIDATES: int = 0
+    SEARCH_FTS_CANDIDATES: int = 0
+
+    VECTOR_INDEX: str = "sqlite-vec"
+    VECTOR_QUANTIZATION: str = "none"
+    VECTOR_REDUCED_DIM: int = 0
+    VECTOR_REDUCTION: str = "truncate"
+    VECTOR_RESCORE_FACTOR: int = 8
+    VECTOR_DOCUMENT_CANDIDATES: int = 0
+    HNSW_M: int = 16
+    HNSW_EF_CONSTRUCTION: int = 200
+    HNSW_EF_SEARCH: int = 64
+    HNSW_RESCORE_FACTOR: int = 2
+
+    METADATA_INDEXES: list[str] = []
+
+    SEARCH_CACHE_SIZE: int = 0
+    SEARCH_CACHE_TTL: float = 300
+
     CHUNK_SIZE: int = 256
     CHUNK_OVERLAP: int = 32
+    CHUNK_STORAGE: str = "content"
+    DOCUMENT_COMPRESSION: str = "none"
 
     OLLAMA_BASE_URL: str = "http://localhost:11434"
 
@@ -43,6 +68,13 @@ class AppConfig(BaseModel):
             ]
         return v
 
+    @field_validator("METADATA_INDEXES", mode="before")
+    @classmethod
+    def parse_metadata_indexes(cls, v):
+        if isinstance(v, str):
+            return [key.strip() for key in v.split(",") if key.strip()]
+        return v
+
 
 # Expose Config object for app to import
 Config = AppConfig.model_validate(os.environ)
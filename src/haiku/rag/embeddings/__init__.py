@@ -1,12 +1,41 @@
 from haiku.rag.config import Config
 from haiku.rag.embeddings.base import EmbedderBase
+from haiku.rag.embeddings.batching import BatchingEmbedder
 from haiku.rag.embeddings.ollama import Embedder as OllamaEmbedder
 
+# Batching embedders are shared per configuration so that concurrent callers
+# (for example MCP tool calls, each with their own client) end up in the same batch.
+_batching_embedders: dict[tuple, BatchingEmbedder] = {}
+
 
 def get_embedder() -> EmbedderBase:
     """
     Factory function to get the appropriate embedder based on the configuration.
+
+    When EMBEDDINGS_BATCH_WINDOW_MS is set, the provider embedder is wrapped in a
+    shared BatchingEmbedder that coalesces concurrent embed calls.
     """
+    if Config.EMBEDDINGS_BATCH_WINDOW_MS <= 0:
+        return _get_provider_embedder()
+
+    key = (
+        Config.EMBEDDINGS_PROVIDER,
+        Config.EMBEDDINGS_MODEL,
+        Config.EMBEDDINGS_VECTOR_DIM,
+        Config.EMBEDDINGS_BATCH_WINDOW_MS,
+        Config.EMBEDDINGS_BATCH_SIZE,
+    )
+    if key not in _batching_embedders:
+        _batching_embedders[key] = BatchingEmbedder(
+            _get_provider_embedder(),
+            window_ms=Config.EMBEDDINGS_BATCH_WINDOW_MS,
+            max_batch_size=Config.EMBEDDINGS_BATCH_SIZE,
+        )
+    return _batching_embedders[key]
+
+
+def _get_provider_embedder() -> EmbedderBase:
+    """Get the embedder for the configured provider."""
 
     if Config.EMBEDDINGS_PROVIDER == "ollama":
         return OllamaEmbedder(Config.EMBEDDINGS_MODEL, Config.EMBEDDINGS_VECTOR_DIM)
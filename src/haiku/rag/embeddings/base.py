@@ -10,3 +10,11 @@ class EmbedderBase:
         raise NotImplementedError(
             "Embedder is an abstract class. Please implement the embed method in a subclass."
         )
+
+    async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        """Embed several texts, in the same order as given.
+
+        Providers that accept multiple inputs per request override this to
+        send a single request; the default falls back to one call per text.
+        """
+        return [await self.embed(text) for text in texts]
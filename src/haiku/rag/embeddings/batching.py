@@ -0,0 +1,83 @@
+import asyncio
+
+from haiku.rag.embeddings.base import EmbedderBase
+
+
+class BatchingEmbedder(EmbedderBase):
+    """Coalesces concurrent embed calls into batched provider requests.
+
+    Calls to `embed` are queued and flushed as a single `embed_batch` request
+    on the wrapped embedder, either when the batching window elapses or when
+    `max_batch_size` texts are pending, whichever comes first.
+
+    Args:
+        embedder: The provider embedder to send batches to.
+        window_ms: How long to wait for more calls before flushing, in milliseconds.
+        max_batch_size: Maximum number of texts sent in a single request.
+    """
+
+    def __init__(
+        self, embedder: EmbedderBase, window_ms: float, max_batch_size: int
+    ) -> None:
+        super().__init__(embedder._model, embedder._vector_dim)
+        self._embedder = embedder
+        self._window = window_ms / 1000
+        self._max_batch_size = max(1, max_batch_size)
+        self._pending: list[tuple[str, asyncio.Future[list[float]]]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._dispatches: set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> list[float]:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[list[float]] = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self._max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._window, self._flush)
+
+        return await future
+
+    async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        embeddings: list[list[float]] = []
+        for start in range(0, len(texts), self._max_batch_size):
+            embeddings.extend(
+                await self._embedder.embed_batch(
+                    texts[start : start + self._max_batch_size]
+                )
+            )
+        return embeddings
+
+    def _flush(self) -> None:
+        """Send all pending texts to the provider as one batch."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._dispatch(batch))
+        self._dispatches.add(task)
+        task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(
+        self, batch: list[tuple[str, asyncio.Future[list[float]]]]
+    ) -> None:
+        """Embed a batch and fan the vectors back out to the waiting callers."""
+        # Identical texts queued in the same window are only embedded once.
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            embeddings = await self._embedder.embed_batch(unique_texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text = dict(zip(unique_texts, embeddings))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
@@ -0,0 +1,79 @@
+from haiku.rag.cache import LRUCache
+from haiku.rag.config import Config
+from haiku.rag.embeddings.base import EmbedderBase
+
+# Process-wide so that repeated queries hit regardless of which client issued them.
+query_embedding_cache: LRUCache[list[float]] = LRUCache(
+    maxsize=Config.EMBEDDINGS_CACHE_SIZE
+)
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache lookups by collapsing whitespace."""
+    return " ".join(query.split())
+
+
+def _cache_key(embedder: EmbedderBase, query: str) -> tuple:
+    return (
+        Config.EMBEDDINGS_PROVIDER,
+        embedder._model,
+        embedder._vector_dim,
+        normalize_query(query),
+    )
+
+
+async def embed_query(embedder: EmbedderBase, query: str) -> list[float]:
+    """Embed a search query, reusing cached embeddings for repeated queries.
+
+    Args:
+        embedder: The embedder used on a cache miss.
+        query: The search query.
+
+    Returns:
+        The query embedding.
+    """
+    key = _cache_key(embedder, query)
+    embedding = query_embedding_cache.get(key)
+    if embedding is None:
+        embedding = await embedder.embed(query)
+        query_embedding_cache.set(key, embedding)
+    return embedding
+
+
+async def embed_queries(
+    embedder: EmbedderBase, queries: list[str], batch_size: int | None = None
+) -> list[list[float]]:
+    """Embed several search queries, sending the uncached ones in batches.
+
+    Args:
+        embedder: The embedder used for cache misses.
+        queries: The search queries.
+        batch_size: Maximum number of texts per provider request
+            (default: EMBEDDINGS_BATCH_SIZE).
+
+    Returns:
+        The query embeddings, in the order of the queries.
+    """
+    batch_size = max(1, batch_size or Config.EMBEDDINGS_BATCH_SIZE)
+    keys = [_cache_key(embedder, query) for query in queries]
+
+    embeddings: dict[tuple, list[float]] = {}
+    missing: dict[tuple, str] = {}
+    for key, query in zip(keys, queries):
+        if key in embeddings or key in missing:
+            continue
+        embedding = query_embedding_cache.get(key)
+        if embedding is None:
+            missing[key] = query
+        else:
+            embeddings[key] = embedding
+
+    missing_keys = list(missing)
+    for start in range(0, len(missing_keys), batch_size):
+        batch = missing_keys[start : start + batch_size]
+        vectors = await embedder.embed_batch([missing[key] for key in batch])
+        for key, embedding in zip(batch, vectors):
+            embeddings[key] = embedding
+            query_embedding_cache.set(key, embedding)
+
+    return [embeddings[key] for key in keys]
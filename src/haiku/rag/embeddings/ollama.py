@@ -1,3 +1,5 @@
+import asyncio
+
 from ollama import AsyncClient
 
 from haiku.rag.config import Config
@@ -12,3 +14,13 @@ class Embedder(EmbedderBase):
         client = AsyncClient(host=Config.OLLAMA_BASE_URL)
         res = await client.embeddings(model=self._model, prompt=text)
         return list(res["embedding"])
+
+    async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        # /api/embed accepts several inputs but returns normalized vectors, which
+        # would not match those of existing databases; send the texts to the
+        # legacy endpoint concurrently over one client instead
+        client = AsyncClient(host=Config.OLLAMA_BASE_URL)
+        responses = await asyncio.gather(
+            *(client.embeddings(model=self._model, prompt=text) for text in texts)
+        )
+        return [list(res["embedding"]) for res in responses]
@@ -16,5 +16,16 @@ try:
             )
             return response.data[0].embedding
 
+        async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+            client = AsyncOpenAI()
+            response = await client.embeddings.create(
+                model=self._model,
+                input=texts,
+            )
+            return [
+                item.embedding
+                for item in sorted(response.data, key=lambda item: item.index)
+            ]
+
 except ImportError:
     pass
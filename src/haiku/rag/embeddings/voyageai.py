@@ -13,5 +13,10 @@ try:
             res = client.embed([text], model=self._model, output_dtype="float")
             return res.embeddings[0]  # type: ignore[return-value]
 
+        async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+            client = Client()
+            res = client.embed(texts, model=self._model, output_dtype="float")
+            return res.embeddings  # type: ignore[return-value]
+
 except ImportError:
     pass
@@ -18,23 +18,36 @@ class DocumentResult(BaseModel):
     content: str
     uri: str | None = None
     metadata: dict[str, Any] = {}
+    collection: str = "default"
     created_at: str
     updated_at: str
 
 
+class DocumentHeaderResult(BaseModel):
+    id: int
+    uri: str | None = None
+    metadata: dict[str, Any] = {}
+    collection: str = "default"
+    created_at: str
+    updated_at: str
+    size: int
+
+
 def create_mcp_server(db_path: Path | Literal[":memory:"]) -> FastMCP:
     """Create an MCP server with the specified database path."""
     mcp = FastMCP("haiku-rag")
 
     @mcp.tool()
     async def add_document_from_file(
-        file_path: str, metadata: dict[str, Any] | None = None
+        file_path: str,
+        metadata: dict[str, Any] | None = None,
+        collection: str = "default",
     ) -> int | None:
         """Add a document to the RAG system from a file path."""
         try:
             async with HaikuRAG(db_path) as rag:
                 document = await rag.create_document_from_source(
-                    Path(file_path), metadata or {}
+                    Path(file_path), metadata or {}, collection
                 )
                 return document.id
         except Exception:
@@ -42,34 +55,45 @@ def create_mcp_server(db_path: Path | Literal[":memory:"]) -> FastMCP:
 
     @mcp.tool()
     async def add_document_from_url(
-        url: str, metadata: dict[str, Any] | None = None
+        url: str,
+        metadata: dict[str, Any] | None = None,
+        collection: str = "default",
     ) -> int | None:
         """Add a document to the RAG system from a URL."""
         try:
             async with HaikuRAG(db_path) as rag:
-                document = await rag.create_document_from_source(url, metadata or {})
+                document = await rag.create_document_from_source(
+                    url, metadata or {}, collection
+                )
                 return document.id
         except Exception:
             return None
 
     @mcp.tool()
     async def add_document_from_text(
-        content: str, uri: str | None = None, metadata: dict[str, Any] | None = None
+        content: str,
+        uri: str | None = None,
+        metadata: dict[str, Any] | None = None,
+        collection: str = "default",
     ) -> int | None:
         """Add a document to the RAG system from text content."""
         try:
             async with HaikuRAG(db_path) as rag:
-                document = await rag.create_document(content, uri, metadata or {})
+                document = await rag.create_document(
+                    content, uri, metadata or {}, collection
+                )
                 return document.id
         except Exception:
             return None
 
     @mcp.tool()
-    async def search_documents(query: str, limit: int = 5) -> list[SearchResult]:
-        """Search the RAG system for documents using hybrid search (vector similarity + full-text search)."""
+    async def search_documents(
+        query: str, limit: int = 5, collection: str | None = None
+    ) -> list[SearchResult]:
+        """Search the RAG system for documents using hybrid search (vector similarity + full-text search), optionally within one collection."""
         try:
             async with HaikuRAG(db_path) as rag:
-                results = await rag.search(query, limit)
+                results = await rag.search(query, limit, collection=collection)
 
                 search_results = []
                 for chunk, score in results:
@@ -100,6 +124,7 @@ def create_mcp_server(db_path: Path | Literal[":memory:"]) -> FastMCP:
                     content=document.content,
                     uri=document.uri,
                     metadata=document.metadata,
+                    collection=document.collection,
                     created_at=str(document.created_at),
                     updated_at=str(document.updated_at),
                 )
@@ -108,21 +133,27 @@ def create_mcp_server(db_path: Path | Literal[":memory:"]) -> FastMCP:
 
     @mcp.tool()
     async def list_documents(
-        limit: int | None = None, offset: int | None = None
-    ) -> list[DocumentResult]:
-        """List all documents with optional pagination."""
+        limit: int | None = None,
+        offset: int | None = None,
+        collection: str | None = None,
+    ) -> list[DocumentHeaderResult]:
+        """List all documents with optional pagination, optionally within one collection.
+
+        Documents are listed without their content, which get_document returns.
+        """
         try:
             async with HaikuRAG(db_path) as rag:
-                documents = await rag.list_documents(limit, offset)
+                documents = await rag.list_documents(limit, offset, collection)
 
                 return [
-                    DocumentResult(
+                    DocumentHeaderResult(
                         id=doc.id,
-                        content=doc.content,
                         uri=doc.uri,
                         metadata=doc.metadata,
+                        collection=doc.collection,
                         created_at=str(doc.created_at),
                         updated_at=str(doc.updated_at),
+                        size=doc.size,
                     )
                     for doc in documents
                 ]
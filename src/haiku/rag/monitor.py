@@ -33,11 +33,14 @@ class FileWatcher:
             await self.handler(changes)
 
     async def handler(self, changes: set[tuple[Change, str]]):
+        deleted = []
         for change, path in changes:
             if change == Change.added or change == Change.modified:
                 await self._upsert_document(Path(path))
             elif change == Change.deleted:
-                await self._delete_document(Path(path))
+                deleted.append(Path(path))
+        if deleted:
+            await self._delete_documents(deleted)
 
     async def refresh(self):
         for path in self.paths:
@@ -48,7 +51,7 @@ class FileWatcher:
     async def _upsert_document(self, file: Path) -> Document | None:
         try:
             uri = file.as_uri()
-            existing_doc = await self.client.get_document_by_uri(uri)
+            existing_doc = await self.client.get_document_header_by_uri(uri)
             if existing_doc:
                 doc = await self.client.create_document_from_source(str(file))
                 logger.info(f"Updated document {existing_doc.id} from {file}")
@@ -61,13 +64,12 @@ class FileWatcher:
             logger.error(f"Failed to upsert document from {file}: {e}")
             return None
 
-    async def _delete_document(self, file: Path):
+    async def _delete_documents(self, files: list[Path]):
+        """Delete the documents of several files, such as a removed directory, at once."""
         try:
-            uri = file.as_uri()
-            existing_doc = await self.client.get_document_by_uri(uri)
-
-            if existing_doc and existing_doc.id:
-                await self.client.delete_document(existing_doc.id)
-                logger.info(f"Deleted document {existing_doc.id} for {file}")
+            deleted = await self.client.delete_documents(
+                uris=[file.as_uri() for file in files]
+            )
+            logger.info(f"Deleted {deleted} documents for {len(files)} files")
         except Exception as e:
-            logger.error(f"Failed to delete document for {file}: {e}")
+            logger.error(f"Failed to delete documents for {len(files)} files: {e}")
@@ -8,8 +8,13 @@ try:
     from haiku.rag.qa.base import QuestionAnswerAgentBase
 
     class QuestionAnswerAnthropicAgent(QuestionAnswerAgentBase):
-        def __init__(self, client: HaikuRAG, model: str = "claude-3-5-haiku-20241022"):
-            super().__init__(client, model or self._model)
+        def __init__(
+            self,
+            client: HaikuRAG,
+            model: str = "claude-3-5-haiku-20241022",
+            collection: str | None = None,
+        ):
+            super().__init__(client, model or self._model, collection)
             self.tools: Sequence[ToolParam] = [
                 ToolParam(
                     name="search_documents",
@@ -70,7 +75,7 @@ try:
                                 )
 
                                 search_results = await self._client.search(
-                                    query, limit=limit
+                                    query, limit=limit, collection=self._collection
                                 )
 
                                 context_chunks = []
@@ -6,9 +6,12 @@ class QuestionAnswerAgentBase:
     _model: str = ""
     _system_prompt: str = SYSTEM_PROMPT
 
-    def __init__(self, client: HaikuRAG, model: str = ""):
+    def __init__(
+        self, client: HaikuRAG, model: str = "", collection: str | None = None
+    ):
         self._model = model
         self._client = client
+        self._collection = collection
 
     async def answer(self, question: str) -> str:
         raise NotImplementedError(
@@ -15,8 +15,13 @@ try:
     from haiku.rag.qa.base import QuestionAnswerAgentBase
 
     class QuestionAnswerOpenAIAgent(QuestionAnswerAgentBase):
-        def __init__(self, client: HaikuRAG, model: str = "gpt-4o-mini"):
-            super().__init__(client, model or self._model)
+        def __init__(
+            self,
+            client: HaikuRAG,
+            model: str = "gpt-4o-mini",
+            collection: str | None = None,
+        ):
+            super().__init__(client, model or self._model, collection)
             self.tools: Sequence[ChatCompletionToolParam] = [
                 ChatCompletionToolParam(tool) for tool in self.tools
             ]
@@ -71,7 +76,7 @@ try:
                             limit = int(args.get("limit", 3))
 
                             search_results = await self._client.search(
-                                query, limit=limit
+                                query, limit=limit, collection=self._collection
                             )
 
                             context_chunks = []
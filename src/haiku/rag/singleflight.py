@@ -0,0 +1,44 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Deduplicates concurrent calls that share a key.
+
+    While a call for a key is in flight, further calls with the same key wait
+    for and share its result instead of starting their own execution.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Future[T]] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn for key, or join the execution already in flight for key.
+
+        Args:
+            key: Identifies calls that can share a single execution.
+            fn: Factory for the awaitable to run if no call is in flight.
+
+        Returns:
+            The result of the shared execution.
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        # Shielded so that one caller being cancelled does not cancel the others.
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future[T]) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every caller was cancelled.
+        if not future.cancelled():
+            future.exception()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
@@ -0,0 +1,93 @@
+import sqlite3
+import zlib
+
+# Compressed content is stored as a BLOB starting with the name of its codec;
+# uncompressed content stays TEXT, so both can be read from the same column
+CODECS = ["none", "zlib", "zstd"]
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "zstd compression requires the 'zstandard' package. "
+            "Please install haiku.rag with the 'zstd' extra:"
+            "uv pip install haiku.rag --extra zstd"
+        )
+    return zstandard
+
+
+def compress(text: str, codec: str) -> str | bytes:
+    """Compress text for storage with one of `CODECS`."""
+    if codec == "none":
+        return text
+    if codec == "zlib":
+        return b"zlib:" + zlib.compress(text.encode())
+    if codec == "zstd":
+        return b"zstd:" + _zstd().ZstdCompressor().compress(text.encode())
+    raise ValueError(f"Unsupported document compression: {codec}")
+
+
+def decompress(value: str | bytes) -> str:
+    """Return the text of a value stored by `compress`."""
+    if isinstance(value, str):
+        return value
+    codec, _, data = value.partition(b":")
+    if codec == b"zlib":
+        return zlib.decompress(data).decode()
+    if codec == b"zstd":
+        return _zstd().ZstdDecompressor().decompress(data).decode()
+    raise ValueError(f"Unsupported document compression: {codec.decode()}")
+
+
+def recompress_documents(
+    db: sqlite3.Connection, codec: str, batch_size: int = 100
+) -> int:
+    """Store the content of existing documents with another codec.
+
+    Documents are converted in batches, each committed on its own. Documents
+    with chunks stored as offsets are left uncompressed, since their chunks are
+    cut from the stored text.
+
+    Returns:
+        The number of converted documents.
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Unsupported document compression: {codec}")
+    if codec == "none":
+        stale = "typeof(content) = 'blob'"
+    else:
+        stale = "(typeof(content) = 'text' OR substr(content, 1, :length) != :prefix)"
+    prefix = f"{codec}:".encode()
+
+    converted = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            f"""
+            SELECT id, content FROM documents
+            WHERE id > :last_id AND {stale}
+            AND id NOT IN (SELECT document_id FROM chunks WHERE end_offset IS NOT NULL)
+            ORDER BY id
+            LIMIT :batch_size
+            """,
+            {
+                "last_id": last_id,
+                "length": len(prefix),
+                "prefix": prefix,
+                "batch_size": batch_size,
+            },
+        ).fetchall()
+        if not rows:
+            return converted
+        db.executemany(
+            "UPDATE documents SET content = ? WHERE id = ?",
+            [
+                (compress(decompress(content), codec), document_id)
+                for document_id, content in rows
+            ],
+        )
+        db.commit()
+        converted += len(rows)
+        last_id = rows[-1][0]
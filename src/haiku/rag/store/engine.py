@@ -1,24 +1,59 @@
+import asyncio
 import sqlite3
-import struct
+from collections.abc import Callable
 from importlib import metadata
 from pathlib import Path
-from typing import Literal
+from typing import Literal, TypeVar
 
 import sqlite_vec
 from packaging.version import parse
+from pydantic import BaseModel
 from rich.console import Console
 
 from haiku.rag.config import Config
-from haiku.rag.embeddings import get_embedder
+from haiku.rag.store.compression import recompress_documents
+from haiku.rag.store.metadata import (
+    CHUNK_METADATA_KEYS,
+    DOCUMENT_METADATA_KEYS,
+    add_metadata_column,
+    metadata_columns,
+)
 from haiku.rag.store.upgrades import upgrades
+from haiku.rag.store.vector import (
+    DocumentCentroids,
+    get_vector_index,
+    serialize_embedding,
+)
 from haiku.rag.utils import int_to_semantic_version, semantic_version_to_int
 
+T = TypeVar("T")
+
+
+class MaintenanceReport(BaseModel):
+    """What a maintenance run repaired and how much space it reclaimed."""
+
+    orphaned_chunks: int = 0
+    orphaned_embeddings: int = 0
+    missing_embeddings: int = 0
+    documents_recompressed: int = 0
+    fts_rebuilt: bool = False
+    vector_slots_freed: int = 0
+    size_before: int = 0
+    size_after: int = 0
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        return self.size_before - self.size_after
+
 
 class Store:
     def __init__(
         self, db_path: Path | Literal[":memory:"], skip_validation: bool = False
     ):
         self.db_path: Path | Literal[":memory:"] = db_path
+        self._readers: list[sqlite3.Connection] = []
+        self.vector_index = get_vector_index(db_path)
+        self.document_centroids = self._get_document_centroids()
         self.create_or_update_db()
 
         # Validate config compatibility after connection is established
@@ -27,16 +62,56 @@ class Store:
 
             settings_repo = SettingsRepository(self)
             settings_repo.validate_config_compatibility()
-        current_version = metadata.version("haiku.rag")
-        self.set_user_version(current_version)
+        self.create_metadata_indexes()
+
+        db = self._connection
+        assert db is not None, "Failed to open the database"
+
+        # Generation of the index that the vector index is known to reflect
+        self._vector_generation = self.get_generation()
+        if not self.vector_index.load(db, self._vector_generation):
+            self.vector_index.rebuild(db)
+        if self.document_centroids is not None:
+            # Centroids are only maintained while two-stage search is enabled
+            self.document_centroids.create(db)
+            if not self.document_centroids.is_current(db):
+                self.document_centroids.rebuild(db)
+        db.commit()
+
+    def create_metadata_indexes(self) -> None:
+        """Promote the configured metadata keys to indexed generated columns.
+
+        Keys listed in METADATA_INDEXES are promoted next to the built-in ones,
+        including on existing databases, so that filtering and listing by them
+        uses an index instead of parsing the metadata of every row.
+        """
+        assert self._connection is not None
+        for key in dict.fromkeys([*DOCUMENT_METADATA_KEYS, *Config.METADATA_INDEXES]):
+            add_metadata_column(self._connection, "documents", key)
+        for key in CHUNK_METADATA_KEYS:
+            add_metadata_column(self._connection, "chunks", key, group_by="document_id")
+        self._connection.commit()
+        self.document_metadata_keys = metadata_columns(self._connection, "documents")
+
+    def _get_document_centroids(self) -> DocumentCentroids | None:
+        """Document centroids for two-stage search, if VECTOR_DOCUMENT_CANDIDATES is set."""
+        if not Config.VECTOR_DOCUMENT_CANDIDATES:
+            return None
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "Two-stage vector search requires the 'numpy' package. "
+                "Please install haiku.rag with the 'numpy' extra:"
+                "uv pip install haiku.rag --extra numpy"
+            )
+        return DocumentCentroids(self.vector_index.dim)
 
     def create_or_update_db(self):
         """Create the database and tables with sqlite-vec support for embeddings."""
         current_version = metadata.version("haiku.rag")
 
-        db = sqlite3.connect(self.db_path)
-        db.enable_load_extension(True)
-        sqlite_vec.load(db)
+        db = self._connect()
         self._connection = db
         existing_tables = [
             row[0]
@@ -47,20 +122,30 @@ class Store:
 
         # If we have a db already, perform upgrades and return
         if self.db_path != ":memory:" and "documents" in existing_tables:
-            # Upgrade database
+            # Upgrade database. The steps and the new version are committed
+            # together, so that a failed upgrade leaves the database as it was
             console = Console()
             db_version = self.get_user_version()
-            for version, steps in upgrades:
-                if parse(current_version) >= parse(version) and parse(version) > parse(
-                    db_version
-                ):
-                    for step in steps:
-                        step(db)
-                        console.print(
-                            f"[green][b]DB Upgrade: [/b]{step.__doc__}[/green]"
-                        )
+            pending = [
+                step
+                for version, steps in upgrades
+                if parse(current_version) >= parse(version) > parse(db_version)
+                for step in steps
+            ]
+            db.execute("BEGIN")
+            try:
+                for step in pending:
+                    step(db)
+                    console.print(f"[green][b]DB Upgrade: [/b]{step.__doc__}[/green]")
+                self.set_user_version(current_version)
+                db.commit()
+            except BaseException:
+                db.rollback()
+                raise
             return
 
+        # Let maintenance return the pages of deleted rows to the file system
+        db.execute("PRAGMA auto_vacuum = INCREMENTAL")
         # Create documents table
         db.execute("""
             CREATE TABLE IF NOT EXISTS documents (
@@ -68,8 +153,10 @@ class Store:
                 content TEXT NOT NULL,
                 uri TEXT,
                 metadata TEXT DEFAULT '{}',
+                collection TEXT NOT NULL DEFAULT 'default',
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                size INTEGER NOT NULL DEFAULT 0
             )
         """)
         # Create chunks table
@@ -79,25 +166,105 @@ class Store:
                 document_id INTEGER NOT NULL,
                 content TEXT NOT NULL,
                 metadata TEXT DEFAULT '{}',
+                start_offset INTEGER,
+                end_offset INTEGER,
                 FOREIGN KEY (document_id) REFERENCES documents (id) ON DELETE CASCADE
             )
         """)
-        # Create vector table for chunk embeddings
-        embedder = get_embedder()
-        db.execute(f"""
-            CREATE VIRTUAL TABLE IF NOT EXISTS chunk_embeddings USING vec0(
-                chunk_id INTEGER PRIMARY KEY,
-                embedding FLOAT[{embedder._vector_dim}]
-            )
+        # Chunks with offsets store no text; theirs is cut from the document
+        db.execute("""
+            CREATE VIEW IF NOT EXISTS chunk_texts AS
+            SELECT
+                c.id,
+                c.document_id,
+                CASE WHEN c.end_offset IS NULL THEN c.content
+                ELSE substr(d.content, c.start_offset + 1, c.end_offset - c.start_offset)
+                END AS content
+            FROM chunks c
+            LEFT JOIN documents d ON d.id = c.document_id
         """)
+        # Create vector table for chunk embeddings
+        self.vector_index.create(db)
         # Create FTS5 table for full-text search
         db.execute("""
             CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
                 content,
-                content='chunks',
+                content='chunk_texts',
                 content_rowid='id'
             )
         """)
+        # Keep the external-content FTS5 table in sync with chunks, including
+        # on bulk statements and cascades
+        db.execute("""
+            CREATE TRIGGER IF NOT EXISTS chunks_fts_insert AFTER INSERT ON chunks
+            BEGIN
+                INSERT INTO chunks_fts (rowid, content)
+                SELECT id, content FROM chunk_texts WHERE id = new.id;
+            END
+        """)
+        db.execute("""
+            CREATE TRIGGER IF NOT EXISTS chunks_fts_delete AFTER DELETE ON chunks
+            BEGIN
+                INSERT INTO chunks_fts (chunks_fts, rowid, content)
+                VALUES ('delete', old.id, CASE WHEN old.end_offset IS NULL THEN old.content
+                ELSE (
+                    SELECT substr(content, old.start_offset + 1, old.end_offset - old.start_offset)
+                    FROM documents WHERE id = old.document_id
+                ) END);
+            END
+        """)
+        db.execute("""
+            CREATE TRIGGER IF NOT EXISTS chunks_fts_update
+            AFTER UPDATE OF document_id, content, start_offset, end_offset ON chunks
+            BEGIN
+                INSERT INTO chunks_fts (chunks_fts, rowid, content)
+                VALUES ('delete', old.id, CASE WHEN old.end_offset IS NULL THEN old.content
+                ELSE (
+                    SELECT substr(content, old.start_offset + 1, old.end_offset - old.start_offset)
+                    FROM documents WHERE id = old.document_id
+                ) END);
+                INSERT INTO chunks_fts (rowid, content)
+                SELECT id, content FROM chunk_texts WHERE id = new.id;
+            END
+        """)
+        # Cascades run once the document is gone, so delete its chunks while
+        # their text can still be read for the FTS5 delete
+        db.execute("""
+            CREATE TRIGGER IF NOT EXISTS documents_chunks_delete
+            BEFORE DELETE ON documents
+            BEGIN
+                DELETE FROM chunks WHERE document_id = old.id;
+            END
+        """)
+        db.execute("""
+            CREATE TRIGGER IF NOT EXISTS documents_chunks_fts_before_update
+            BEFORE UPDATE OF content ON documents
+            BEGIN
+                INSERT INTO chunks_fts (chunks_fts, rowid, content)
+                SELECT 'delete', id, content FROM chunk_texts
+                WHERE id IN (
+                    SELECT id FROM chunks
+                    WHERE document_id = old.id AND end_offset IS NOT NULL
+                );
+            END
+        """)
+        db.execute("""
+            CREATE TRIGGER IF NOT EXISTS documents_chunks_fts_after_update
+            AFTER UPDATE OF content ON documents
+            BEGIN
+                INSERT INTO chunks_fts (rowid, content)
+                SELECT id, content FROM chunk_texts
+                WHERE id IN (
+                    SELECT id FROM chunks
+                    WHERE document_id = new.id AND end_offset IS NOT NULL
+                );
+            END
+        """)
+        # Create FTS5 vocabulary table exposing term document frequencies
+        db.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts_vocab
+            USING fts5vocab(chunks_fts, 'row')
+        """)
         # Create settings table for storing current configuration
         db.execute("""
             CREATE TABLE IF NOT EXISTS settings (
@@ -111,12 +278,98 @@ class Store:
             "INSERT OR IGNORE INTO settings (id, settings) VALUES (1, ?)",
             (settings_json,),
         )
+        # Create index generation table, bumped on every write to the index
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS index_generation (
+                id INTEGER PRIMARY KEY DEFAULT 1,
+                generation INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        db.execute(
+            "INSERT OR IGNORE INTO index_generation (id, generation) VALUES (1, 0)"
+        )
         # Create indexes for better performance
         db.execute(
             "CREATE INDEX IF NOT EXISTS idx_chunks_document_id ON chunks(document_id)"
         )
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_documents_collection ON documents(collection)"
+        )
+        # Indexes for the document filters of full-text searches. They also
+        # cover the columns of document headers, so that listing documents and
+        # looking them up by URI never reads the rows holding their content
+        db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_documents_uri
+            ON documents(uri, collection, created_at, updated_at, size, metadata)
+        """)
+        db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_documents_created_at
+            ON documents(created_at, uri, collection, updated_at, size, metadata)
+        """)
+        self.set_user_version(current_version)
         db.commit()
 
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        """Open a connection to the database with sqlite-vec loaded."""
+        db = sqlite3.connect(self.db_path, check_same_thread=check_same_thread)
+        db.enable_load_extension(True)
+        sqlite_vec.load(db)
+        # Deleting documents cascades to their chunks
+        db.execute("PRAGMA foreign_keys = ON")
+        return db
+
+    async def run_read(self, fn: Callable[..., T], *args) -> T:
+        """Run a read-only function against the database without blocking the event loop.
+
+        For file databases fn is called in a worker thread with a pooled read
+        connection, so that reads can overlap with other awaited work. In-memory
+        databases are private to their connection, so fn runs inline on it.
+
+        Args:
+            fn: Function called as fn(connection, *args).
+            *args: Additional arguments passed to fn.
+
+        Returns:
+            The return value of fn.
+        """
+        if self._connection is None:
+            raise ValueError("Store connection is not available")
+
+        if self.db_path == ":memory:":
+            return fn(self._connection, *args)
+        return await asyncio.to_thread(self._run_on_reader, fn, *args)
+
+    def _run_on_reader(self, fn: Callable[..., T], *args) -> T:
+        """Call fn with a read connection taken from (and returned to) the pool."""
+        try:
+            reader = self._readers.pop()
+        except IndexError:
+            reader = self._connect(check_same_thread=False)
+        try:
+            return fn(reader, *args)
+        finally:
+            if self._connection is None:
+                reader.close()
+            else:
+                self._readers.append(reader)
+
+    def sync_vector_index(self) -> None:
+        """Rebuild the vector index if the database was written to elsewhere.
+
+        Writes through this store keep the vector index up to date; a generation
+        it does not know about means another connection changed the embeddings.
+        """
+        if self._connection is None:
+            raise ValueError("Store connection is not available")
+
+        generation = self.get_generation()
+        if generation != self._vector_generation:
+            # The other writer may have saved the index for this generation
+            if not self.vector_index.load(self._connection, generation):
+                self.vector_index.rebuild(self._connection)
+                self._connection.commit()
+            self._vector_generation = generation
+
     def get_user_version(self) -> str:
         """Returns the SQLite user version"""
         if self._connection is None:
@@ -135,32 +388,202 @@ class Store:
             f"PRAGMA user_version = {semantic_version_to_int(version)};"
         )
 
+    def get_generation(self) -> int:
+        """Returns the index generation, which changes whenever the index is written to."""
+        if self._connection is None:
+            raise ValueError("Store connection is not available")
+
+        cursor = self._connection.execute(
+            "SELECT generation FROM index_generation WHERE id = 1"
+        )
+        row = cursor.fetchone()
+        return row[0] if row else 0
+
+    def bump_generation(self) -> None:
+        """Advances the index generation as part of the current transaction.
+
+        The vector index only follows the new generation if it reflected the
+        previous one; otherwise the generation also covers writes made through
+        other connections, and the index is reloaded before the next search.
+        """
+        if self._connection is None:
+            raise ValueError("Store connection is not available")
+
+        generation = self.get_generation()
+        self._connection.execute(
+            "UPDATE index_generation SET generation = generation + 1 WHERE id = 1"
+        )
+        if generation == self._vector_generation:
+            self._vector_generation = generation + 1
+
     def recreate_embeddings_table(self) -> None:
         """Recreate the embeddings table with current vector dimensions."""
         if self._connection is None:
             raise ValueError("Store connection is not available")
 
         # Drop existing embeddings table
-        self._connection.execute("DROP TABLE IF EXISTS chunk_embeddings")
+        self.vector_index.drop(self._connection)
+        if self.document_centroids is not None:
+            self.document_centroids.drop(self._connection)
 
         # Recreate with current dimensions
-        embedder = get_embedder()
-        self._connection.execute(f"""
-            CREATE VIRTUAL TABLE chunk_embeddings USING vec0(
-                chunk_id INTEGER PRIMARY KEY,
-                embedding FLOAT[{embedder._vector_dim}]
-            )
-        """)
+        self.vector_index = get_vector_index(self.db_path)
+        self.vector_index.create(self._connection)
+        self.document_centroids = self._get_document_centroids()
+        if self.document_centroids is not None:
+            self.document_centroids.create(self._connection)
 
         self._connection.commit()
 
+    def maintain(self, full: bool = False) -> MaintenanceReport:
+        """Check the consistency of the database and reclaim space.
+
+        Chunks of deleted documents and embeddings of deleted chunks are removed,
+        and the FTS5 index is rebuilt if it does not match the chunks. Document
+        content is converted in batches to the configured compression. The FTS5
+        segments are then merged, query planner statistics refreshed, and free
+        pages returned to the file system. Each step commits on its own, so that
+        a routine run only holds the write lock briefly and can be scheduled
+        while the database is being served.
+
+        Args:
+            full: Also merge the FTS5 index into a single segment, rewrite the
+                vector tables without the slots of deleted embeddings, and VACUUM
+                the whole file. This blocks writers for the duration and briefly
+                needs as much free disk space as the database.
+
+        Returns:
+            What was repaired and the database size before and after.
+        """
+        if self._connection is None:
+            raise ValueError("Store connection is not available")
+        db = self._connection
+
+        def size() -> int:
+            (page_count,) = db.execute("PRAGMA page_count").fetchone()
+            (page_size,) = db.execute("PRAGMA page_size").fetchone()
+            return page_count * page_size
+
+        report = MaintenanceReport(size_before=size())
+
+        # Chunks whose document is gone, written before foreign keys were enforced
+        orphaned_chunks = db.execute("""
+            SELECT id, document_id FROM chunks
+            WHERE document_id NOT IN (SELECT id FROM documents)
+        """).fetchall()
+        if orphaned_chunks:
+            document_ids = list({document_id for _, document_id in orphaned_chunks})
+            if self.document_centroids is not None:
+                self.document_centroids.delete_documents(db, document_ids)
+            self.vector_index.delete_many(db, [id for id, _ in orphaned_chunks])
+            db.execute("""
+                DELETE FROM chunks
+                WHERE document_id NOT IN (SELECT id FROM documents)
+            """)
+        report.orphaned_chunks = len(orphaned_chunks)
+
+        orphaned_embeddings = [
+            chunk_id
+            for (chunk_id,) in db.execute("""
+                SELECT chunk_id FROM chunk_embeddings
+                WHERE chunk_id NOT IN (SELECT id FROM chunks)
+            """)
+        ]
+        self.vector_index.delete_many(db, orphaned_embeddings)
+        report.orphaned_embeddings = len(orphaned_embeddings)
+
+        # Embedding chunks needs the embedder; `rebuild` restores them
+        (report.missing_embeddings,) = db.execute("""
+            SELECT COUNT(*) FROM chunks
+            WHERE id NOT IN (SELECT chunk_id FROM chunk_embeddings)
+        """).fetchone()
+
+        try:
+            db.execute(
+                "INSERT INTO chunks_fts (chunks_fts, rank) VALUES ('integrity-check', 1)"
+            )
+        except sqlite3.DatabaseError:
+            db.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('rebuild')")
+            report.fts_rebuilt = True
+
+        if (
+            self.document_centroids is not None
+            and not self.document_centroids.is_current(db)
+        ):
+            self.document_centroids.rebuild(db)
+        if report.orphaned_chunks or report.orphaned_embeddings or report.fts_rebuilt:
+            self.bump_generation()
+        db.commit()
+
+        report.documents_recompressed = recompress_documents(
+            db, Config.DOCUMENT_COMPRESSION
+        )
+
+        if full:
+            db.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('optimize')")
+            db.commit()
+            # Vector tables are dropped and recreated, which only the transaction
+            # keeps from losing the embeddings should a step fail
+            db.execute("BEGIN")
+            try:
+                report.vector_slots_freed = self.vector_index.compact(db)
+                if self.document_centroids is not None:
+                    self.document_centroids.compact(db)
+                db.commit()
+            except BaseException:
+                db.rollback()
+                raise
+            self.save_vector_index()
+        else:
+            # Merge small batches of segments until there is nothing left to merge
+            while True:
+                changes = db.total_changes
+                db.execute(
+                    "INSERT INTO chunks_fts (chunks_fts, rank) VALUES ('merge', 500)"
+                )
+                db.commit()
+                if db.total_changes - changes < 2:
+                    break
+
+        if not full:
+            # Bound the rows sampled per index
+            db.execute("PRAGMA analysis_limit = 1000")
+        db.execute("ANALYZE")
+        db.commit()
+
+        if full:
+            # Switching to incremental auto-vacuum only takes effect on VACUUM
+            db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            db.execute("VACUUM")
+        else:
+            db.execute("PRAGMA incremental_vacuum")
+            db.commit()
+
+        report.size_after = size()
+        return report
+
+    def save_vector_index(self) -> None:
+        """Persist any vector index state kept outside the database.
+
+        An index missing the writes of other connections is not saved, so that
+        it is never tagged with a generation it does not reflect.
+        """
+        if self._connection is None:
+            return
+        generation = self.get_generation()
+        if generation == self._vector_generation:
+            self.vector_index.save(generation)
+
     @staticmethod
     def serialize_embedding(embedding: list[float]) -> bytes:
         """Serialize a list of floats to bytes for sqlite-vec storage."""
-        return struct.pack(f"{len(embedding)}f", *embedding)
+        return serialize_embedding(embedding)
 
     def close(self):
         """Close the database connection if it's an in-memory database."""
+        self.save_vector_index()
         if self._connection is not None:
             self._connection.close()
             self._connection = None
+        while self._readers:
+            self._readers.pop().close()
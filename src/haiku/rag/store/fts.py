@@ -0,0 +1,118 @@
+import re
+import sqlite3
+import unicodedata
+
+# Common English words that match almost every chunk and carry little meaning.
+STOPWORDS = frozenset(
+    """
+    a about above after again against all am an and any are as at be because
+    been before being below between both but by can could did do does doing
+    down during each few for from further had has have having he her here hers
+    herself him himself his how i if in into is it its itself just me more most
+    my myself no nor not now of off on once only or other our ours ourselves
+    out over own same she should so some such than that the their theirs them
+    themselves then there these they this those through to too under until up
+    very was we were what when where which while who whom why will with would
+    you your yours yourself yourselves
+    """.split()
+)
+
+_PHRASE = re.compile(r'"([^"]*)"')
+_TOKEN = re.compile(r"(\w+)(\*?)")
+_IDENTIFIER = re.compile(r"[\w.:/#-]+")
+
+
+def _fold(term: str) -> str:
+    """Lowercase and strip diacritics, as the FTS5 unicode61 tokenizer does."""
+    decomposed = unicodedata.normalize("NFKD", term.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _quote(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def build_fts_query(
+    db: sqlite3.Connection, query: str, max_terms: int = 8
+) -> str | None:
+    """Build a selective FTS5 MATCH expression from a natural-language query.
+
+    - Text in double quotes is matched as a phrase.
+    - Words ending in `*` are matched as prefixes.
+    - Stopwords are dropped, unless the query consists of nothing else.
+    - If more than `max_terms` words remain, only the most selective ones
+      (lowest document frequency in the index) are kept.
+
+    All parts are combined with OR.
+
+    Args:
+        db: Connection used to look up document frequencies.
+        query: The search query.
+        max_terms: Maximum number of plain words to include.
+
+    Returns:
+        The FTS5 query, or None if the query contains nothing searchable.
+    """
+    parts: list[str] = []
+
+    for phrase in _PHRASE.findall(query):
+        words = re.findall(r"\w+", phrase)
+        if words:
+            parts.append(_quote(" ".join(words)))
+
+    words: list[str] = []
+    all_words: list[str] = []
+    for token, star in _TOKEN.findall(_PHRASE.sub(" ", query)):
+        term = _fold(token)
+        if star:
+            parts.append(_quote(term) + "*")
+        elif "_" in term:
+            # Identifiers such as snake_case names are split by the tokenizer,
+            # so match them as a phrase of their parts.
+            parts.append(_quote(term))
+        else:
+            all_words.append(term)
+            if term not in STOPWORDS:
+                words.append(term)
+
+    words = list(dict.fromkeys(words or (all_words if not parts else [])))
+    if len(words) > max_terms:
+        words = _most_selective(db, words, max_terms)
+    parts.extend(_quote(word) for word in words)
+
+    if not parts:
+        return None
+    return " OR ".join(dict.fromkeys(parts))
+
+
+def _most_selective(db: sqlite3.Connection, words: list[str], n: int) -> list[str]:
+    """Return the n words that occur in the fewest chunks, ignoring absent ones."""
+    placeholders = ", ".join("?" for _ in words)
+    frequencies = dict(
+        db.execute(
+            f"SELECT term, doc FROM chunks_fts_vocab WHERE term IN ({placeholders})",
+            words,
+        ).fetchall()
+    )
+    present = [word for word in words if frequencies.get(word)]
+    return sorted(present, key=lambda word: frequencies[word])[:n]
+
+
+def looks_like_identifier(query: str) -> bool:
+    """Whether a query looks like an exact identifier rather than natural language.
+
+    Matches single tokens such as function names (`get_user_by_id`, `parseJSON`,
+    `os.path.join`), ticket IDs (`PROJ-1234`) and error codes (`E1102`).
+    """
+    query = query.strip().strip("`'\"")
+    if len(query) < 3 or not _IDENTIFIER.fullmatch(query):
+        return False
+
+    has_letters = any(c.isalpha() for c in query)
+    has_digits = any(c.isdigit() for c in query)
+    return (
+        "_" in query
+        or (has_letters and has_digits)
+        or re.search(r"[a-z][A-Z]", query) is not None
+        or re.search(r"\w[.:/#-]+\w", query) is not None
+    )
@@ -0,0 +1,54 @@
+import re
+import sqlite3
+
+# Metadata keys always promoted to indexed columns: document content types and
+# hashes are looked up on ingestion and filtering, and chunks are read in order
+DOCUMENT_METADATA_KEYS = ["contentType", "md5"]
+CHUNK_METADATA_KEYS = ["order"]
+
+_KEY = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def metadata_column(key: str) -> str:
+    """Name of the generated column holding the metadata value for `key`."""
+    if not _KEY.match(key):
+        raise ValueError(
+            f"Invalid metadata key for an index: {key!r}; "
+            "keys must be letters, digits and underscores"
+        )
+    return f"meta_{key}"
+
+
+def metadata_columns(db: sqlite3.Connection, table: str) -> set[str]:
+    """Return the metadata keys promoted to generated columns of a table."""
+    return {
+        name.removeprefix("meta_")
+        for _, name, *_ in db.execute(f"PRAGMA table_xinfo({table})")
+        if name.startswith("meta_")
+    }
+
+
+def add_metadata_column(
+    db: sqlite3.Connection, table: str, key: str, group_by: str | None = None
+) -> None:
+    """Promote a metadata key of a table to an indexed generated column.
+
+    The column is virtual, so it is computed from the JSON metadata when read
+    and takes no space in the table; only its index is stored. Adding a column
+    that already exists does nothing.
+
+    Args:
+        db: The connection to alter the table with.
+        table: "documents" or "chunks".
+        key: The top-level metadata key.
+        group_by: Column to prefix the index with, for keys that are looked up
+            within a group, such as the order of the chunks of a document.
+    """
+    column = metadata_column(key)
+    if key not in metadata_columns(db, table):
+        db.execute(f"""
+            ALTER TABLE {table} ADD COLUMN {column}
+            GENERATED ALWAYS AS (JSON_EXTRACT(metadata, '$.{key}')) VIRTUAL
+        """)
+    indexed = column if group_by is None else f"{group_by}, {column}"
+    db.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table}({indexed})")
@@ -1,4 +1,5 @@
 from .chunk import Chunk
-from .document import Document
+from .document import Document, DocumentHeader
+from .filter import SearchFilter
 
-__all__ = ["Chunk", "Document"]
\ No newline at end of file
+__all__ = ["Chunk", "Document", "DocumentHeader", "SearchFilter"]
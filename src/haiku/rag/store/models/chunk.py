@@ -10,5 +10,8 @@ class Chunk(BaseModel):
     document_id: int
     content: str
     metadata: dict = {}
+    # Character offsets into the document's content, for chunks stored that way
+    start_offset: int | None = None
+    end_offset: int | None = None
     document_uri: str | None = None
     document_meta: dict = {}
@@ -6,11 +6,33 @@ from pydantic import BaseModel, Field
 class Document(BaseModel):
     """
     Represents a document with an ID, content, and metadata.
+
+    Documents belong to a collection, such as a tenant or project, and searches
+    can be restricted to the documents of one collection.
     """
 
     id: int | None = None
     content: str
     uri: str | None = None
     metadata: dict = {}
+    collection: str = "default"
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
+
+
+class DocumentHeader(BaseModel):
+    """
+    The fields of a document other than its content, and the content's size.
+
+    Headers are read without touching the stored content, so listing documents
+    or checking whether one exists stays cheap however large they are. The
+    content is loaded on demand with the document.
+    """
+
+    id: int
+    uri: str | None = None
+    metadata: dict = {}
+    collection: str = "default"
+    created_at: datetime
+    updated_at: datetime
+    size: int = 0
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
+
+
+def prefix_end(prefix: str) -> str:
+    """Return the smallest string greater than every string starting with prefix.
+
+    Prefix matches are expressed as the range [prefix, prefix_end(prefix)),
+    which vec0 metadata columns and B-tree indexes can both evaluate.
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class SearchFilter(BaseModel):
+    """
+    Conditions on the documents whose chunks a search may return.
+
+    All given conditions must hold. They are evaluated within the vector scan,
+    on metadata columns stored with each embedding, and on indexed document
+    columns for full-text search, so filtered searches still return up to
+    `limit` chunks.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    content_type: str | None = None
+    uri_prefix: str | None = None
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+
+    def params(self) -> dict[str, str]:
+        """Return the query parameters bound by the filter's conditions."""
+        params: dict[str, str] = {}
+        if self.content_type is not None:
+            params["content_type"] = self.content_type
+        if self.uri_prefix:
+            params["uri_prefix"] = self.uri_prefix
+            params["uri_prefix_end"] = prefix_end(self.uri_prefix)
+        # Timestamps are stored in the format of SQLite's datetime adapter
+        if self.created_after is not None:
+            params["created_after"] = self.created_after.isoformat(" ")
+        if self.created_before is not None:
+            params["created_before"] = self.created_before.isoformat(" ")
+        return params
+
+    def conditions(self, alias: str = "") -> list[str]:
+        """Return the SQL conditions of the filter, using the names of `params`.
+
+        Args:
+            alias: Prefix of the filtered columns, such as "d." for a documents
+                join; without one, the metadata columns of chunk_embeddings.
+        """
+        # contentType is promoted to an indexed column of documents
+        content_type = f"{alias}meta_contentType" if alias else "content_type"
+        params = self.params()
+        conditions = []
+        if "content_type" in params:
+            conditions.append(f"{content_type} = :content_type")
+        if "uri_prefix" in params:
+            conditions.append(f"{alias}uri >= :uri_prefix")
+            conditions.append(f"{alias}uri < :uri_prefix_end")
+        if "created_after" in params:
+            conditions.append(f"{alias}created_at >= :created_after")
+        if "created_before" in params:
+            conditions.append(f"{alias}created_at < :created_before")
+        return conditions
@@ -1,12 +1,56 @@
+import asyncio
 import json
-import re
+import sqlite3
+from collections.abc import AsyncGenerator
 
 from haiku.rag.chunker import chunker
+from haiku.rag.config import Config
 from haiku.rag.embeddings import get_embedder
+from haiku.rag.embeddings.cache import embed_queries, embed_query
+from haiku.rag.store.fts import build_fts_query
 from haiku.rag.store.models.chunk import Chunk
+from haiku.rag.store.models.filter import SearchFilter
 from haiku.rag.store.repositories.base import BaseRepository
 
 
+def reciprocal_rank_fusion(
+    rankings: list[list[int]], k: int = 60
+) -> list[tuple[int, float]]:
+    """Fuse ranked lists of IDs using Reciprocal Rank Fusion.
+
+    Each ID scores the sum of 1 / (k + rank) over the rankings it appears in,
+    with ranks starting at 1.
+
+    Returns:
+        List of (id, score) tuples ordered by descending score.
+    """
+    scores: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+# The text of a chunk joined to its document as `d`: chunks stored as offsets
+# hold no text of their own and are cut from the document's content
+CHUNK_CONTENT = """CASE WHEN c.end_offset IS NULL THEN c.content
+    ELSE substr(d.content, c.start_offset + 1, c.end_offset - c.start_offset) END"""
+
+
+def document_filter(
+    collection: str | None = None, filters: SearchFilter | None = None
+) -> str:
+    """SQL conditions restricting a query joined to documents as `d`.
+
+    The conditions use the `:collection` parameter and those returned by
+    `filters.params()`.
+    """
+    conditions = [] if collection is None else ["d.collection = :collection"]
+    if filters is not None:
+        conditions.extend(filters.conditions("d."))
+    return "".join(f" AND {condition}" for condition in conditions)
+
+
 class ChunkRepository(BaseRepository[Chunk]):
     """Repository for Chunk database operations."""
 
@@ -19,44 +63,53 @@ class ChunkRepository(BaseRepository[Chunk]):
         if self.store._connection is None:
             raise ValueError("Store connection is not available")
 
+        embedding = await self._insert(entity)
+        if self.store.document_centroids is not None:
+            self.store.document_centroids.add_chunks(
+                self.store._connection, entity.document_id, [embedding]
+            )
+        self.store.bump_generation()
+
+        if commit:
+            self.store._connection.commit()
+        return entity
+
+    async def _insert(self, entity: Chunk) -> list[float]:
+        """Insert a chunk and its embedding, leaving its document's centroid as is.
+
+        Returns:
+            The embedding of the chunk.
+        """
+        if self.store._connection is None:
+            raise ValueError("Store connection is not available")
+
+        # A trigger adds the chunk to the FTS5 table
         cursor = self.store._connection.cursor()
         cursor.execute(
             """
-            INSERT INTO chunks (document_id, content, metadata)
-            VALUES (:document_id, :content, :metadata)
+            INSERT INTO chunks
+                (document_id, content, metadata, start_offset, end_offset)
+            VALUES
+                (:document_id, :content, :metadata, :start_offset, :end_offset)
             """,
             {
                 "document_id": entity.document_id,
-                "content": entity.content,
+                # Chunks with offsets are read from their document
+                "content": "" if entity.end_offset is not None else entity.content,
                 "metadata": json.dumps(entity.metadata),
+                "start_offset": entity.start_offset,
+                "end_offset": entity.end_offset,
             },
         )
 
-        entity.id = cursor.lastrowid
+        chunk_id = cursor.lastrowid
+        assert chunk_id is not None, "Failed to create chunk in database"
+        entity.id = chunk_id
 
         # Generate and store embedding
         embedding = await self.embedder.embed(entity.content)
-        serialized_embedding = self.store.serialize_embedding(embedding)
-        cursor.execute(
-            """
-            INSERT INTO chunk_embeddings (chunk_id, embedding)
-            VALUES (:chunk_id, :embedding)
-            """,
-            {"chunk_id": entity.id, "embedding": serialized_embedding},
-        )
-
-        # Insert into FTS5 table for full-text search
-        cursor.execute(
-            """
-            INSERT INTO chunks_fts(rowid, content)
-            VALUES (:rowid, :content)
-            """,
-            {"rowid": entity.id, "content": entity.content},
-        )
-
-        if commit:
-            self.store._connection.commit()
-        return entity
+        self.store.vector_index.add(self.store._connection, chunk_id, embedding)
+        return embedding
 
     async def get_by_id(self, entity_id: int) -> Chunk | None:
         """Get a chunk by its ID."""
@@ -65,9 +118,11 @@ class ChunkRepository(BaseRepository[Chunk]):
 
         cursor = self.store._connection.cursor()
         cursor.execute(
-            """
-            SELECT id, document_id, content, metadata
-            FROM chunks WHERE id = :id
+            f"""
+            SELECT c.id, c.document_id, {CHUNK_CONTENT}, c.metadata
+            FROM chunks c
+            LEFT JOIN documents d ON d.id = c.document_id
+            WHERE c.id = :id
             """,
             {"id": entity_id},
         )
@@ -90,42 +145,38 @@ class ChunkRepository(BaseRepository[Chunk]):
         if entity.id is None:
             raise ValueError("Chunk ID is required for update")
 
+        if self.store.document_centroids is not None:
+            self.store.document_centroids.remove_chunk(
+                self.store._connection, entity.id
+            )
+
+        # A trigger replaces the chunk in the FTS5 table when its content changes
         cursor = self.store._connection.cursor()
         cursor.execute(
             """
             UPDATE chunks
-            SET document_id = :document_id, content = :content, metadata = :metadata
+            SET document_id = :document_id, content = :content, metadata = :metadata,
+                start_offset = :start_offset, end_offset = :end_offset
             WHERE id = :id
             """,
             {
                 "document_id": entity.document_id,
-                "content": entity.content,
+                "content": "" if entity.end_offset is not None else entity.content,
                 "metadata": json.dumps(entity.metadata),
+                "start_offset": entity.start_offset,
+                "end_offset": entity.end_offset,
                 "id": entity.id,
             },
         )
 
         # Regenerate and update embedding
         embedding = await self.embedder.embed(entity.content)
-        serialized_embedding = self.store.serialize_embedding(embedding)
-        cursor.execute(
-            """
-            UPDATE chunk_embeddings
-            SET embedding = :embedding
-            WHERE chunk_id = :chunk_id
-            """,
-            {"embedding": serialized_embedding, "chunk_id": entity.id},
-        )
-
-        # Update FTS5 table
-        cursor.execute(
-            """
-            UPDATE chunks_fts
-            SET content = :content
-            WHERE rowid = :rowid
-            """,
-            {"content": entity.content, "rowid": entity.id},
-        )
+        self.store.vector_index.update(self.store._connection, entity.id, embedding)
+        if self.store.document_centroids is not None:
+            self.store.document_centroids.add_chunks(
+                self.store._connection, entity.document_id, [embedding]
+            )
+        self.store.bump_generation()
 
         self.store._connection.commit()
         return entity
@@ -137,21 +188,19 @@ class ChunkRepository(BaseRepository[Chunk]):
 
         cursor = self.store._connection.cursor()
 
-        # Delete from FTS5 table first
-        cursor.execute(
-            "DELETE FROM chunks_fts WHERE rowid = :rowid", {"rowid": entity_id}
-        )
-
         # Delete the embedding
-        cursor.execute(
-            "DELETE FROM chunk_embeddings WHERE chunk_id = :chunk_id",
-            {"chunk_id": entity_id},
-        )
+        if self.store.document_centroids is not None:
+            self.store.document_centroids.remove_chunk(
+                self.store._connection, entity_id
+            )
+        self.store.vector_index.delete(self.store._connection, entity_id)
 
-        # Delete the chunk
+        # Delete the chunk; a trigger removes it from the FTS5 table
         cursor.execute("DELETE FROM chunks WHERE id = :id", {"id": entity_id})
 
         deleted = cursor.rowcount > 0
+        if deleted:
+            self.store.bump_generation()
         if commit:
             self.store._connection.commit()
         return deleted
@@ -164,7 +213,12 @@ class ChunkRepository(BaseRepository[Chunk]):
             raise ValueError("Store connection is not available")
 
         cursor = self.store._connection.cursor()
-        query = "SELECT id, document_id, content, metadata FROM chunks ORDER BY document_id, id"
+        query = f"""
+            SELECT c.id, c.document_id, {CHUNK_CONTENT}, c.metadata
+            FROM chunks c
+            LEFT JOIN documents d ON d.id = c.document_id
+            ORDER BY c.document_id, c.id
+        """
         params = {}
 
         if limit is not None:
@@ -188,25 +242,97 @@ class ChunkRepository(BaseRepository[Chunk]):
             for chunk_id, document_id, content, metadata_json in rows
         ]
 
+    async def iter_all(
+        self, batch_size: int = 100, collection: str | None = None
+    ) -> AsyncGenerator[Chunk, None]:
+        """Iterate over all chunks in ID order, reading them in batches.
+
+        Batches are selected by keyset pagination on the chunk ID rather than
+        with OFFSET, so every batch costs the same however deep it is, and at
+        most `batch_size` chunks are held in memory.
+        """
+        if self.store._connection is None:
+            raise ValueError("Store connection is not available")
+
+        last_id = 0
+        while True:
+            rows = self.store._connection.execute(
+                f"""
+                SELECT c.id, c.document_id, {CHUNK_CONTENT}, c.metadata
+                FROM chunks c
+                LEFT JOIN documents d ON d.id = c.document_id
+                WHERE c.id > :last_id
+                {"" if collection is None else "AND d.collection = :collection"}
+                ORDER BY c.id
+                LIMIT :batch_size
+                """,
+                {
+                    "last_id": last_id,
+                    "collection": collection,
+                    "batch_size": batch_size,
+                },
+            ).fetchall()
+            for chunk_id, document_id, content, metadata_json in rows:
+                yield Chunk(
+                    id=chunk_id,
+                    document_id=document_id,
+                    content=content,
+                    metadata=json.loads(metadata_json) if metadata_json else {},
+                )
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+
     async def create_chunks_for_document(
         self, document_id: int, content: str, commit: bool = True
     ) -> list[Chunk]:
         """Create chunks and embeddings for a document."""
+        if self.store._connection is None:
+            raise ValueError("Store connection is not available")
+
         # Chunk the document content
-        chunk_texts = await chunker.chunk(content)
-        created_chunks = []
-
-        # Create chunks with embeddings using the create method
-        for order, chunk_text in enumerate(chunk_texts):
-            # Create chunk with order in metadata
-            chunk = Chunk(
-                document_id=document_id, content=chunk_text, metadata={"order": order}
+        if Config.CHUNK_STORAGE == "content":
+            chunks = [
+                Chunk(document_id=document_id, content=chunk_text)
+                for chunk_text in await chunker.chunk(content)
+            ]
+        elif Config.CHUNK_STORAGE == "offsets":
+            # Offsets are resolved against the stored text, which must not be
+            # compressed, such as when rebuilding a compressed database
+            self.store._connection.execute(
+                """
+                UPDATE documents SET content = :content
+                WHERE id = :id AND typeof(content) = 'blob'
+                """,
+                {"content": content, "id": document_id},
             )
-
-            created_chunk = await self.create(chunk, commit=commit)
-            created_chunks.append(created_chunk)
-
-        return created_chunks
+            chunks = [
+                Chunk(
+                    document_id=document_id,
+                    content=content[start:end],
+                    start_offset=start,
+                    end_offset=end,
+                )
+                for start, end in await chunker.chunk_spans(content)
+            ]
+        else:
+            raise ValueError(f"Unsupported chunk storage: {Config.CHUNK_STORAGE}")
+
+        embeddings = []
+        for order, chunk in enumerate(chunks):
+            # Record the chunk's order in its metadata
+            chunk.metadata = {"order": order}
+            embeddings.append(await self._insert(chunk))
+
+        # The document's centroid is updated once for all of its chunks
+        if self.store.document_centroids is not None:
+            self.store.document_centroids.add_chunks(
+                self.store._connection, document_id, embeddings
+            )
+        self.store.bump_generation()
+        if commit:
+            self.store._connection.commit()
+        return chunks
 
     async def delete_all(self, commit: bool = True) -> bool:
         """Delete all chunks from the database."""
@@ -215,11 +341,13 @@ class ChunkRepository(BaseRepository[Chunk]):
 
         cursor = self.store._connection.cursor()
 
-        cursor.execute("DELETE FROM chunks_fts")
-        cursor.execute("DELETE FROM chunk_embeddings")
+        self.store.vector_index.clear(self.store._connection)
+        if self.store.document_centroids is not None:
+            self.store.document_centroids.clear(self.store._connection)
         cursor.execute("DELETE FROM chunks")
 
         deleted = cursor.rowcount > 0
+        self.store.bump_generation()
         if commit:
             self.store._connection.commit()
         return deleted
@@ -228,89 +356,180 @@ class ChunkRepository(BaseRepository[Chunk]):
         self, document_id: int, commit: bool = True
     ) -> bool:
         """Delete all chunks for a document."""
-        chunks = await self.get_by_document_id(document_id)
+        return await self.delete_by_document_ids([document_id], commit) > 0
 
-        deleted_any = False
-        for chunk in chunks:
-            if chunk.id is not None:
-                deleted = await self.delete(chunk.id, commit=False)
-                deleted_any = deleted_any or deleted
+    async def delete_by_document_ids(
+        self, document_ids: list[int], commit: bool = True
+    ) -> int:
+        """Delete all chunks of several documents with set-based statements.
 
-        if commit and deleted_any and self.store._connection:
+        Returns:
+            The number of deleted chunks.
+        """
+        if self.store._connection is None:
+            raise ValueError("Store connection is not available")
+
+        self.delete_embeddings_by_document_ids(document_ids)
+        # A trigger removes the chunks from the FTS5 table
+        cursor = self.store._connection.execute(
+            """
+            DELETE FROM chunks
+            WHERE document_id IN (SELECT value FROM json_each(:document_ids))
+            """,
+            {"document_ids": json.dumps(document_ids)},
+        )
+
+        deleted = cursor.rowcount
+        if deleted:
+            self.store.bump_generation()
+        if commit:
             self.store._connection.commit()
-        return deleted_any
+        return deleted
+
+    def delete_embeddings_by_document_ids(self, document_ids: list[int]) -> None:
+        """Delete the embeddings of all chunks of several documents.
+
+        The chunks themselves are left in place, so this must be followed by
+        deleting them, directly or by deleting their documents.
+        """
+        if self.store._connection is None:
+            raise ValueError("Store connection is not available")
+
+        db = self.store._connection
+        chunk_ids = [
+            chunk_id
+            for (chunk_id,) in db.execute(
+                """
+                SELECT id FROM chunks
+                WHERE document_id IN (SELECT value FROM json_each(:document_ids))
+                """,
+                {"document_ids": json.dumps(document_ids)},
+            )
+        ]
+        if self.store.document_centroids is not None:
+            self.store.document_centroids.delete_documents(db, document_ids)
+        self.store.vector_index.delete_many(db, chunk_ids)
 
     async def search_chunks(
-        self, query: str, limit: int = 5
+        self,
+        query: str,
+        limit: int = 5,
+        query_embedding: list[float] | None = None,
+        collection: str | None = None,
+        filters: SearchFilter | None = None,
     ) -> list[tuple[Chunk, float]]:
-        """Search for relevant chunks using vector similarity."""
+        """Search for relevant chunks using vector similarity.
+
+        A precomputed `query_embedding` can be passed to skip embedding the query.
+        With a `collection`, only chunks of documents in that collection are searched.
+        With `filters`, only chunks of documents matching them are searched.
+        """
         if self.store._connection is None:
             raise ValueError("Store connection is not available")
 
-        cursor = self.store._connection.cursor()
-
         # Generate embedding for the query
-        query_embedding = await self.embedder.embed(query)
-        serialized_query_embedding = self.store.serialize_embedding(query_embedding)
+        if query_embedding is None:
+            query_embedding = await embed_query(self.embedder, query)
 
-        # Search for similar chunks using sqlite-vec
-        cursor.execute(
-            """
-            SELECT c.id, c.document_id, c.content, c.metadata, distance, d.uri, d.metadata as document_metadata
-            FROM chunk_embeddings
-            JOIN chunks c ON c.id = chunk_embeddings.chunk_id
-            JOIN documents d ON c.document_id = d.id
-            WHERE embedding MATCH :embedding AND k = :k
-            ORDER BY distance
-            """,
-            {"embedding": serialized_query_embedding, "k": limit},
+        nearest = await self._vector_search(query_embedding, limit, collection, filters)
+        chunks = await self.store.run_read(
+            self._get_chunks_with_documents, [chunk_id for chunk_id, _ in nearest]
         )
-
-        results = cursor.fetchall()
         return [
-            (
-                Chunk(
-                    id=chunk_id,
-                    document_id=document_id,
-                    content=content,
-                    metadata=json.loads(metadata_json) if metadata_json else {},
-                    document_uri=document_uri,
-                    document_meta=json.loads(document_metadata_json)
-                    if document_metadata_json
-                    else {},
-                ),
-                1.0 / (1.0 + distance),
+            (chunks[chunk_id], 1.0 / (1.0 + distance))
+            for chunk_id, distance in nearest
+            if chunk_id in chunks
+        ]
+
+    async def search_chunks_many(
+        self,
+        queries: list[str],
+        limit: int = 5,
+        query_embeddings: list[list[float]] | None = None,
+        collection: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> list[list[tuple[Chunk, float]]]:
+        """Search for relevant chunks for several queries using vector similarity.
+
+        The queries are embedded in batches and scored together, which engines
+        such as the NumPy matrix index do in a single matrix product.
+        """
+        if self.store._connection is None:
+            raise ValueError("Store connection is not available")
+
+        if query_embeddings is None:
+            query_embeddings = await embed_queries(self.embedder, queries)
+
+        if self.store.document_centroids is not None and filters is None:
+            nearest = await asyncio.gather(
+                *(
+                    self._vector_search(embedding, limit, collection)
+                    for embedding in query_embeddings
+                )
             )
-            for chunk_id, document_id, content, metadata_json, distance, document_uri, document_metadata_json in results
+        else:
+            self.store.sync_vector_index()
+            nearest = await self.store.run_read(
+                self.store.vector_index.search_many,
+                query_embeddings,
+                limit,
+                collection,
+                filters,
+            )
+        chunks = await self.store.run_read(
+            self._get_chunks_with_documents,
+            list({chunk_id for results in nearest for chunk_id, _ in results}),
+        )
+        return [
+            [
+                (chunks[chunk_id], 1.0 / (1.0 + distance))
+                for chunk_id, distance in results
+                if chunk_id in chunks
+            ]
+            for results in nearest
         ]
 
     async def search_chunks_fts(
-        self, query: str, limit: int = 5
+        self,
+        query: str,
+        limit: int = 5,
+        collection: str | None = None,
+        filters: SearchFilter | None = None,
     ) -> list[tuple[Chunk, float]]:
-        """Search for chunks using FTS5 full-text search."""
+        """Search for chunks using FTS5 full-text search.
+
+        Results can be restricted to one collection and to documents matching
+        the given filters.
+        """
         if self.store._connection is None:
             raise ValueError("Store connection is not available")
 
         cursor = self.store._connection.cursor()
 
-        # Clean the query for FTS5 - extract keywords for better matching
-        # Remove special characters and split into words
-        words = re.findall(r"\b\w+\b", query.lower())
-        # Join with OR to find chunks containing any of the keywords
-        fts_query = " OR ".join(words) if words else query
+        fts_query = build_fts_query(
+            self.store._connection, query, max_terms=Config.FTS_MAX_TERMS
+        )
+        if fts_query is None:
+            return []
 
         # Search using FTS5
         cursor.execute(
-            """
-            SELECT c.id, c.document_id, c.content, c.metadata, rank, d.uri, d.metadata as document_metadata
+            f"""
+            SELECT c.id, c.document_id, {CHUNK_CONTENT}, c.metadata, rank, d.uri, d.metadata as document_metadata
             FROM chunks_fts
             JOIN chunks c ON c.id = chunks_fts.rowid
             JOIN documents d ON c.document_id = d.id
             WHERE chunks_fts MATCH :query
+            {document_filter(collection, filters)}
             ORDER BY rank
             LIMIT :limit
             """,
-            {"query": fts_query, "limit": limit},
+            {
+                "query": fts_query,
+                "limit": limit,
+                "collection": collection,
+                **(filters.params() if filters else {}),
+            },
         )
 
         results = cursor.fetchall()
@@ -334,98 +553,172 @@ class ChunkRepository(BaseRepository[Chunk]):
         ]
 
     async def search_chunks_hybrid(
-        self, query: str, limit: int = 5, k: int = 60
+        self,
+        query: str,
+        limit: int = 5,
+        k: int = 60,
+        k_vector: int | None = None,
+        k_fts: int | None = None,
+        query_embedding: list[float] | None = None,
+        collection: str | None = None,
+        filters: SearchFilter | None = None,
     ) -> list[tuple[Chunk, float]]:
-        """Hybrid search using Reciprocal Rank Fusion (RRF) combining vector similarity and FTS5 full-text search."""
+        """Hybrid search using Reciprocal Rank Fusion (RRF) combining vector similarity and FTS5 full-text search.
+
+        Vector and full-text candidates are fetched separately, each bounded by its
+        own depth, and fused in Python; only the final `limit` chunks are loaded.
+
+        Args:
+            query: The search query string.
+            limit: Maximum number of results to return.
+            k: Parameter for Reciprocal Rank Fusion.
+            k_vector: Number of vector search candidates (default:
+                SEARCH_VECTOR_CANDIDATES, or 3 * limit if unset).
+            k_fts: Number of full-text search candidates (default:
+                SEARCH_FTS_CANDIDATES, or 3 * limit if unset).
+            query_embedding: Precomputed embedding of the query, if available.
+            collection: Only search chunks of documents in this collection, if given.
+            filters: Only search chunks of documents matching these, if given.
+        """
         if self.store._connection is None:
             raise ValueError("Store connection is not available")
 
-        cursor = self.store._connection.cursor()
+        k_vector = k_vector or Config.SEARCH_VECTOR_CANDIDATES or limit * 3
+        k_fts = k_fts or Config.SEARCH_FTS_CANDIDATES or limit * 3
 
-        # Generate embedding for the query
-        query_embedding = await self.embedder.embed(query)
-        serialized_query_embedding = self.store.serialize_embedding(query_embedding)
-
-        # Clean the query for FTS5 - extract keywords for better matching
-        # Remove special characters and split into words
-        words = re.findall(r"\b\w+\b", query.lower())
-        # Join with OR to find chunks containing any of the keywords
-        fts_query = " OR ".join(words) if words else query
-        # Perform hybrid search using RRF (Reciprocal Rank Fusion)
-        cursor.execute(
-            """
-            WITH vector_search AS (
-                SELECT
-                    c.id,
-                    c.document_id,
-                    c.content,
-                    c.metadata,
-                    ROW_NUMBER() OVER (ORDER BY ce.distance) as vector_rank
-                FROM chunk_embeddings ce
-                JOIN chunks c ON c.id = ce.chunk_id
-                WHERE ce.embedding MATCH :embedding AND k = :k_vector
-                ORDER BY ce.distance
+        # The full-text leg does not need the embedding, so run it while the
+        # query embedding is being generated.
+        query_embedding, fts_ids = await asyncio.gather(
+            self._query_embedding(query, query_embedding),
+            self.store.run_read(
+                self._fts_candidates, query, k_fts, collection, filters
             ),
-            fts_search AS (
-                SELECT
-                    c.id,
-                    c.document_id,
-                    c.content,
-                    c.metadata,
-                    ROW_NUMBER() OVER (ORDER BY chunks_fts.rank) as fts_rank
+        )
+        nearest = await self._vector_search(
+            query_embedding, k_vector, collection, filters
+        )
+        vector_ids = [chunk_id for chunk_id, _ in nearest]
+
+        fused = reciprocal_rank_fusion([vector_ids, fts_ids], k)[:limit]
+        chunks = await self.store.run_read(
+            self._get_chunks_with_documents, [chunk_id for chunk_id, _ in fused]
+        )
+        return [
+            (chunks[chunk_id], rrf_score)
+            for chunk_id, rrf_score in fused
+            if chunk_id in chunks
+        ]
+
+    async def _vector_search(
+        self,
+        query_embedding: list[float],
+        k: int,
+        collection: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> list[tuple[int, float]]:
+        """Return the k nearest chunks to an embedding as (chunk_id, distance).
+
+        With VECTOR_DOCUMENT_CANDIDATES set, only the chunks of that many documents
+        with the nearest centroids are searched; otherwise the vector index is.
+        Filtered searches always use the vector index, which filters within its
+        scan, since the nearest documents may not match the filters.
+        """
+        if self.store.document_centroids is not None and filters is None:
+            return await self.store.run_read(
+                self.store.document_centroids.search,
+                query_embedding,
+                k,
+                Config.VECTOR_DOCUMENT_CANDIDATES,
+                collection,
+            )
+        self.store.sync_vector_index()
+        return await self.store.run_read(
+            self.store.vector_index.search, query_embedding, k, collection, filters
+        )
+
+    async def _query_embedding(
+        self, query: str, query_embedding: list[float] | None
+    ) -> list[float]:
+        if query_embedding is not None:
+            return query_embedding
+        return await embed_query(self.embedder, query)
+
+    @staticmethod
+    def _fts_candidates(
+        db: sqlite3.Connection,
+        query: str,
+        depth: int,
+        collection: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> list[int]:
+        """Return the IDs of the best full-text matches for a query, best first."""
+        fts_query = build_fts_query(db, query, max_terms=Config.FTS_MAX_TERMS)
+        if fts_query is None:
+            return []
+
+        if collection is None and filters is None:
+            cursor = db.execute(
+                """
+                SELECT rowid
+                FROM chunks_fts
+                WHERE chunks_fts MATCH :query
+                ORDER BY rank
+                LIMIT :limit
+                """,
+                {"query": fts_query, "limit": depth},
+            )
+        else:
+            cursor = db.execute(
+                f"""
+                SELECT chunks_fts.rowid
                 FROM chunks_fts
                 JOIN chunks c ON c.id = chunks_fts.rowid
-                WHERE chunks_fts MATCH :fts_query
-                ORDER BY chunks_fts.rank
-            ),
-            all_chunks AS (
-                SELECT id, document_id, content, metadata FROM vector_search
-                UNION
-                SELECT id, document_id, content, metadata FROM fts_search
-            ),
-            rrf_scores AS (
-                SELECT
-                    a.id,
-                    a.document_id,
-                    a.content,
-                    a.metadata,
-                    COALESCE(1.0 / (:k + v.vector_rank), 0) + COALESCE(1.0 / (:k + f.fts_rank), 0) as rrf_score
-                FROM all_chunks a
-                LEFT JOIN vector_search v ON a.id = v.id
-                LEFT JOIN fts_search f ON a.id = f.id
+                JOIN documents d ON d.id = c.document_id
+                WHERE chunks_fts MATCH :query
+                {document_filter(collection, filters)}
+                ORDER BY rank
+                LIMIT :limit
+                """,
+                {
+                    "query": fts_query,
+                    "collection": collection,
+                    "limit": depth,
+                    **(filters.params() if filters else {}),
+                },
             )
-            SELECT r.id, r.document_id, r.content, r.metadata, r.rrf_score, d.uri, d.metadata as document_metadata
-            FROM rrf_scores r
-            JOIN documents d ON r.document_id = d.id
-            ORDER BY r.rrf_score DESC
-            LIMIT :limit
+        return [chunk_id for (chunk_id,) in cursor.fetchall()]
+
+    @staticmethod
+    def _get_chunks_with_documents(
+        db: sqlite3.Connection, chunk_ids: list[int]
+    ) -> dict[int, Chunk]:
+        """Load chunks by ID, including their document URI and metadata."""
+        if not chunk_ids:
+            return {}
+
+        placeholders = ", ".join("?" for _ in chunk_ids)
+        cursor = db.execute(
+            f"""
+            SELECT c.id, c.document_id, {CHUNK_CONTENT}, c.metadata, d.uri, d.metadata as document_metadata
+            FROM chunks c
+            JOIN documents d ON c.document_id = d.id
+            WHERE c.id IN ({placeholders})
             """,
-            {
-                "embedding": serialized_query_embedding,
-                "k_vector": limit * 3,
-                "fts_query": fts_query,
-                "k": k,
-                "limit": limit,
-            },
+            chunk_ids,
         )
-
-        results = cursor.fetchall()
-        return [
-            (
-                Chunk(
-                    id=chunk_id,
-                    document_id=document_id,
-                    content=content,
-                    metadata=json.loads(metadata_json) if metadata_json else {},
-                    document_uri=document_uri,
-                    document_meta=json.loads(document_metadata_json)
-                    if document_metadata_json
-                    else {},
-                ),
-                rrf_score,
+        return {
+            chunk_id: Chunk(
+                id=chunk_id,
+                document_id=document_id,
+                content=content,
+                metadata=json.loads(metadata_json) if metadata_json else {},
+                document_uri=document_uri,
+                document_meta=json.loads(document_metadata_json)
+                if document_metadata_json
+                else {},
             )
-            for chunk_id, document_id, content, metadata_json, rrf_score, document_uri, document_metadata_json in results
-        ]
+            for chunk_id, document_id, content, metadata_json, document_uri, document_metadata_json in cursor.fetchall()
+        }
 
     async def get_by_document_id(self, document_id: int) -> list[Chunk]:
         """Get all chunks for a specific document."""
@@ -434,12 +727,12 @@ class ChunkRepository(BaseRepository[Chunk]):
 
         cursor = self.store._connection.cursor()
         cursor.execute(
-            """
-            SELECT c.id, c.document_id, c.content, c.metadata, d.uri, d.metadata as document_metadata
+            f"""
+            SELECT c.id, c.document_id, {CHUNK_CONTENT}, c.metadata, d.uri, d.metadata as document_metadata
             FROM chunks c
             JOIN documents d ON c.document_id = d.id
             WHERE c.document_id = :document_id
-            ORDER BY JSON_EXTRACT(c.metadata, '$.order')
+            ORDER BY c.meta_order
             """,
             {"document_id": document_id},
         )
@@ -1,9 +1,40 @@
 import json
-
-from haiku.rag.store.models.document import Document
+from collections.abc import AsyncGenerator
+from typing import Any
+
+from haiku.rag.config import Config
+from haiku.rag.store.compression import compress, decompress
+from haiku.rag.store.metadata import metadata_column
+from haiku.rag.store.models.document import Document, DocumentHeader
+from haiku.rag.store.models.filter import prefix_end
 from haiku.rag.store.repositories.base import BaseRepository
 
 
+def stored_content(content: str) -> str | bytes:
+    """Return document content as stored with the configured compression."""
+    # Chunks stored as offsets are cut from the document text in SQL
+    if Config.CHUNK_STORAGE == "offsets":
+        return content
+    return compress(content, Config.DOCUMENT_COMPRESSION)
+
+
+HEADER_COLUMNS = "id, uri, metadata, collection, created_at, updated_at, size"
+
+
+def header(row: tuple) -> DocumentHeader:
+    """Build a document header from a row of `HEADER_COLUMNS`."""
+    document_id, uri, metadata_json, collection, created_at, updated_at, size = row
+    return DocumentHeader(
+        id=document_id,
+        uri=uri,
+        metadata=json.loads(metadata_json) if metadata_json else {},
+        collection=collection,
+        created_at=created_at,
+        updated_at=updated_at,
+        size=size,
+    )
+
+
 class DocumentRepository(BaseRepository[Document]):
     """Repository for Document database operations."""
 
@@ -30,13 +61,18 @@ class DocumentRepository(BaseRepository[Document]):
             # Insert the document
             cursor.execute(
                 """
-                INSERT INTO documents (content, uri, metadata, created_at, updated_at)
-                VALUES (:content, :uri, :metadata, :created_at, :updated_at)
+                INSERT INTO documents
+                    (content, uri, metadata, collection, created_at, updated_at, size)
+                VALUES
+                    (:content, :uri, :metadata, :collection, :created_at, :updated_at,
+                    :size)
                 """,
                 {
-                    "content": entity.content,
+                    "content": stored_content(entity.content),
+                    "size": len(entity.content),
                     "uri": entity.uri,
                     "metadata": json.dumps(entity.metadata),
+                    "collection": entity.collection,
                     "created_at": entity.created_at,
                     "updated_at": entity.updated_at,
                 },
@@ -66,7 +102,7 @@ class DocumentRepository(BaseRepository[Document]):
         cursor = self.store._connection.cursor()
         cursor.execute(
             """
-            SELECT id, content, uri, metadata, created_at, updated_at
+            SELECT id, content, uri, metadata, collection, created_at, updated_at
             FROM documents WHERE id = :id
             """,
             {"id": entity_id},
@@ -76,14 +112,23 @@ class DocumentRepository(BaseRepository[Document]):
         if row is None:
             return None
 
-        document_id, content, uri, metadata_json, created_at, updated_at = row
+        (
+            document_id,
+            content,
+            uri,
+            metadata_json,
+            collection,
+            created_at,
+            updated_at,
+        ) = row
         metadata = json.loads(metadata_json) if metadata_json else {}
 
         return Document(
             id=document_id,
-            content=content,
+            content=decompress(content),
             uri=uri,
             metadata=metadata,
+            collection=collection,
             created_at=created_at,
             updated_at=updated_at,
         )
@@ -96,7 +141,7 @@ class DocumentRepository(BaseRepository[Document]):
         cursor = self.store._connection.cursor()
         cursor.execute(
             """
-            SELECT id, content, uri, metadata, created_at, updated_at
+            SELECT id, content, uri, metadata, collection, created_at, updated_at
             FROM documents WHERE uri = :uri
             """,
             {"uri": uri},
@@ -106,14 +151,23 @@ class DocumentRepository(BaseRepository[Document]):
         if row is None:
             return None
 
-        document_id, content, uri, metadata_json, created_at, updated_at = row
+        (
+            document_id,
+            content,
+            uri,
+            metadata_json,
+            collection,
+            created_at,
+            updated_at,
+        ) = row
         metadata = json.loads(metadata_json) if metadata_json else {}
 
         return Document(
             id=document_id,
-            content=content,
+            content=decompress(content),
             uri=uri,
             metadata=metadata,
+            collection=collection,
             created_at=created_at,
             updated_at=updated_at,
         )
@@ -135,13 +189,16 @@ class DocumentRepository(BaseRepository[Document]):
             cursor.execute(
                 """
                 UPDATE documents
-                SET content = :content, uri = :uri, metadata = :metadata, updated_at = :updated_at
+                SET content = :content, uri = :uri, metadata = :metadata,
+                    collection = :collection, updated_at = :updated_at, size = :size
                 WHERE id = :id
                 """,
                 {
-                    "content": entity.content,
+                    "content": stored_content(entity.content),
+                    "size": len(entity.content),
                     "uri": entity.uri,
                     "metadata": json.dumps(entity.metadata),
+                    "collection": entity.collection,
                     "updated_at": entity.updated_at,
                     "id": entity.id,
                 },
@@ -162,29 +219,99 @@ class DocumentRepository(BaseRepository[Document]):
 
     async def delete(self, entity_id: int) -> bool:
         """Delete a document and all its associated chunks and embeddings."""
-        # Delete chunks and embeddings first
-        await self.chunk_repository.delete_by_document_id(entity_id)
+        return await self.delete_many([entity_id]) > 0
 
+    async def delete_many(self, document_ids: list[int]) -> int:
+        """Delete several documents and their chunks and embeddings at once.
+
+        Embeddings are deleted with set-based statements; triggers delete the
+        chunks of the deleted documents and remove them from the FTS5 table.
+
+        Returns:
+            The number of deleted documents.
+        """
         if self.store._connection is None:
             raise ValueError("Store connection is not available")
 
-        cursor = self.store._connection.cursor()
-        cursor.execute("DELETE FROM documents WHERE id = :id", {"id": entity_id})
+        self.chunk_repository.delete_embeddings_by_document_ids(document_ids)
+        cursor = self.store._connection.execute(
+            """
+            DELETE FROM documents
+            WHERE id IN (SELECT value FROM json_each(:document_ids))
+            """,
+            {"document_ids": json.dumps(document_ids)},
+        )
 
-        deleted = cursor.rowcount > 0
+        deleted = cursor.rowcount
+        if deleted:
+            self.store.bump_generation()
         self.store._connection.commit()
         return deleted
 
-    async def list_all(
-        self, limit: int | None = None, offset: int | None = None
-    ) -> list[Document]:
-        """List all documents with optional pagination."""
+    async def get_ids_by_uri(self, uris: list[str]) -> list[int]:
+        """Get the IDs of the documents with any of the given URIs."""
+        if self.store._connection is None:
+            raise ValueError("Store connection is not available")
+
+        cursor = self.store._connection.execute(
+            "SELECT id FROM documents WHERE uri IN (SELECT value FROM json_each(:uris))",
+            {"uris": json.dumps(uris)},
+        )
+        return [document_id for (document_id,) in cursor.fetchall()]
+
+    async def get_ids_by_uri_prefix(self, uri_prefix: str) -> list[int]:
+        """Get the IDs of the documents whose URI starts with a prefix."""
+        if self.store._connection is None:
+            raise ValueError("Store connection is not available")
+        if not uri_prefix:
+            raise ValueError("URI prefix must not be empty")
+
+        cursor = self.store._connection.execute(
+            """
+            SELECT id FROM documents
+            WHERE uri >= :uri_prefix AND uri < :uri_prefix_end
+            """,
+            {"uri_prefix": uri_prefix, "uri_prefix_end": prefix_end(uri_prefix)},
+        )
+        return [document_id for (document_id,) in cursor.fetchall()]
+
+    def _list(
+        self,
+        columns: str,
+        limit: int | None,
+        offset: int | None,
+        collection: str | None,
+        where: dict[str, Any] | None,
+    ) -> list[tuple]:
+        """Select columns of the documents matching the filters of `list_all`."""
         if self.store._connection is None:
             raise ValueError("Store connection is not available")
 
         cursor = self.store._connection.cursor()
-        query = "SELECT id, content, uri, metadata, created_at, updated_at FROM documents ORDER BY created_at DESC"
-        params = {}
+        query = f"SELECT {columns} FROM documents"
+        params: dict[str, Any] = {}
+        conditions = []
+
+        if collection is not None:
+            conditions.append("collection = :collection")
+            params["collection"] = collection
+
+        for i, (key, value) in enumerate((where or {}).items()):
+            if key in self.store.document_metadata_keys:
+                column = metadata_column(key)
+            else:
+                column = f"JSON_EXTRACT(metadata, :path_{i})"
+                params[f"path_{i}"] = f'$."{key}"'
+            if value is None:
+                conditions.append(f"{column} IS NULL")
+            else:
+                conditions.append(f"{column} = :value_{i}")
+                params[f"value_{i}"] = value
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        query += " ORDER BY created_at DESC"
 
         if limit is not None:
             query += " LIMIT :limit"
@@ -195,16 +322,171 @@ class DocumentRepository(BaseRepository[Document]):
             params["offset"] = offset
 
         cursor.execute(query, params)
-        rows = cursor.fetchall()
+        return cursor.fetchall()
 
+    async def list_all(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        collection: str | None = None,
+        where: dict[str, Any] | None = None,
+    ) -> list[Document]:
+        """List all documents with optional pagination, optionally in one collection.
+
+        `where` maps metadata keys to the values documents must have, with None
+        matching a missing key. Keys promoted to generated columns (contentType,
+        md5 and those in METADATA_INDEXES) are looked up through their index;
+        other keys are compared on the metadata of every document.
+        """
+        rows = self._list(
+            "id, content, uri, metadata, collection, created_at, updated_at",
+            limit,
+            offset,
+            collection,
+            where,
+        )
         return [
             Document(
                 id=document_id,
-                content=content,
+                content=decompress(content),
                 uri=uri,
                 metadata=json.loads(metadata_json) if metadata_json else {},
+                collection=collection,
                 created_at=created_at,
                 updated_at=updated_at,
             )
-            for document_id, content, uri, metadata_json, created_at, updated_at in rows
+            for document_id, content, uri, metadata_json, collection, created_at, updated_at in rows
         ]
+
+    async def list_headers(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        collection: str | None = None,
+        where: dict[str, Any] | None = None,
+    ) -> list[DocumentHeader]:
+        """List the headers of documents, with the same filters as `list_all`.
+
+        The columns are read from a covering index, without touching the rows
+        that hold document content.
+        """
+        rows = self._list(HEADER_COLUMNS, limit, offset, collection, where)
+        return [header(row) for row in rows]
+
+    async def iter_all(
+        self, batch_size: int = 100, collection: str | None = None
+    ) -> AsyncGenerator[Document, None]:
+        """Iterate over all documents in ID order, reading them in batches.
+
+        Batches are selected by keyset pagination on the document ID rather
+        than with OFFSET, so every batch costs the same however deep it is, and
+        at most `batch_size` documents are held in memory.
+        """
+        if self.store._connection is None:
+            raise ValueError("Store connection is not available")
+
+        last_id = 0
+        while True:
+            rows = self.store._connection.execute(
+                f"""
+                SELECT id, content, uri, metadata, collection, created_at, updated_at
+                FROM documents
+                WHERE id > :last_id
+                {"" if collection is None else "AND collection = :collection"}
+                ORDER BY id
+                LIMIT :batch_size
+                """,
+                {
+                    "last_id": last_id,
+                    "collection": collection,
+                    "batch_size": batch_size,
+                },
+            ).fetchall()
+            for (
+                document_id,
+                content,
+                uri,
+                metadata_json,
+                document_collection,
+                created_at,
+                updated_at,
+            ) in rows:
+                yield Document(
+                    id=document_id,
+                    content=decompress(content),
+                    uri=uri,
+                    metadata=json.loads(metadata_json) if metadata_json else {},
+                    collection=document_collection,
+                    created_at=created_at,
+                    updated_at=updated_at,
+                )
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+
+    async def iter_headers(
+        self, batch_size: int = 100, collection: str | None = None
+    ) -> AsyncGenerator[DocumentHeader, None]:
+        """Iterate over the headers of all documents, newest first, in batches.
+
+        Like `list_headers`, the headers are read from a covering index. Batches
+        continue after the (created_at, id) of the previous one.
+        """
+        if self.store._connection is None:
+            raise ValueError("Store connection is not available")
+
+        after = ""
+        params: dict[str, Any] = {"collection": collection, "batch_size": batch_size}
+        while True:
+            rows = self.store._connection.execute(
+                f"""
+                SELECT {HEADER_COLUMNS} FROM documents
+                WHERE TRUE {after}
+                {"" if collection is None else "AND collection = :collection"}
+                ORDER BY created_at DESC, id DESC
+                LIMIT :batch_size
+                """,
+                params,
+            ).fetchall()
+            for row in rows:
+                yield header(row)
+            if len(rows) < batch_size:
+                return
+            after = "AND (created_at, id) < (:created_at, :id)"
+            document_id, _, _, _, created_at, _, _ = rows[-1]
+            params.update(id=document_id, created_at=created_at)
+
+    async def count(self, collection: str | None = None) -> int:
+        """Count the documents, optionally in one collection."""
+        if self.store._connection is None:
+            raise ValueError("Store connection is not available")
+
+        (count,) = self.store._connection.execute(
+            f"""
+            SELECT COUNT(*) FROM documents
+            {"" if collection is None else "WHERE collection = :collection"}
+            """,
+            {"collection": collection},
+        ).fetchone()
+        return count
+
+    async def get_header_by_uri(self, uri: str) -> DocumentHeader | None:
+        """Get the header of a document by its URI, without its content."""
+        if self.store._connection is None:
+            raise ValueError("Store connection is not available")
+
+        row = self.store._connection.execute(
+            f"SELECT {HEADER_COLUMNS} FROM documents WHERE uri = :uri",
+            {"uri": uri},
+        ).fetchone()
+        return None if row is None else header(row)
+
+    async def get_content(self, document_id: int) -> str | None:
+        """Load the content of a document."""
+        if self.store._connection is None:
+            raise ValueError("Store connection is not available")
+
+        row = self.store._connection.execute(
+            "SELECT content FROM documents WHERE id = :id", {"id": document_id}
+        ).fetchone()
+        return None if row is None else decompress(row[0])
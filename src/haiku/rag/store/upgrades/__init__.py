@@ -1,3 +1,4 @@
 from haiku.rag.store.upgrades.v0_3_4 import upgrades as v0_3_4_upgrades
+from haiku.rag.store.upgrades.v0_4_0 import upgrades as v0_4_0_upgrades
 
-upgrades = v0_3_4_upgrades
+upgrades = v0_3_4_upgrades + v0_4_0_upgrades
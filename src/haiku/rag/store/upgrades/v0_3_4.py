@@ -7,7 +7,7 @@ from haiku.rag.config import Config
 def add_settings_table(db: Connection) -> None:
     """Create settings table for storing current configuration"""
     db.execute("""
-        CREATE TABLE settings (
+        CREATE TABLE IF NOT EXISTS settings (
             id INTEGER PRIMARY KEY DEFAULT 1,
             settings TEXT NOT NULL DEFAULT '{}'
         )
@@ -15,10 +15,9 @@ def add_settings_table(db: Connection) -> None:
 
     settings_json = Config.model_dump_json()
     db.execute(
-        "INSERT INTO settings (id, settings) VALUES (1, ?)",
+        "INSERT OR IGNORE INTO settings (id, settings) VALUES (1, ?)",
         (settings_json,),
     )
-    db.commit()
 
 
 upgrades: list[tuple[str, list[Callable[[Connection], None]]]] = [
@@ -0,0 +1,285 @@
+import re
+from collections.abc import Callable
+from sqlite3 import Connection
+
+
+def _columns(db: Connection, table: str) -> set[str]:
+    return {name for _, name, *_ in db.execute(f"PRAGMA table_info({table})")}
+
+
+def _embeddings_schema(db: Connection) -> str:
+    (sql,) = db.execute(
+        "SELECT sql FROM sqlite_master WHERE name = 'chunk_embeddings'"
+    ).fetchone()
+    return sql
+
+
+def add_index_generation_table(db: Connection) -> None:
+    """Create index generation table for invalidating cached search results"""
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS index_generation (
+            id INTEGER PRIMARY KEY DEFAULT 1,
+            generation INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    db.execute("INSERT OR IGNORE INTO index_generation (id, generation) VALUES (1, 0)")
+
+
+def add_fts_vocabulary_table(db: Connection) -> None:
+    """Create FTS5 vocabulary table for selective full-text queries"""
+    db.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts_vocab
+        USING fts5vocab(chunks_fts, 'row')
+    """)
+
+
+def add_document_collections(db: Connection) -> None:
+    """Add document collections and partition chunk embeddings by collection"""
+    if "collection" not in _columns(db, "documents"):
+        db.execute(
+            "ALTER TABLE documents ADD COLUMN collection TEXT NOT NULL DEFAULT 'default'"
+        )
+    db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_documents_collection ON documents(collection)"
+    )
+
+    sql = _embeddings_schema(db)
+    if re.search(r"\bcollection\b", sql, re.IGNORECASE):
+        return
+
+    # vec0 tables cannot be altered: copy the embeddings out and back into a
+    # table of the same dimension with a collection partition key
+    match = re.search(r"FLOAT\[(\d+)\]", sql, re.IGNORECASE)
+    assert match is not None, "Unexpected chunk_embeddings schema"
+    db.execute("""
+        CREATE TEMP TABLE chunk_embeddings_copy AS
+        SELECT chunk_id, embedding FROM chunk_embeddings
+    """)
+    db.execute("DROP TABLE chunk_embeddings")
+    db.execute(f"""
+        CREATE VIRTUAL TABLE chunk_embeddings USING vec0(
+            chunk_id INTEGER PRIMARY KEY,
+            collection TEXT PARTITION KEY,
+            embedding FLOAT[{match.group(1)}]
+        )
+    """)
+    db.execute("""
+        INSERT INTO chunk_embeddings (chunk_id, collection, embedding)
+        SELECT chunk_id, 'default', embedding FROM chunk_embeddings_copy
+    """)
+    db.execute("DROP TABLE chunk_embeddings_copy")
+
+    # Derived vector tables are recreated from chunk_embeddings when opened
+    for table in (
+        "chunk_embeddings_quantized",
+        "chunk_embeddings_reduced",
+        "document_embeddings",
+    ):
+        db.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def add_chunk_embedding_metadata(db: Connection) -> None:
+    """Add document metadata columns to chunk embeddings for filtered searches"""
+    db.execute("CREATE INDEX IF NOT EXISTS idx_documents_uri ON documents(uri)")
+    db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_documents_created_at ON documents(created_at)"
+    )
+
+    sql = _embeddings_schema(db)
+    if re.search(r"\bcontent_type\b", sql, re.IGNORECASE):
+        return
+
+    match = re.search(r"FLOAT\[(\d+)\]", sql, re.IGNORECASE)
+    assert match is not None, "Unexpected chunk_embeddings schema"
+    db.execute("""
+        CREATE TEMP TABLE chunk_embeddings_copy AS
+        SELECT chunk_id, collection, embedding FROM chunk_embeddings
+    """)
+    db.execute("DROP TABLE chunk_embeddings")
+    db.execute(f"""
+        CREATE VIRTUAL TABLE chunk_embeddings USING vec0(
+            chunk_id INTEGER PRIMARY KEY,
+            collection TEXT PARTITION KEY,
+            embedding FLOAT[{match.group(1)}],
+            content_type TEXT,
+            uri TEXT,
+            created_at TEXT
+        )
+    """)
+    db.execute("""
+        INSERT INTO chunk_embeddings
+            (chunk_id, collection, embedding, content_type, uri, created_at)
+        SELECT
+            e.chunk_id,
+            e.collection,
+            e.embedding,
+            COALESCE(CAST(JSON_EXTRACT(d.metadata, '$.contentType') AS TEXT), ''),
+            COALESCE(d.uri, ''),
+            COALESCE(CAST(d.created_at AS TEXT), '')
+        FROM chunk_embeddings_copy e
+        LEFT JOIN chunks c ON c.id = e.chunk_id
+        LEFT JOIN documents d ON d.id = c.document_id
+    """)
+    db.execute("DROP TABLE chunk_embeddings_copy")
+
+
+def add_chunks_fts_delete_trigger(db: Connection) -> None:
+    """Remove deleted chunks from the full-text index with a trigger"""
+    db.execute("""
+        CREATE TRIGGER IF NOT EXISTS chunks_fts_delete AFTER DELETE ON chunks
+        BEGIN
+            INSERT INTO chunks_fts (chunks_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+        END
+    """)
+
+
+def add_chunks_fts_sync_triggers(db: Connection) -> None:
+    """Keep the full-text index in sync with chunks using triggers"""
+    db.execute("""
+        CREATE TRIGGER IF NOT EXISTS chunks_fts_insert AFTER INSERT ON chunks
+        BEGIN
+            INSERT INTO chunks_fts (rowid, content) VALUES (new.id, new.content);
+        END
+    """)
+    db.execute("""
+        CREATE TRIGGER IF NOT EXISTS chunks_fts_update
+        AFTER UPDATE OF content ON chunks
+        BEGIN
+            INSERT INTO chunks_fts (chunks_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+            INSERT INTO chunks_fts (rowid, content) VALUES (new.id, new.content);
+        END
+    """)
+    # Chunk updates used to rewrite the index in place, which an external-content
+    # table cannot track; reindex from the chunks table to repair any drift
+    db.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('rebuild')")
+
+
+def add_chunk_offsets(db: Connection) -> None:
+    """Allow chunks to be stored as offsets into their document's content"""
+    columns = _columns(db, "chunks")
+    for column in ("start_offset", "end_offset"):
+        if column not in columns:
+            db.execute(f"ALTER TABLE chunks ADD COLUMN {column} INTEGER")
+    db.execute("""
+        CREATE VIEW IF NOT EXISTS chunk_texts AS
+        SELECT
+            c.id,
+            c.document_id,
+            CASE WHEN c.end_offset IS NULL THEN c.content
+            ELSE substr(d.content, c.start_offset + 1, c.end_offset - c.start_offset)
+            END AS content
+        FROM chunks c
+        LEFT JOIN documents d ON d.id = c.document_id
+    """)
+
+    # Index the view rather than the chunks table
+    for trigger in ("chunks_fts_insert", "chunks_fts_delete", "chunks_fts_update"):
+        db.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    db.execute("DROP TABLE IF EXISTS chunks_fts")
+    db.execute("""
+        CREATE VIRTUAL TABLE chunks_fts USING fts5(
+            content,
+            content='chunk_texts',
+            content_rowid='id'
+        )
+    """)
+    db.execute("""
+        CREATE TRIGGER chunks_fts_insert AFTER INSERT ON chunks
+        BEGIN
+            INSERT INTO chunks_fts (rowid, content)
+            SELECT id, content FROM chunk_texts WHERE id = new.id;
+        END
+    """)
+    db.execute("""
+        CREATE TRIGGER chunks_fts_delete AFTER DELETE ON chunks
+        BEGIN
+            INSERT INTO chunks_fts (chunks_fts, rowid, content)
+            VALUES ('delete', old.id, CASE WHEN old.end_offset IS NULL THEN old.content
+            ELSE (
+                SELECT substr(content, old.start_offset + 1, old.end_offset - old.start_offset)
+                FROM documents WHERE id = old.document_id
+            ) END);
+        END
+    """)
+    db.execute("""
+        CREATE TRIGGER chunks_fts_update
+        AFTER UPDATE OF document_id, content, start_offset, end_offset ON chunks
+        BEGIN
+            INSERT INTO chunks_fts (chunks_fts, rowid, content)
+            VALUES ('delete', old.id, CASE WHEN old.end_offset IS NULL THEN old.content
+            ELSE (
+                SELECT substr(content, old.start_offset + 1, old.end_offset - old.start_offset)
+                FROM documents WHERE id = old.document_id
+            ) END);
+            INSERT INTO chunks_fts (rowid, content)
+            SELECT id, content FROM chunk_texts WHERE id = new.id;
+        END
+    """)
+    db.execute("""
+        CREATE TRIGGER IF NOT EXISTS documents_chunks_delete
+        BEFORE DELETE ON documents
+        BEGIN
+            DELETE FROM chunks WHERE document_id = old.id;
+        END
+    """)
+    db.execute("""
+        CREATE TRIGGER IF NOT EXISTS documents_chunks_fts_before_update
+        BEFORE UPDATE OF content ON documents
+        BEGIN
+            INSERT INTO chunks_fts (chunks_fts, rowid, content)
+            SELECT 'delete', id, content FROM chunk_texts
+            WHERE id IN (
+                SELECT id FROM chunks
+                WHERE document_id = old.id AND end_offset IS NOT NULL
+            );
+        END
+    """)
+    db.execute("""
+        CREATE TRIGGER IF NOT EXISTS documents_chunks_fts_after_update
+        AFTER UPDATE OF content ON documents
+        BEGIN
+            INSERT INTO chunks_fts (rowid, content)
+            SELECT id, content FROM chunk_texts
+            WHERE id IN (
+                SELECT id FROM chunks
+                WHERE document_id = new.id AND end_offset IS NOT NULL
+            );
+        END
+    """)
+    db.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('rebuild')")
+
+
+def add_document_headers(db: Connection) -> None:
+    """Record document sizes and cover document headers with indexes"""
+    if "size" not in _columns(db, "documents"):
+        db.execute("ALTER TABLE documents ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+        db.execute("UPDATE documents SET size = length(content)")
+    db.execute("DROP INDEX IF EXISTS idx_documents_uri")
+    db.execute("""
+        CREATE INDEX idx_documents_uri
+        ON documents(uri, collection, created_at, updated_at, size, metadata)
+    """)
+    db.execute("DROP INDEX IF EXISTS idx_documents_created_at")
+    db.execute("""
+        CREATE INDEX idx_documents_created_at
+        ON documents(created_at, uri, collection, updated_at, size, metadata)
+    """)
+
+
+upgrades: list[tuple[str, list[Callable[[Connection], None]]]] = [
+    (
+        "0.4.0",
+        [
+            add_index_generation_table,
+            add_fts_vocabulary_table,
+            add_document_collections,
+            add_chunk_embedding_metadata,
+            add_chunks_fts_delete_trigger,
+            add_chunks_fts_sync_triggers,
+            add_chunk_offsets,
+            add_document_headers,
+        ],
+    )
+]
@@ -0,0 +1,88 @@
+from pathlib import Path
+from typing import Literal
+
+from haiku.rag.config import Config
+from haiku.rag.embeddings import get_embedder
+from haiku.rag.store.vector.base import (
+    VectorIndex,
+    VectorIndexRecall,
+    VectorIndexStats,
+    serialize_embedding,
+)
+from haiku.rag.store.vector.centroids import DocumentCentroids
+from haiku.rag.store.vector.quantized import QuantizedIndex
+from haiku.rag.store.vector.reduced import ReducedIndex
+from haiku.rag.store.vector.sqlite_vec import SqliteVecIndex
+
+
+def get_vector_index(db_path: Path | Literal[":memory:"]) -> VectorIndex:
+    """
+    Factory function to get the vector index configured by VECTOR_INDEX.
+
+    Args:
+        db_path: The database path; indexes persisting state outside the
+            database store it next to this file.
+    """
+    dim = get_embedder()._vector_dim
+
+    if Config.VECTOR_INDEX == "sqlite-vec":
+        if Config.VECTOR_REDUCED_DIM and Config.VECTOR_QUANTIZATION != "none":
+            raise ValueError(
+                "VECTOR_REDUCED_DIM and VECTOR_QUANTIZATION cannot be combined"
+            )
+        if Config.VECTOR_REDUCED_DIM:
+            if Config.VECTOR_REDUCTION == "pca":
+                try:
+                    import numpy  # noqa: F401
+                except ImportError:
+                    raise ImportError(
+                        "PCA vector reduction requires the 'numpy' package. "
+                        "Please install haiku.rag with the 'numpy' extra:"
+                        "uv pip install haiku.rag --extra numpy"
+                    )
+            return ReducedIndex(
+                dim,
+                reduced_dim=Config.VECTOR_REDUCED_DIM,
+                reduction=Config.VECTOR_REDUCTION,  # type: ignore[arg-type]
+                rescore_factor=Config.VECTOR_RESCORE_FACTOR,
+            )
+        if Config.VECTOR_QUANTIZATION == "none":
+            return SqliteVecIndex(dim)
+        return QuantizedIndex(
+            dim,
+            quantization=Config.VECTOR_QUANTIZATION,  # type: ignore[arg-type]
+            rescore_factor=Config.VECTOR_RESCORE_FACTOR,
+        )
+
+    if Config.VECTOR_INDEX == "hnsw":
+        try:
+            from haiku.rag.store.vector.hnsw import HNSWIndex
+        except ImportError:
+            raise ImportError(
+                "HNSW vector index requires the 'hnswlib' package. "
+                "Please install haiku.rag with the 'hnsw' extra:"
+                "uv pip install haiku.rag --extra hnsw"
+            )
+        return HNSWIndex(
+            dim,
+            path=None if db_path == ":memory:" else Path(f"{db_path}.hnsw"),
+            m=Config.HNSW_M,
+            ef_construction=Config.HNSW_EF_CONSTRUCTION,
+            ef_search=Config.HNSW_EF_SEARCH,
+            rescore_factor=Config.HNSW_RESCORE_FACTOR,
+        )
+
+    if Config.VECTOR_INDEX == "numpy":
+        try:
+            from haiku.rag.store.vector.matrix import NumpyIndex
+        except ImportError:
+            raise ImportError(
+                "NumPy vector index requires the 'numpy' package. "
+                "Please install haiku.rag with the 'numpy' extra:"
+                "uv pip install haiku.rag --extra numpy"
+            )
+        return NumpyIndex(
+            dim, path=None if db_path == ":memory:" else Path(f"{db_path}.vectors")
+        )
+
+    raise ValueError(f"Unsupported vector index: {Config.VECTOR_INDEX}")
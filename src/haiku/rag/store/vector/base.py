@@ -0,0 +1,220 @@
+import sqlite3
+import struct
+import time
+from abc import ABC, abstractmethod
+
+from pydantic import BaseModel
+
+from haiku.rag.store.models.filter import SearchFilter
+
+
+def serialize_embedding(embedding: list[float]) -> bytes:
+    """Serialize a list of floats to bytes for sqlite-vec storage."""
+    return struct.pack(f"{len(embedding)}f", *embedding)
+
+
+class VectorIndexStats(BaseModel):
+    """Size and configuration of a vector index."""
+
+    engine: str
+    dim: int
+    count: int
+
+
+class VectorIndexRecall(BaseModel):
+    """Search quality and latency of a vector index compared to an exact scan."""
+
+    engine: str
+    k: int
+    queries: int
+    recall: float
+    latency_ms: float
+    exact_latency_ms: float
+
+
+class VectorIndex(ABC):
+    """Base interface for storing chunk embeddings and searching them.
+
+    Every method receives the SQLite connection to work with, so that writes take
+    part in the caller's transaction and searches can run on read connections.
+
+    Args:
+        dim: The dimension of the embeddings.
+    """
+
+    name: str = ""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    @abstractmethod
+    def create(self, db: sqlite3.Connection) -> None:
+        """Create the tables backing the index, if they do not exist."""
+        pass
+
+    @abstractmethod
+    def drop(self, db: sqlite3.Connection) -> None:
+        """Drop the tables backing the index."""
+        pass
+
+    @abstractmethod
+    def add(
+        self, db: sqlite3.Connection, chunk_id: int, embedding: list[float]
+    ) -> None:
+        """Add the embedding of a new chunk."""
+        pass
+
+    @abstractmethod
+    def update(
+        self, db: sqlite3.Connection, chunk_id: int, embedding: list[float]
+    ) -> None:
+        """Replace the embedding of an existing chunk."""
+        pass
+
+    @abstractmethod
+    def delete(self, db: sqlite3.Connection, chunk_id: int) -> None:
+        """Remove the embedding of a chunk."""
+        pass
+
+    def delete_many(self, db: sqlite3.Connection, chunk_ids: list[int]) -> None:
+        """Remove the embeddings of several chunks.
+
+        Engines backed by tables override this with set-based statements; the
+        default removes one embedding at a time.
+        """
+        for chunk_id in chunk_ids:
+            self.delete(db, chunk_id)
+
+    @abstractmethod
+    def clear(self, db: sqlite3.Connection) -> None:
+        """Remove all embeddings."""
+        pass
+
+    @abstractmethod
+    def search(
+        self,
+        db: sqlite3.Connection,
+        embedding: list[float],
+        k: int,
+        collection: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> list[tuple[int, float]]:
+        """Return the k nearest chunks as (chunk_id, distance), closest first.
+
+        With a collection, only chunks of documents in that collection are searched.
+        With filters, only chunks of documents matching them are searched.
+        """
+        pass
+
+    def search_many(
+        self,
+        db: sqlite3.Connection,
+        embeddings: list[list[float]],
+        k: int,
+        collection: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> list[list[tuple[int, float]]]:
+        """Return the k nearest chunks for each of several query embeddings.
+
+        Engines that can score many queries at once override this; the default
+        searches for one embedding at a time.
+        """
+        return [
+            self.search(db, embedding, k, collection, filters)
+            for embedding in embeddings
+        ]
+
+    @abstractmethod
+    def stats(self, db: sqlite3.Connection) -> VectorIndexStats:
+        """Return the size and configuration of the index."""
+        pass
+
+    def rebuild(self, db: sqlite3.Connection) -> None:
+        """Rebuild any derived structures from the stored embeddings."""
+        pass
+
+    def compact(self, db: sqlite3.Connection) -> int:
+        """Rewrite the index without the space left behind by deleted embeddings.
+
+        Returns:
+            The number of embedding slots freed.
+        """
+        return 0
+
+    def exact_search(
+        self,
+        db: sqlite3.Connection,
+        embedding: list[float],
+        k: int,
+        collection: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> list[tuple[int, float]]:
+        """Return the exact k nearest chunks, as a reference for approximate engines."""
+        return self.search(db, embedding, k, collection, filters)
+
+    def sample_embeddings(self, db: sqlite3.Connection, n: int) -> list[list[float]]:
+        """Return up to n stored embeddings, chosen at random."""
+        return []
+
+    def measure_recall(
+        self, db: sqlite3.Connection, k: int = 10, samples: int = 100
+    ) -> VectorIndexRecall:
+        """Compare searches against an exact scan of the stored embeddings.
+
+        A random sample of stored embeddings is used as queries.
+
+        Args:
+            db: The connection to search with.
+            k: The number of results per query.
+            samples: The maximum number of queries.
+
+        Returns:
+            The fraction of the exact top-k that the index returns, and the mean
+            latency per query of the index and of the exact scan.
+        """
+        queries = self.sample_embeddings(db, samples)
+        latency = exact_latency = 0.0
+        found = expected = 0
+        for query in queries:
+            start = time.perf_counter()
+            results = self.search(db, query, k)
+            latency += time.perf_counter() - start
+
+            start = time.perf_counter()
+            exact = self.exact_search(db, query, k)
+            exact_latency += time.perf_counter() - start
+
+            exact_ids = {chunk_id for chunk_id, _ in exact}
+            found += len(exact_ids & {chunk_id for chunk_id, _ in results})
+            expected += len(exact_ids)
+
+        n = max(1, len(queries))
+        return VectorIndexRecall(
+            engine=self.name,
+            k=k,
+            queries=len(queries),
+            recall=found / expected if expected else 1.0,
+            latency_ms=latency * 1000 / n,
+            exact_latency_ms=exact_latency * 1000 / n,
+        )
+
+    def train(self, db: sqlite3.Connection) -> None:
+        """Learn any parameters from the stored embeddings.
+
+        Called once the database has been rebuilt, so that engines deriving a
+        model from the data (such as a projection) fit it to the whole corpus.
+        """
+        pass
+
+    def load(self, db: sqlite3.Connection, generation: int) -> bool:
+        """Restore state persisted outside the database.
+
+        Returns:
+            False if the persisted state does not match the given index generation
+            and the index must be rebuilt.
+        """
+        return True
+
+    def save(self, generation: int) -> None:
+        """Persist state kept outside the database, tagged with the index generation."""
+        pass
@@ -0,0 +1,238 @@
+import json
+import sqlite3
+from itertools import groupby
+from operator import itemgetter
+
+from haiku.rag.store.vector.base import serialize_embedding
+from haiku.rag.store.vector.sqlite_vec import collection_filter
+
+
+class DocumentCentroids:
+    """Document-level summary vectors for two-stage vector search.
+
+    Each document is summarized by the mean of its chunk embeddings, kept in a
+    vec0 table together with its number of chunks so that the mean is updated
+    incrementally as chunks are added and removed, without embedding anything.
+    A search first finds the documents with the nearest centroids, and then
+    ranks only the chunks of those documents by their exact distance.
+
+    Centroids are computed with NumPy, which requires the `numpy` extra.
+
+    Args:
+        dim: The dimension of the embeddings.
+    """
+
+    table = "document_embeddings"
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def create(self, db: sqlite3.Connection) -> None:
+        """Create the centroid table, if it does not exist."""
+        db.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING vec0(
+                document_id INTEGER PRIMARY KEY,
+                collection TEXT PARTITION KEY,
+                embedding FLOAT[{self.dim}],
+                +chunk_count INTEGER
+            )
+        """)
+
+    def drop(self, db: sqlite3.Connection) -> None:
+        """Drop the centroid table."""
+        db.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def clear(self, db: sqlite3.Connection) -> None:
+        """Remove all centroids."""
+        db.execute(f"DELETE FROM {self.table}")
+
+    def delete_documents(self, db: sqlite3.Connection, document_ids: list[int]) -> None:
+        """Remove the centroids of documents whose chunks are all being deleted."""
+        db.execute(
+            f"""
+            DELETE FROM {self.table}
+            WHERE document_id IN (SELECT value FROM json_each(:document_ids))
+            """,
+            {"document_ids": json.dumps(document_ids)},
+        )
+
+    def _get(self, db: sqlite3.Connection, document_id: int) -> tuple | None:
+        """Return the centroid of a document and its number of chunks, if any."""
+        import numpy as np
+
+        row = db.execute(
+            f"""
+            SELECT embedding, chunk_count FROM {self.table}
+            WHERE document_id = :document_id
+            """,
+            {"document_id": document_id},
+        ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32).astype(np.float64), row[1]
+
+    def _set(
+        self,
+        db: sqlite3.Connection,
+        document_id: int,
+        centroid,
+        chunk_count: int,
+    ) -> None:
+        import numpy as np
+
+        db.execute(
+            f"DELETE FROM {self.table} WHERE document_id = :document_id",
+            {"document_id": document_id},
+        )
+        if chunk_count > 0:
+            db.execute(
+                f"""
+                INSERT INTO {self.table}
+                    (document_id, collection, embedding, chunk_count)
+                VALUES (
+                    :document_id,
+                    COALESCE(
+                        (SELECT collection FROM documents WHERE id = :document_id),
+                        'default'
+                    ),
+                    :embedding,
+                    :chunk_count
+                )
+                """,
+                {
+                    "document_id": document_id,
+                    "embedding": np.asarray(centroid, dtype=np.float32).tobytes(),
+                    "chunk_count": chunk_count,
+                },
+            )
+
+    def add_chunks(
+        self,
+        db: sqlite3.Connection,
+        document_id: int,
+        embeddings: list[list[float]],
+    ) -> None:
+        """Fold the embeddings of new chunks of a document into its centroid."""
+        import numpy as np
+
+        if not embeddings:
+            return
+        total = np.asarray(embeddings, dtype=np.float64).sum(axis=0)
+        n = len(embeddings)
+        current = self._get(db, document_id)
+        if current is not None:
+            centroid, count = current
+            total += centroid * count
+            n += count
+        self._set(db, document_id, total / n, n)
+
+    def remove_chunk(self, db: sqlite3.Connection, chunk_id: int) -> None:
+        """Take a chunk out of its document's centroid.
+
+        Must be called while the chunk and its embedding are still stored.
+        """
+        row = db.execute(
+            """
+            SELECT c.document_id, e.embedding
+            FROM chunks c
+            JOIN chunk_embeddings e ON e.chunk_id = c.id
+            WHERE c.id = :chunk_id
+            """,
+            {"chunk_id": chunk_id},
+        ).fetchone()
+        if row is None:
+            return
+        import numpy as np
+
+        document_id, blob = row
+        current = self._get(db, document_id)
+        if current is None:
+            return
+        centroid, n = current
+        if n <= 1:
+            self._set(db, document_id, centroid, 0)
+            return
+        embedding = np.frombuffer(blob, dtype=np.float32)
+        self._set(db, document_id, (centroid * n - embedding) / (n - 1), n - 1)
+
+    def search(
+        self,
+        db: sqlite3.Connection,
+        embedding: list[float],
+        k: int,
+        documents: int,
+        collection: str | None = None,
+    ) -> list[tuple[int, float]]:
+        """Return the k nearest chunks among those of the nearest documents.
+
+        Args:
+            db: The connection to search with.
+            embedding: The query embedding.
+            k: The number of chunks to return.
+            documents: The number of documents whose chunks are searched.
+            collection: Only search documents in this collection, if given.
+
+        Returns:
+            (chunk_id, distance) tuples, closest first.
+        """
+        cursor = db.execute(
+            f"""
+            WITH nearest_documents AS (
+                SELECT document_id
+                FROM {self.table}
+                WHERE embedding MATCH :embedding AND k = :documents
+                {collection_filter(collection)}
+            )
+            SELECT c.id, vec_distance_l2(e.embedding, :embedding) AS distance
+            FROM nearest_documents n
+            JOIN chunks c ON c.document_id = n.document_id
+            JOIN chunk_embeddings e ON e.chunk_id = c.id
+            ORDER BY distance
+            LIMIT :k
+            """,
+            {
+                "embedding": serialize_embedding(embedding),
+                "documents": documents,
+                "k": k,
+                "collection": collection,
+            },
+        )
+        return cursor.fetchall()
+
+    def compact(self, db: sqlite3.Connection) -> None:
+        """Recreate the centroid table without the slots of deleted centroids."""
+        self.drop(db)
+        self.create(db)
+        self.rebuild(db)
+
+    def is_current(self, db: sqlite3.Connection) -> bool:
+        """Whether there is a centroid for every document with chunks."""
+        (centroids,) = db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        (documents,) = db.execute(
+            "SELECT COUNT(DISTINCT document_id) FROM chunks"
+        ).fetchone()
+        return centroids == documents
+
+    def rebuild(self, db: sqlite3.Connection) -> None:
+        """Recompute all centroids from the stored chunk embeddings.
+
+        Embeddings are streamed in document order, so only one document's
+        embeddings are held in memory at a time.
+        """
+        import numpy as np
+
+        self.clear(db)
+        cursor = db.execute("""
+            SELECT c.document_id, e.embedding
+            FROM chunks c
+            JOIN chunk_embeddings e ON e.chunk_id = c.id
+            ORDER BY c.document_id
+        """)
+        for document_id, rows in groupby(cursor, key=itemgetter(0)):
+            blobs = [blob for _, blob in rows]
+            matrix = np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(
+                -1, self.dim
+            )
+            self._set(
+                db, document_id, matrix.mean(axis=0, dtype=np.float64), len(blobs)
+            )
@@ -0,0 +1,255 @@
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from haiku.rag.store.models.filter import SearchFilter
+from haiku.rag.store.vector.base import VectorIndexStats, serialize_embedding
+from haiku.rag.store.vector.sqlite_vec import SqliteVecIndex
+
+try:
+    import hnswlib  # type: ignore
+    import numpy as np
+
+    class HNSWIndex(SqliteVecIndex):
+        """Approximate nearest-neighbour search with an in-memory HNSW graph.
+
+        Embeddings are still stored in the sqlite-vec table, which remains the
+        source of truth: the graph only proposes candidates, which are re-scored
+        exactly against it. The graph is persisted to a file tagged with the index
+        generation it reflects, so that a stale file is detected and rebuilt.
+
+        Deleted chunks are only marked as deleted in the graph, whose nodes are not
+        reused; compacting rebuilds the graph once they exceed `compact_threshold`
+        of its nodes.
+
+        Args:
+            dim: The dimension of the embeddings.
+            path: File to persist the graph to, or None to keep it in memory only.
+            m: Number of neighbours per node; higher improves recall and memory use.
+            ef_construction: Candidate list size while inserting.
+            ef_search: Candidate list size while searching; higher improves recall.
+            rescore_factor: How many candidates per result to re-score exactly;
+                0 returns the approximate distances as they are.
+            compact_threshold: Fraction of deleted nodes that triggers a rebuild
+                when compacting.
+        """
+
+        name = "hnsw"
+
+        def __init__(
+            self,
+            dim: int,
+            path: Path | None = None,
+            m: int = 16,
+            ef_construction: int = 200,
+            ef_search: int = 64,
+            rescore_factor: int = 2,
+            compact_threshold: float = 0.25,
+        ):
+            super().__init__(dim)
+            self.path = path
+            self.m = m
+            self.ef_construction = ef_construction
+            self.ef_search = ef_search
+            self.rescore_factor = rescore_factor
+            self.compact_threshold = compact_threshold
+            self._saved_generation: int | None = None
+            self._ids: set[int] = set()
+            self._lock = threading.Lock()
+            self._graph = self._new_graph(1024)
+
+        @property
+        def _meta_path(self) -> Path | None:
+            return self.path.with_name(self.path.name + ".json") if self.path else None
+
+        def _meta(self, generation: int) -> dict:
+            return {
+                "generation": generation,
+                "dim": self.dim,
+                "m": self.m,
+                "ef_construction": self.ef_construction,
+            }
+
+        def _new_graph(self, capacity: int) -> "hnswlib.Index":
+            graph = hnswlib.Index(space="l2", dim=self.dim)
+            graph.init_index(
+                max_elements=capacity, ef_construction=self.ef_construction, M=self.m
+            )
+            return graph
+
+        def _add_to_graph(self, chunk_id: int, embedding: list[float]) -> None:
+            with self._lock:
+                if chunk_id not in self._ids:
+                    capacity = self._graph.get_max_elements()
+                    if self._graph.get_current_count() >= capacity:
+                        self._graph.resize_index(capacity * 2)
+                self._graph.add_items(
+                    np.array([embedding], dtype=np.float32), np.array([chunk_id])
+                )
+                self._ids.add(chunk_id)
+
+        def add(
+            self, db: sqlite3.Connection, chunk_id: int, embedding: list[float]
+        ) -> None:
+            super().add(db, chunk_id, embedding)
+            self._add_to_graph(chunk_id, embedding)
+
+        def update(
+            self, db: sqlite3.Connection, chunk_id: int, embedding: list[float]
+        ) -> None:
+            super().update(db, chunk_id, embedding)
+            self._add_to_graph(chunk_id, embedding)
+
+        def delete(self, db: sqlite3.Connection, chunk_id: int) -> None:
+            super().delete(db, chunk_id)
+            with self._lock:
+                if chunk_id in self._ids:
+                    self._graph.mark_deleted(chunk_id)
+                    self._ids.discard(chunk_id)
+
+        def delete_many(self, db: sqlite3.Connection, chunk_ids: list[int]) -> None:
+            super().delete_many(db, chunk_ids)
+            with self._lock:
+                for chunk_id in chunk_ids:
+                    if chunk_id in self._ids:
+                        self._graph.mark_deleted(chunk_id)
+                        self._ids.discard(chunk_id)
+
+        def clear(self, db: sqlite3.Connection) -> None:
+            super().clear(db)
+            with self._lock:
+                self._graph = self._new_graph(1024)
+                self._ids = set()
+
+        def search(
+            self,
+            db: sqlite3.Connection,
+            embedding: list[float],
+            k: int,
+            collection: str | None = None,
+            filters: SearchFilter | None = None,
+        ) -> list[tuple[int, float]]:
+            if collection is not None or filters is not None:
+                # The graph spans all documents; scan the collection's partition,
+                # filtering on the metadata columns within the scan
+                return super().search(db, embedding, k, collection, filters)
+
+            with self._lock:
+                n = min(k * max(1, self.rescore_factor), len(self._ids))
+                if n <= 0:
+                    return []
+                self._graph.set_ef(max(self.ef_search, n))
+                labels, distances = self._graph.knn_query(
+                    np.array([embedding], dtype=np.float32), k=n
+                )
+
+            if self.rescore_factor <= 0:
+                # hnswlib reports squared L2 distances
+                return [
+                    (int(label), float(np.sqrt(distance)))
+                    for label, distance in zip(labels[0], distances[0])
+                ][:k]
+
+            # The graph may hold chunks this connection cannot see (yet), which
+            # the join drops
+            cursor = db.execute(
+                """
+                SELECT e.chunk_id, vec_distance_l2(e.embedding, :embedding) AS distance
+                FROM json_each(:chunk_ids) c
+                JOIN chunk_embeddings e ON e.chunk_id = c.value
+                ORDER BY distance
+                LIMIT :k
+                """,
+                {
+                    "embedding": serialize_embedding(embedding),
+                    "chunk_ids": json.dumps([int(label) for label in labels[0]]),
+                    "k": k,
+                },
+            )
+            return cursor.fetchall()
+
+        def stats(self, db: sqlite3.Connection) -> VectorIndexStats:
+            return VectorIndexStats(engine=self.name, dim=self.dim, count=len(self))
+
+        def rebuild(self, db: sqlite3.Connection) -> None:
+            rows = db.execute(
+                "SELECT chunk_id, embedding FROM chunk_embeddings"
+            ).fetchall()
+            graph = self._new_graph(max(1024, len(rows)))
+            if rows:
+                graph.add_items(
+                    np.array(
+                        [np.frombuffer(blob, dtype=np.float32) for _, blob in rows]
+                    ),
+                    np.array([chunk_id for chunk_id, _ in rows]),
+                )
+            with self._lock:
+                self._graph = graph
+                self._ids = {chunk_id for chunk_id, _ in rows}
+
+        def compact(self, db: sqlite3.Connection) -> int:
+            """Compact the embeddings table, and rebuild the graph if needed.
+
+            The freed slots include the graph nodes of deleted chunks when the
+            graph is rebuilt.
+            """
+            freed = super().compact(db)
+            with self._lock:
+                nodes = self._graph.get_current_count()
+                deleted = nodes - len(self._ids)
+            if deleted > 0 and deleted > nodes * self.compact_threshold:
+                self.rebuild(db)
+                # The saved graph still holds the deleted nodes
+                self._saved_generation = None
+                freed += deleted
+            return freed
+
+        def load(self, db: sqlite3.Connection, generation: int) -> bool:
+            meta_path = self._meta_path
+            if self.path is None or meta_path is None:
+                # Nothing is persisted, so the graph is built from the table
+                return False
+            if not self.path.exists():
+                return False
+            try:
+                meta = json.loads(meta_path.read_text())
+            except (OSError, ValueError):
+                return False
+            if meta != self._meta(generation):
+                return False
+
+            graph = hnswlib.Index(space="l2", dim=self.dim)
+            graph.load_index(str(self.path))
+            ids = {
+                chunk_id
+                for (chunk_id,) in db.execute("SELECT chunk_id FROM chunk_embeddings")
+            }
+            with self._lock:
+                self._graph = graph
+                self._ids = ids
+                self._saved_generation = generation
+            return True
+
+        def save(self, generation: int) -> None:
+            meta_path = self._meta_path
+            if (
+                self.path is None
+                or meta_path is None
+                or self._saved_generation == generation
+            ):
+                return
+            with self._lock:
+                # Processes sharing the database may save at the same time
+                tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                self._graph.save_index(str(tmp_path))
+                os.replace(tmp_path, self.path)
+                meta_path.write_text(json.dumps(self._meta(generation)))
+                self._saved_generation = generation
+
+        def __len__(self) -> int:
+            return len(self._ids)
+
+except ImportError:
+    pass
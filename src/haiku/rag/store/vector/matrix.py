@@ -0,0 +1,319 @@
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from haiku.rag.store.models.filter import SearchFilter
+from haiku.rag.store.vector.base import VectorIndexStats
+from haiku.rag.store.vector.sqlite_vec import SqliteVecIndex
+
+try:
+    import numpy as np
+
+    class NumpyIndex(SqliteVecIndex):
+        """Exact nearest-neighbour search over an embedding matrix held by NumPy.
+
+        Embeddings are stored in the sqlite-vec table, which remains the source of
+        truth, and mirrored in a contiguous float32 matrix, memory-mapped from a
+        file next to the database so that processes share the OS page cache.
+        A search is a single matrix-vector product followed by `argpartition`.
+
+        The file is mapped copy-on-write: writes only change this process's copy
+        of the pages, and saving replaces the file as a whole, so that processes
+        sharing the database never see each other's unsaved rows.
+
+        The matrix is append-only: deleted and replaced rows are tombstoned, and
+        the matrix is compacted when saved once tombstones exceed
+        `compact_threshold` of its rows.
+
+        Args:
+            dim: The dimension of the embeddings.
+            path: Base path of the files to map, or None to keep the matrix in memory.
+            compact_threshold: Fraction of tombstoned rows that triggers compaction.
+        """
+
+        name = "numpy"
+
+        def __init__(
+            self,
+            dim: int,
+            path: Path | None = None,
+            compact_threshold: float = 0.25,
+        ):
+            super().__init__(dim)
+            self.path = path
+            self.compact_threshold = compact_threshold
+            self._saved_generation: int | None = None
+            self._lock = threading.Lock()
+            # Until loaded or saved, the matrix is not mapped to a file
+            self._vectors = np.zeros((1024, dim), dtype=np.float32)
+            self._ids = np.full(1024, -1, dtype=np.int64)
+            self._norms = np.zeros(1024, dtype=np.float32)
+            self._count = 0
+            self._positions: dict[int, int] = {}
+
+        @property
+        def _vectors_path(self) -> Path | None:
+            return self.path.with_name(self.path.name + ".f32") if self.path else None
+
+        @property
+        def _ids_path(self) -> Path | None:
+            return self.path.with_name(self.path.name + ".ids") if self.path else None
+
+        @property
+        def _meta_path(self) -> Path | None:
+            return self.path.with_name(self.path.name + ".json") if self.path else None
+
+        def _reset(self, vectors: "np.ndarray", ids: "np.ndarray") -> None:
+            """Replace the matrix with the given rows, tombstones included (id -1)."""
+            count = len(ids)
+            capacity = max(1024, count)
+            self._vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+            self._ids = np.full(capacity, -1, dtype=np.int64)
+            self._vectors[:count] = vectors
+            self._ids[:count] = ids
+            self._count = count
+            self._norms = np.zeros(capacity, dtype=np.float32)
+            self._norms[:count] = np.einsum("ij,ij->i", vectors, vectors)
+            self._positions = {
+                int(chunk_id): row for row, chunk_id in enumerate(ids) if chunk_id >= 0
+            }
+
+        @staticmethod
+        def _write_file(path: Path, array: "np.ndarray") -> "np.memmap":
+            """Replace a file with the array, and map it copy-on-write."""
+            # Write under a name of this process's own, so that processes mapping
+            # the file only ever see it complete
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            array.tofile(tmp_path)
+            os.replace(tmp_path, path)
+            return np.memmap(path, dtype=array.dtype, mode="c", shape=array.shape)
+
+        def _grow(self) -> None:
+            """Double the capacity of the matrix."""
+            old_capacity = len(self._ids)
+            capacity = old_capacity * 2
+            vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+            vectors[:old_capacity] = self._vectors
+            ids = np.full(capacity, -1, dtype=np.int64)
+            ids[:old_capacity] = self._ids
+            self._vectors = vectors
+            self._ids = ids
+            self._norms = np.resize(self._norms, capacity)
+
+        def _append(self, chunk_id: int, embedding: list[float]) -> None:
+            with self._lock:
+                self._tombstone(chunk_id)
+                if self._count == len(self._ids):
+                    self._grow()
+                row = self._count
+                vector = np.asarray(embedding, dtype=np.float32)
+                self._vectors[row] = vector
+                self._ids[row] = chunk_id
+                self._norms[row] = vector @ vector
+                self._positions[chunk_id] = row
+                self._count += 1
+
+        def _tombstone(self, chunk_id: int) -> None:
+            row = self._positions.pop(chunk_id, None)
+            if row is not None:
+                self._ids[row] = -1
+
+        def add(
+            self, db: sqlite3.Connection, chunk_id: int, embedding: list[float]
+        ) -> None:
+            super().add(db, chunk_id, embedding)
+            self._append(chunk_id, embedding)
+
+        def update(
+            self, db: sqlite3.Connection, chunk_id: int, embedding: list[float]
+        ) -> None:
+            super().update(db, chunk_id, embedding)
+            self._append(chunk_id, embedding)
+
+        def delete(self, db: sqlite3.Connection, chunk_id: int) -> None:
+            super().delete(db, chunk_id)
+            with self._lock:
+                self._tombstone(chunk_id)
+
+        def delete_many(self, db: sqlite3.Connection, chunk_ids: list[int]) -> None:
+            super().delete_many(db, chunk_ids)
+            with self._lock:
+                for chunk_id in chunk_ids:
+                    self._tombstone(chunk_id)
+
+        def clear(self, db: sqlite3.Connection) -> None:
+            super().clear(db)
+            with self._lock:
+                self._reset(
+                    np.empty((0, self.dim), dtype=np.float32), np.empty(0, np.int64)
+                )
+
+        def search(
+            self,
+            db: sqlite3.Connection,
+            embedding: list[float],
+            k: int,
+            collection: str | None = None,
+            filters: SearchFilter | None = None,
+        ) -> list[tuple[int, float]]:
+            return self.search_many(db, [embedding], k, collection, filters)[0]
+
+        def search_many(
+            self,
+            db: sqlite3.Connection,
+            embeddings: list[list[float]],
+            k: int,
+            collection: str | None = None,
+            filters: SearchFilter | None = None,
+        ) -> list[list[tuple[int, float]]]:
+            if collection is not None or filters is not None:
+                # The matrix spans all documents; scan the collection's partition,
+                # filtering on the metadata columns within the scan
+                return [
+                    SqliteVecIndex.search(self, db, embedding, k, collection, filters)
+                    for embedding in embeddings
+                ]
+
+            queries = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dim)
+            with self._lock:
+                n = self._count
+                ids = np.array(self._ids[:n])
+                # Squared L2 distances as |x|^2 - 2 x.q + |q|^2, for all queries at once
+                distances = (
+                    self._norms[None, :n]
+                    - 2 * (queries @ self._vectors[:n].T)
+                    + np.einsum("ij,ij->i", queries, queries)[:, None]
+                )
+            distances[:, ids < 0] = np.inf
+
+            k = min(k, len(self._positions))
+            if k <= 0:
+                return [[] for _ in embeddings]
+            nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            results = []
+            for row, candidates in zip(distances, nearest):
+                candidates = candidates[np.argsort(row[candidates])]
+                results.append(
+                    [
+                        (int(ids[i]), float(np.sqrt(max(row[i], 0.0))))
+                        for i in candidates
+                        if np.isfinite(row[i])
+                    ]
+                )
+            return results
+
+        def stats(self, db: sqlite3.Connection) -> VectorIndexStats:
+            return VectorIndexStats(
+                engine=self.name, dim=self.dim, count=len(self._positions)
+            )
+
+        def rebuild(self, db: sqlite3.Connection) -> None:
+            rows = db.execute(
+                "SELECT chunk_id, embedding FROM chunk_embeddings ORDER BY chunk_id"
+            ).fetchall()
+            vectors = np.array(
+                [np.frombuffer(blob, dtype=np.float32) for _, blob in rows],
+                dtype=np.float32,
+            ).reshape(-1, self.dim)
+            with self._lock:
+                self._reset(vectors, np.array([chunk_id for chunk_id, _ in rows]))
+                self._saved_generation = None
+
+        def _compact(self) -> int:
+            """Rewrite the matrix without tombstoned rows, returning how many."""
+            with self._lock:
+                live = np.flatnonzero(self._ids[: self._count] >= 0)
+                tombstones = self._count - len(live)
+                self._reset(np.array(self._vectors[live]), np.array(self._ids[live]))
+                self._saved_generation = None
+            return tombstones
+
+        def compact(self, db: sqlite3.Connection) -> int:
+            """Compact the embeddings table and rewrite the matrix without tombstones.
+
+            The freed slots include the tombstoned rows of the matrix, whose file
+            is rewritten when the index is next saved.
+            """
+            freed = super().compact(db)
+            freed += self._compact()
+            return freed
+
+        def load(self, db: sqlite3.Connection, generation: int) -> bool:
+            meta_path = self._meta_path
+            if self.path is None or meta_path is None:
+                return False
+            try:
+                meta = json.loads(meta_path.read_text())
+            except (OSError, ValueError):
+                return False
+            if meta.get("generation") != generation or meta.get("dim") != self.dim:
+                return False
+            assert self._vectors_path is not None and self._ids_path is not None
+            if not self._vectors_path.exists() or not self._ids_path.exists():
+                return False
+
+            count = meta["count"]
+            capacity = os.path.getsize(self._ids_path) // 8
+            vectors = np.memmap(
+                self._vectors_path,
+                dtype=np.float32,
+                mode="c",
+                shape=(capacity, self.dim),
+            )
+            ids = np.memmap(self._ids_path, dtype=np.int64, mode="c", shape=(capacity,))
+            positions = {
+                int(chunk_id): row
+                for row, chunk_id in enumerate(ids[:count])
+                if chunk_id >= 0
+            }
+            # Guard against files rewritten by another process since they were saved
+            stored = {
+                chunk_id
+                for (chunk_id,) in db.execute("SELECT chunk_id FROM chunk_embeddings")
+            }
+            if set(positions) != stored:
+                return False
+
+            with self._lock:
+                self._vectors = vectors
+                self._ids = ids
+                self._count = count
+                self._norms = np.zeros(capacity, dtype=np.float32)
+                self._norms[:count] = np.einsum(
+                    "ij,ij->i", vectors[:count], vectors[:count]
+                )
+                self._positions = positions
+                self._saved_generation = generation
+            return True
+
+        def save(self, generation: int) -> None:
+            meta_path = self._meta_path
+            if (
+                self.path is None
+                or meta_path is None
+                or self._saved_generation == generation
+            ):
+                return
+            if self._count - len(self._positions) > self.compact_threshold * max(
+                self._count, 1
+            ):
+                self._compact()
+            assert self._vectors_path is not None and self._ids_path is not None
+            with self._lock:
+                self._vectors = self._write_file(self._vectors_path, self._vectors)
+                self._ids = self._write_file(self._ids_path, self._ids)
+                meta_path.write_text(
+                    json.dumps(
+                        {
+                            "generation": generation,
+                            "dim": self.dim,
+                            "count": self._count,
+                        }
+                    )
+                )
+                self._saved_generation = generation
+
+except ImportError:
+    pass
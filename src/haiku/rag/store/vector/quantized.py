@@ -0,0 +1,177 @@
+import json
+import sqlite3
+from typing import Literal
+
+from haiku.rag.store.models.filter import SearchFilter
+from haiku.rag.store.vector.base import VectorIndexStats, serialize_embedding
+from haiku.rag.store.vector.sqlite_vec import (
+    CHUNK_COLLECTION,
+    SqliteVecIndex,
+    collection_filter,
+)
+
+Quantization = Literal["int8", "bit"]
+
+_COLUMN_TYPES = {"int8": "INT8", "bit": "BIT"}
+_QUANTIZERS = {
+    "int8": "vec_quantize_int8({}, 'unit')",
+    "bit": "vec_quantize_binary({})",
+}
+
+
+class QuantizedIndex(SqliteVecIndex):
+    """Two-stage sqlite-vec search over quantized embeddings.
+
+    Next to the full-precision chunk_embeddings table, a second vec0 table holds
+    the same embeddings quantized to int8 (4x smaller) or to one bit per dimension
+    (32x smaller). Searches scan only the quantized table, and its top
+    `rescore_factor * k` candidates are re-ranked by their exact distance.
+
+    Args:
+        dim: The dimension of the embeddings.
+        quantization: "int8" for scalar quantization of unit-normalized values,
+            or "bit" for binary quantization compared by Hamming distance.
+        rescore_factor: How many candidates per result to re-rank exactly.
+    """
+
+    table = "chunk_embeddings_quantized"
+
+    def __init__(self, dim: int, quantization: Quantization, rescore_factor: int = 8):
+        if quantization not in _QUANTIZERS:
+            raise ValueError(f"Unsupported vector quantization: {quantization}")
+        if quantization == "bit" and dim % 8:
+            raise ValueError("Binary quantization requires a multiple of 8 dimensions")
+        super().__init__(dim)
+        self.quantization = quantization
+        self.rescore_factor = max(1, rescore_factor)
+        self.name = f"sqlite-vec-{quantization}"
+
+    def _quantize(self, value: str) -> str:
+        """SQL expression quantizing the float vector expression `value`."""
+        return _QUANTIZERS[self.quantization].format(value)
+
+    def create(self, db: sqlite3.Connection) -> None:
+        super().create(db)
+        db.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING vec0(
+                chunk_id INTEGER PRIMARY KEY,
+                collection TEXT PARTITION KEY,
+                embedding {_COLUMN_TYPES[self.quantization]}[{self.dim}]
+            )
+        """)
+
+    def drop(self, db: sqlite3.Connection) -> None:
+        super().drop(db)
+        db.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def add(
+        self, db: sqlite3.Connection, chunk_id: int, embedding: list[float]
+    ) -> None:
+        super().add(db, chunk_id, embedding)
+        db.execute(
+            f"""
+            INSERT INTO {self.table} (chunk_id, collection, embedding)
+            VALUES (:chunk_id, {CHUNK_COLLECTION}, {self._quantize(":embedding")})
+            """,
+            {"chunk_id": chunk_id, "embedding": serialize_embedding(embedding)},
+        )
+
+    def update(
+        self, db: sqlite3.Connection, chunk_id: int, embedding: list[float]
+    ) -> None:
+        super().update(db, chunk_id, embedding)
+        # vec0 reads updated values as float32, so the row is replaced instead
+        db.execute(
+            f"DELETE FROM {self.table} WHERE chunk_id = :chunk_id",
+            {"chunk_id": chunk_id},
+        )
+        db.execute(
+            f"""
+            INSERT INTO {self.table} (chunk_id, collection, embedding)
+            VALUES (:chunk_id, {CHUNK_COLLECTION}, {self._quantize(":embedding")})
+            """,
+            {"chunk_id": chunk_id, "embedding": serialize_embedding(embedding)},
+        )
+
+    def delete(self, db: sqlite3.Connection, chunk_id: int) -> None:
+        super().delete(db, chunk_id)
+        db.execute(
+            f"DELETE FROM {self.table} WHERE chunk_id = :chunk_id",
+            {"chunk_id": chunk_id},
+        )
+
+    def compact(self, db: sqlite3.Connection) -> int:
+        freed = super().compact(db)
+        db.execute(f"DROP TABLE IF EXISTS {self.table}")
+        self.create(db)
+        self.rebuild(db)
+        return freed
+
+    def delete_many(self, db: sqlite3.Connection, chunk_ids: list[int]) -> None:
+        super().delete_many(db, chunk_ids)
+        db.execute(
+            f"""
+            DELETE FROM {self.table}
+            WHERE chunk_id IN (SELECT value FROM json_each(:chunk_ids))
+            """,
+            {"chunk_ids": json.dumps(chunk_ids)},
+        )
+
+    def clear(self, db: sqlite3.Connection) -> None:
+        super().clear(db)
+        db.execute(f"DELETE FROM {self.table}")
+
+    def search(
+        self,
+        db: sqlite3.Connection,
+        embedding: list[float],
+        k: int,
+        collection: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> list[tuple[int, float]]:
+        if filters is not None:
+            # Only chunk_embeddings has the metadata columns to filter on
+            return super().search(db, embedding, k, collection, filters)
+
+        cursor = db.execute(
+            f"""
+            WITH candidates AS (
+                SELECT chunk_id
+                FROM {self.table}
+                WHERE embedding MATCH {self._quantize(":embedding")} AND k = :depth
+                {collection_filter(collection)}
+            )
+            SELECT e.chunk_id, vec_distance_l2(e.embedding, :embedding) AS distance
+            FROM candidates c
+            JOIN chunk_embeddings e ON e.chunk_id = c.chunk_id
+            ORDER BY distance
+            LIMIT :k
+            """,
+            {
+                "embedding": serialize_embedding(embedding),
+                "depth": k * self.rescore_factor,
+                "k": k,
+                "collection": collection,
+            },
+        )
+        return cursor.fetchall()
+
+    def stats(self, db: sqlite3.Connection) -> VectorIndexStats:
+        (count,) = db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        return VectorIndexStats(engine=self.name, dim=self.dim, count=count)
+
+    def rebuild(self, db: sqlite3.Connection) -> None:
+        """Re-quantize all full-precision embeddings."""
+        db.execute(f"DELETE FROM {self.table}")
+        db.execute(f"""
+            INSERT INTO {self.table} (chunk_id, collection, embedding)
+            SELECT chunk_id, collection, {self._quantize("embedding")}
+            FROM chunk_embeddings
+        """)
+
+    def load(self, db: sqlite3.Connection, generation: int) -> bool:
+        # Databases created without quantization have no quantized table yet
+        self.create(db)
+        (quantized,) = db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        (full,) = db.execute("SELECT COUNT(*) FROM chunk_embeddings").fetchone()
+        return quantized == full
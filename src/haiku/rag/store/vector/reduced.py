@@ -0,0 +1,318 @@
+import json
+import sqlite3
+from typing import Literal
+
+from haiku.rag.store.models.filter import SearchFilter
+from haiku.rag.store.vector.base import VectorIndexStats, serialize_embedding
+from haiku.rag.store.vector.sqlite_vec import (
+    CHUNK_COLLECTION,
+    SqliteVecIndex,
+    collection_filter,
+)
+
+Reduction = Literal["truncate", "pca"]
+
+
+class ReducedIndex(SqliteVecIndex):
+    """Two-stage sqlite-vec search over reduced-dimension embeddings.
+
+    Next to the full-precision chunk_embeddings table, a second vec0 table holds
+    the embeddings projected to fewer dimensions, so that the candidate scan
+    reads a fraction of the data. Its top `rescore_factor * k` candidates are
+    re-ranked by their exact distance on the full embeddings.
+
+    The projection either keeps the leading dimensions, which suits embedding
+    models trained to be truncated (Matryoshka embeddings), or projects onto the
+    principal components of the stored embeddings. Principal components are
+    learned by `train` and stored in the database; until they are, searches scan
+    the full embeddings.
+
+    Args:
+        dim: The dimension of the embeddings.
+        reduced_dim: The dimension of the projected embeddings.
+        reduction: "truncate" or "pca".
+        rescore_factor: How many candidates per result to re-rank exactly.
+    """
+
+    table = "chunk_embeddings_reduced"
+    projection_table = "chunk_embeddings_projection"
+
+    def __init__(
+        self,
+        dim: int,
+        reduced_dim: int,
+        reduction: Reduction = "truncate",
+        rescore_factor: int = 8,
+    ):
+        if reduction not in ("truncate", "pca"):
+            raise ValueError(f"Unsupported vector reduction: {reduction}")
+        if not 0 < reduced_dim < dim:
+            raise ValueError(
+                f"Reduced dimension must be between 1 and {dim - 1}, got {reduced_dim}"
+            )
+        super().__init__(dim)
+        self.reduced_dim = reduced_dim
+        self.reduction = reduction
+        self.rescore_factor = max(1, rescore_factor)
+        self.name = f"sqlite-vec-{reduction}{reduced_dim}"
+        # Mean and principal components (reduced_dim x dim) of a PCA projection
+        self._projection = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether embeddings can be projected, i.e. the reduced table is in use."""
+        return self.reduction == "truncate" or self._projection is not None
+
+    def _project(self, embedding: list[float]) -> list[float]:
+        if self.reduction == "truncate":
+            return embedding[: self.reduced_dim]
+
+        import numpy as np
+
+        mean, components = self._projection  # type: ignore[misc]
+        return (components @ (np.asarray(embedding, dtype=np.float32) - mean)).tolist()
+
+    def create(self, db: sqlite3.Connection) -> None:
+        super().create(db)
+        db.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING vec0(
+                chunk_id INTEGER PRIMARY KEY,
+                collection TEXT PARTITION KEY,
+                embedding FLOAT[{self.reduced_dim}]
+            )
+        """)
+        if self.reduction == "pca":
+            db.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.projection_table} (
+                    id INTEGER PRIMARY KEY DEFAULT 1,
+                    dim INTEGER NOT NULL,
+                    reduced_dim INTEGER NOT NULL,
+                    mean BLOB NOT NULL,
+                    components BLOB NOT NULL
+                )
+            """)
+
+    def drop(self, db: sqlite3.Connection) -> None:
+        super().drop(db)
+        db.execute(f"DROP TABLE IF EXISTS {self.table}")
+        db.execute(f"DROP TABLE IF EXISTS {self.projection_table}")
+        self._projection = None
+
+    def _add_reduced(
+        self, db: sqlite3.Connection, chunk_id: int, embedding: list[float]
+    ) -> None:
+        if self.ready:
+            db.execute(
+                f"""
+                INSERT INTO {self.table} (chunk_id, collection, embedding)
+                VALUES (:chunk_id, {CHUNK_COLLECTION}, :embedding)
+                """,
+                {
+                    "chunk_id": chunk_id,
+                    "embedding": serialize_embedding(self._project(embedding)),
+                },
+            )
+
+    def add(
+        self, db: sqlite3.Connection, chunk_id: int, embedding: list[float]
+    ) -> None:
+        super().add(db, chunk_id, embedding)
+        self._add_reduced(db, chunk_id, embedding)
+
+    def update(
+        self, db: sqlite3.Connection, chunk_id: int, embedding: list[float]
+    ) -> None:
+        super().update(db, chunk_id, embedding)
+        db.execute(
+            f"DELETE FROM {self.table} WHERE chunk_id = :chunk_id",
+            {"chunk_id": chunk_id},
+        )
+        self._add_reduced(db, chunk_id, embedding)
+
+    def delete(self, db: sqlite3.Connection, chunk_id: int) -> None:
+        super().delete(db, chunk_id)
+        db.execute(
+            f"DELETE FROM {self.table} WHERE chunk_id = :chunk_id",
+            {"chunk_id": chunk_id},
+        )
+
+    def compact(self, db: sqlite3.Connection) -> int:
+        freed = super().compact(db)
+        db.execute(f"DROP TABLE IF EXISTS {self.table}")
+        self.create(db)
+        self.rebuild(db)
+        return freed
+
+    def delete_many(self, db: sqlite3.Connection, chunk_ids: list[int]) -> None:
+        super().delete_many(db, chunk_ids)
+        db.execute(
+            f"""
+            DELETE FROM {self.table}
+            WHERE chunk_id IN (SELECT value FROM json_each(:chunk_ids))
+            """,
+            {"chunk_ids": json.dumps(chunk_ids)},
+        )
+
+    def clear(self, db: sqlite3.Connection) -> None:
+        super().clear(db)
+        db.execute(f"DELETE FROM {self.table}")
+
+    def search(
+        self,
+        db: sqlite3.Connection,
+        embedding: list[float],
+        k: int,
+        collection: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> list[tuple[int, float]]:
+        # Only chunk_embeddings has the metadata columns to filter on
+        if not self.ready or filters is not None:
+            return super().search(db, embedding, k, collection, filters)
+
+        cursor = db.execute(
+            f"""
+            WITH candidates AS (
+                SELECT chunk_id
+                FROM {self.table}
+                WHERE embedding MATCH :reduced AND k = :depth
+                {collection_filter(collection)}
+            )
+            SELECT e.chunk_id, vec_distance_l2(e.embedding, :embedding) AS distance
+            FROM candidates c
+            JOIN chunk_embeddings e ON e.chunk_id = c.chunk_id
+            ORDER BY distance
+            LIMIT :k
+            """,
+            {
+                "reduced": serialize_embedding(self._project(embedding)),
+                "embedding": serialize_embedding(embedding),
+                "depth": k * self.rescore_factor,
+                "k": k,
+                "collection": collection,
+            },
+        )
+        return cursor.fetchall()
+
+    def stats(self, db: sqlite3.Connection) -> VectorIndexStats:
+        (count,) = db.execute("SELECT COUNT(*) FROM chunk_embeddings").fetchone()
+        return VectorIndexStats(engine=self.name, dim=self.dim, count=count)
+
+    def train(self, db: sqlite3.Connection) -> None:
+        """Learn the principal components of the stored embeddings and re-project."""
+        if self.reduction == "pca":
+            self.create(db)
+            self._fit(db)
+        self.rebuild(db)
+
+    def _fit(self, db: sqlite3.Connection) -> None:
+        """Learn the principal components from the covariance of the embeddings.
+
+        Embeddings are streamed in batches into their sum and a dim x dim scatter
+        matrix, so memory does not grow with the number of embeddings.
+        """
+        import numpy as np
+
+        count = 0
+        total = np.zeros(self.dim, dtype=np.float64)
+        scatter = np.zeros((self.dim, self.dim), dtype=np.float64)
+        cursor = db.execute("SELECT embedding FROM chunk_embeddings")
+        while rows := cursor.fetchmany(4096):
+            matrix = np.frombuffer(
+                b"".join(blob for (blob,) in rows), dtype=np.float32
+            ).reshape(-1, self.dim)
+            count += len(matrix)
+            total += matrix.sum(axis=0, dtype=np.float64)
+            scatter += matrix.T.astype(np.float64) @ matrix
+        if count < self.reduced_dim:
+            # Too few embeddings to learn a projection from
+            return
+
+        mean = total / count
+        covariance = scatter / count - np.outer(mean, mean)
+        # eigh returns eigenvalues in ascending order; keep the largest
+        _, vectors = np.linalg.eigh(covariance)
+        components = np.ascontiguousarray(
+            vectors[:, ::-1][:, : self.reduced_dim].T, dtype=np.float32
+        )
+        mean = mean.astype(np.float32)
+        db.execute(
+            f"""
+            INSERT OR REPLACE INTO {self.projection_table}
+                (id, dim, reduced_dim, mean, components)
+            VALUES (1, ?, ?, ?, ?)
+            """,
+            (self.dim, self.reduced_dim, mean.tobytes(), components.tobytes()),
+        )
+        self._projection = (mean, components)
+
+    def _load_projection(self, db: sqlite3.Connection) -> None:
+        import numpy as np
+
+        row = db.execute(
+            f"""
+            SELECT mean, components FROM {self.projection_table}
+            WHERE id = 1 AND dim = ? AND reduced_dim = ?
+            """,
+            (self.dim, self.reduced_dim),
+        ).fetchone()
+        if row is None:
+            self._projection = None
+            return
+        mean = np.frombuffer(row[0], dtype=np.float32)
+        components = np.frombuffer(row[1], dtype=np.float32).reshape(
+            self.reduced_dim, self.dim
+        )
+        self._projection = (mean, components)
+
+    def rebuild(self, db: sqlite3.Connection) -> None:
+        """Re-project all full-precision embeddings."""
+        self.create(db)
+        if self.reduction == "pca":
+            self._load_projection(db)
+            if self._projection is None:
+                self._fit(db)
+
+        db.execute(f"DELETE FROM {self.table}")
+        if self.reduction == "truncate":
+            db.execute(
+                f"""
+                INSERT INTO {self.table} (chunk_id, collection, embedding)
+                SELECT chunk_id, collection, vec_slice(embedding, 0, ?)
+                FROM chunk_embeddings
+                """,
+                (self.reduced_dim,),
+            )
+        elif self._projection is not None:
+            import numpy as np
+
+            mean, components = self._projection
+            cursor = db.execute(
+                "SELECT chunk_id, collection, embedding FROM chunk_embeddings"
+            )
+            while rows := cursor.fetchmany(4096):
+                matrix = np.frombuffer(
+                    b"".join(blob for _, _, blob in rows), dtype=np.float32
+                ).reshape(-1, self.dim)
+                projected = ((matrix - mean) @ components.T).astype(np.float32)
+                db.executemany(
+                    f"""
+                    INSERT INTO {self.table} (chunk_id, collection, embedding)
+                    VALUES (?, ?, ?)
+                    """,
+                    [
+                        (chunk_id, collection, vector.tobytes())
+                        for (chunk_id, collection, _), vector in zip(rows, projected)
+                    ],
+                )
+
+    def load(self, db: sqlite3.Connection, generation: int) -> bool:
+        # Databases created without reduction have no reduced table yet
+        self.create(db)
+        if self.reduction == "pca":
+            self._load_projection(db)
+        (reduced,) = db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        (full,) = db.execute("SELECT COUNT(*) FROM chunk_embeddings").fetchone()
+        if not self.ready:
+            # Learn a projection once there are enough embeddings to do so
+            return full < self.reduced_dim
+        return reduced == full
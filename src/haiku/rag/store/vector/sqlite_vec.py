@@ -0,0 +1,207 @@
+import json
+import sqlite3
+import struct
+
+from haiku.rag.store.models.filter import SearchFilter
+from haiku.rag.store.vector.base import (
+    VectorIndex,
+    VectorIndexStats,
+    serialize_embedding,
+)
+
+# Collection of the document a chunk belongs to, for vec0 partition keys
+CHUNK_COLLECTION = """
+    COALESCE(
+        (
+            SELECT d.collection
+            FROM chunks c
+            JOIN documents d ON d.id = c.document_id
+            WHERE c.id = :chunk_id
+        ),
+        'default'
+    )
+"""
+
+
+CHUNK_EMBEDDING_COLUMNS = (
+    "chunk_id, collection, embedding, content_type, uri, created_at"
+)
+
+
+def collection_filter(collection: str | None) -> str:
+    """KNN constraint restricting a vec0 scan to the `:collection` partition."""
+    return "" if collection is None else "AND collection = :collection"
+
+
+def metadata_filter(filters: SearchFilter | None) -> str:
+    """KNN constraints on the metadata columns of chunk_embeddings.
+
+    The constraints use the parameters returned by `filters.params()`.
+    """
+    if filters is None:
+        return ""
+    return "".join(f" AND {condition}" for condition in filters.conditions())
+
+
+class SqliteVecIndex(VectorIndex):
+    """Exact nearest-neighbour search over a sqlite-vec vec0 table.
+
+    Embeddings are partitioned by the collection of their document, so that a
+    search within a collection only scans that collection's embeddings. The
+    content type, URI and creation time of the document are stored as metadata
+    columns, which sqlite-vec checks during the scan, so that filtered searches
+    return the k nearest matching chunks.
+    """
+
+    name = "sqlite-vec"
+
+    def create(self, db: sqlite3.Connection) -> None:
+        db.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunk_embeddings USING vec0(
+                chunk_id INTEGER PRIMARY KEY,
+                collection TEXT PARTITION KEY,
+                embedding FLOAT[{self.dim}],
+                content_type TEXT,
+                uri TEXT,
+                created_at TEXT
+            )
+        """)
+
+    def drop(self, db: sqlite3.Connection) -> None:
+        db.execute("DROP TABLE IF EXISTS chunk_embeddings")
+
+    def add(
+        self, db: sqlite3.Connection, chunk_id: int, embedding: list[float]
+    ) -> None:
+        # vec0 metadata columns cannot be NULL, so missing values are stored as ''
+        db.execute(
+            """
+            INSERT INTO chunk_embeddings
+                (chunk_id, collection, embedding, content_type, uri, created_at)
+            SELECT
+                :chunk_id,
+                COALESCE(d.collection, 'default'),
+                :embedding,
+                COALESCE(CAST(JSON_EXTRACT(d.metadata, '$.contentType') AS TEXT), ''),
+                COALESCE(d.uri, ''),
+                COALESCE(CAST(d.created_at AS TEXT), '')
+            FROM (SELECT :chunk_id AS id) AS new
+            LEFT JOIN chunks c ON c.id = new.id
+            LEFT JOIN documents d ON d.id = c.document_id
+            """,
+            {"chunk_id": chunk_id, "embedding": serialize_embedding(embedding)},
+        )
+
+    def update(
+        self, db: sqlite3.Connection, chunk_id: int, embedding: list[float]
+    ) -> None:
+        # The chunk may have moved to another document or collection, and vec0
+        # cannot update partition keys, so the row is replaced
+        SqliteVecIndex.delete(self, db, chunk_id)
+        SqliteVecIndex.add(self, db, chunk_id, embedding)
+
+    def delete(self, db: sqlite3.Connection, chunk_id: int) -> None:
+        db.execute(
+            "DELETE FROM chunk_embeddings WHERE chunk_id = :chunk_id",
+            {"chunk_id": chunk_id},
+        )
+
+    def delete_many(self, db: sqlite3.Connection, chunk_ids: list[int]) -> None:
+        db.execute(
+            """
+            DELETE FROM chunk_embeddings
+            WHERE chunk_id IN (SELECT value FROM json_each(:chunk_ids))
+            """,
+            {"chunk_ids": json.dumps(chunk_ids)},
+        )
+
+    def clear(self, db: sqlite3.Connection) -> None:
+        db.execute("DELETE FROM chunk_embeddings")
+
+    def search(
+        self,
+        db: sqlite3.Connection,
+        embedding: list[float],
+        k: int,
+        collection: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> list[tuple[int, float]]:
+        cursor = db.execute(
+            f"""
+            SELECT chunk_id, distance
+            FROM chunk_embeddings
+            WHERE embedding MATCH :embedding AND k = :k
+            {collection_filter(collection)}
+            {metadata_filter(filters)}
+            ORDER BY distance
+            """,
+            {
+                "embedding": serialize_embedding(embedding),
+                "k": k,
+                "collection": collection,
+                **(filters.params() if filters else {}),
+            },
+        )
+        return cursor.fetchall()
+
+    def stats(self, db: sqlite3.Connection) -> VectorIndexStats:
+        (count,) = db.execute("SELECT COUNT(*) FROM chunk_embeddings").fetchone()
+        return VectorIndexStats(engine=self.name, dim=self.dim, count=count)
+
+    def compact(self, db: sqlite3.Connection) -> int:
+        """Copy the embeddings into a new table.
+
+        vec0 stores embeddings in fixed-size chunks and does not reuse the slots
+        of deleted rows, which scans still read; a fresh table packs the rows.
+        The table is recreated from its stored schema, within a savepoint, so
+        that a failure leaves the embeddings as they were.
+        """
+
+        def capacity() -> int:
+            (slots,) = db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM chunk_embeddings_chunks"
+            ).fetchone()
+            return slots
+
+        before = capacity()
+        (schema,) = db.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'chunk_embeddings'"
+        ).fetchone()
+        db.execute("SAVEPOINT compact_embeddings")
+        try:
+            db.execute(f"""
+                CREATE TEMP TABLE chunk_embeddings_copy AS
+                SELECT {CHUNK_EMBEDDING_COLUMNS} FROM chunk_embeddings
+            """)
+            SqliteVecIndex.drop(self, db)
+            db.execute(schema)
+            db.execute(f"""
+                INSERT INTO chunk_embeddings ({CHUNK_EMBEDDING_COLUMNS})
+                SELECT {CHUNK_EMBEDDING_COLUMNS} FROM chunk_embeddings_copy
+            """)
+            db.execute("DROP TABLE chunk_embeddings_copy")
+        except BaseException:
+            db.execute("ROLLBACK TO compact_embeddings")
+            db.execute("RELEASE compact_embeddings")
+            raise
+        db.execute("RELEASE compact_embeddings")
+        return before - capacity()
+
+    def exact_search(
+        self,
+        db: sqlite3.Connection,
+        embedding: list[float],
+        k: int,
+        collection: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> list[tuple[int, float]]:
+        return SqliteVecIndex.search(self, db, embedding, k, collection, filters)
+
+    def sample_embeddings(self, db: sqlite3.Connection, n: int) -> list[list[float]]:
+        return [
+            list(struct.unpack(f"{self.dim}f", blob))
+            for (blob,) in db.execute(
+                "SELECT embedding FROM chunk_embeddings ORDER BY random() LIMIT ?",
+                (n,),
+            )
+        ]
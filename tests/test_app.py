@@ -1,11 +1,14 @@
 import asyncio
+import json
+from datetime import datetime
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from haiku.rag.app import HaikuRAGApp
-from haiku.rag.store.models.document import Document
+from haiku.rag.store.models.chunk import Chunk
+from haiku.rag.store.models.document import Document, DocumentHeader
 
 
 @pytest.fixture
@@ -17,26 +20,31 @@ def app():
 async def test_list_documents(app: HaikuRAGApp, monkeypatch):
     """Test listing documents."""
     mock_docs = [
-        Document(id=1, content="doc 1"),
-        Document(id=2, content="doc 2"),
+        DocumentHeader(id=1, created_at=datetime.now(), updated_at=datetime.now()),
+        DocumentHeader(id=2, created_at=datetime.now(), updated_at=datetime.now()),
     ]
+
+    async def iter_document_headers(collection=None):
+        for doc in mock_docs:
+            yield doc
+
     mock_client = AsyncMock()
-    mock_client.list_documents.return_value = mock_docs
+    mock_client.iter_document_headers = MagicMock(side_effect=iter_document_headers)
     # The async context manager should return the mock client itself
     mock_client.__aenter__.return_value = mock_client
 
     mock_rich_print = MagicMock()
     mock_console_print = MagicMock()
-    monkeypatch.setattr(app, "_rich_print_document", mock_rich_print)
+    monkeypatch.setattr(app, "_rich_print_document_header", mock_rich_print)
     monkeypatch.setattr(app.console, "print", mock_console_print)
 
     with patch("haiku.rag.app.HaikuRAG", return_value=mock_client):
         await app.list_documents()
 
-    mock_client.list_documents.assert_called_once()
+    mock_client.iter_document_headers.assert_called_once()
     assert mock_rich_print.call_count == len(mock_docs)
-    mock_rich_print.assert_any_call(mock_docs[0], truncate=True)
-    mock_rich_print.assert_any_call(mock_docs[1], truncate=True)
+    mock_rich_print.assert_any_call(mock_docs[0])
+    mock_rich_print.assert_any_call(mock_docs[1])
 
 
 @pytest.mark.asyncio
@@ -55,7 +63,9 @@ async def test_add_document_from_text(app: HaikuRAGApp, monkeypatch):
     with patch("haiku.rag.app.HaikuRAG", return_value=mock_client):
         await app.add_document_from_text("test document")
 
-    mock_client.create_document.assert_called_once_with("test document")
+    mock_client.create_document.assert_called_once_with(
+        "test document", collection="default"
+    )
     mock_rich_print.assert_called_once_with(mock_doc, truncate=True)
     mock_print.assert_called_once_with(
         "[b]Document with id [cyan]1[/cyan] added successfully.[/b]"
@@ -79,7 +89,9 @@ async def test_add_document_from_source(app: HaikuRAGApp, monkeypatch):
     with patch("haiku.rag.app.HaikuRAG", return_value=mock_client):
         await app.add_document_from_source(file_path)
 
-    mock_client.create_document_from_source.assert_called_once_with(file_path)
+    mock_client.create_document_from_source.assert_called_once_with(
+        file_path, collection="default"
+    )
     mock_rich_print.assert_called_once_with(mock_doc, truncate=True)
     mock_print.assert_called_once_with(
         "[b]Document with id [cyan]1[/cyan] added successfully.[/b]"
@@ -151,7 +163,15 @@ async def test_search(app: HaikuRAGApp, monkeypatch):
     with patch("haiku.rag.app.HaikuRAG", return_value=mock_client):
         await app.search("query")
 
-    mock_client.search.assert_called_once_with("query", limit=5, k=60)
+    mock_client.search.assert_called_once_with(
+        "query",
+        limit=5,
+        k=60,
+        mode="hybrid",
+        collection=None,
+        k_vector=None,
+        k_fts=None,
+    )
     assert mock_rich_print_search.call_count == len(mock_results)
 
 
@@ -168,10 +188,60 @@ async def test_search_no_results(app: HaikuRAGApp, monkeypatch):
     with patch("haiku.rag.app.HaikuRAG", return_value=mock_client):
         await app.search("query")
 
-    mock_client.search.assert_called_once_with("query", limit=5, k=60)
+    mock_client.search.assert_called_once_with(
+        "query",
+        limit=5,
+        k=60,
+        mode="hybrid",
+        collection=None,
+        k_vector=None,
+        k_fts=None,
+    )
     mock_print.assert_called_once_with("[red]No results found.[/red]")
 
 
+@pytest.mark.asyncio
+async def test_search_batch(app: HaikuRAGApp, tmp_path, capsys):
+    """Test batch search writes one NDJSON record per query."""
+    queries_file = tmp_path / "queries.jsonl"
+    queries_file.write_text('{"id": "q1", "query": "first"}\n\n"second"\n')
+
+    chunk = Chunk(id=1, document_id=2, content="content", document_uri="doc.txt")
+    mock_client = AsyncMock()
+    mock_client.search_many.return_value = [[(chunk, 0.5)], []]
+    mock_client.__aenter__.return_value = mock_client
+
+    with patch("haiku.rag.app.HaikuRAG", return_value=mock_client):
+        await app.search_batch(queries_file, limit=3)
+
+    mock_client.search_many.assert_called_once_with(
+        ["first", "second"],
+        limit=3,
+        k=60,
+        mode="hybrid",
+        collection=None,
+        k_vector=None,
+        k_fts=None,
+    )
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert lines == [
+        {
+            "query": "first",
+            "id": "q1",
+            "results": [
+                {
+                    "chunk_id": 1,
+                    "document_id": 2,
+                    "document_uri": "doc.txt",
+                    "content": "content",
+                    "score": 0.5,
+                }
+            ],
+        },
+        {"query": "second", "results": []},
+    ]
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize("transport", ["stdio", "sse", "http", None])
 async def test_serve(app: HaikuRAGApp, monkeypatch, transport):
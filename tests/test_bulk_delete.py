@@ -0,0 +1,85 @@
+import pytest
+
+from haiku.rag.client import HaikuRAG
+from haiku.rag.config import Config
+from haiku.rag.store.engine import Store
+
+
+def counts(store: Store) -> dict[str, int]:
+    assert store._connection is not None
+    return {
+        table: store._connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ("documents", "chunks", "chunk_embeddings")
+    }
+
+
+def check_fts_integrity(store: Store) -> None:
+    assert store._connection is not None
+    # Fails if the index does not match the content of the chunks table
+    store._connection.execute(
+        "INSERT INTO chunks_fts (chunks_fts, rank) VALUES ('integrity-check', 1)"
+    )
+
+
+@pytest.mark.parametrize("quantization", ["none", "int8"])
+@pytest.mark.asyncio
+async def test_delete_documents(monkeypatch, quantization):
+    """Test deleting documents by URI prefix, URIs and IDs."""
+    monkeypatch.setattr(Config, "VECTOR_QUANTIZATION", quantization)
+    monkeypatch.setattr(Config, "VECTOR_DOCUMENT_CANDIDATES", 2)
+    async with HaikuRAG(":memory:") as client:
+        archived = [
+            await client.create_document(
+                f"Archived report number {i} about tides.",
+                uri=f"file:///data/archive/report{i}.txt",
+            )
+            for i in range(5)
+        ]
+        kept = await client.create_document(
+            "Current report about tides.", uri="file:///data/current/report.txt"
+        )
+        other = await client.create_document("Notes about the archive.")
+        before = counts(client.store)
+
+        assert await client.delete_documents(uri_prefix="file:///data/archive/") == 5
+        after = counts(client.store)
+        assert after["documents"] == before["documents"] - 5
+        assert after["chunks"] == after["chunk_embeddings"] == 2
+        check_fts_integrity(client.store)
+
+        for mode in ("vector", "fts", "hybrid"):
+            results = await client.search("report about tides", limit=10, mode=mode)
+            assert {chunk.document_id for chunk, _ in results} <= {kept.id, other.id}
+        assert client.store.document_centroids is not None
+        assert client.store._connection is not None
+        assert client.store.document_centroids.is_current(client.store._connection)
+
+        assert await client.delete_documents(uris=[kept.uri or ""]) == 1
+        assert other.id is not None
+        assert await client.delete_documents(ids=[other.id, archived[0].id or 0]) == 1
+        assert counts(client.store) == {
+            "documents": 0,
+            "chunks": 0,
+            "chunk_embeddings": 0,
+        }
+        check_fts_integrity(client.store)
+
+        with pytest.raises(ValueError):
+            await client.delete_documents()
+        with pytest.raises(ValueError):
+            await client.delete_documents(ids=[1], uri_prefix="file:///")
+
+
+@pytest.mark.asyncio
+async def test_deleting_documents_cascades_to_chunks():
+    """Test that foreign keys are enforced and chunks leave the FTS index."""
+    async with HaikuRAG(":memory:") as client:
+        document = await client.create_document("A document about cascades.")
+        assert client.store._connection is not None
+        client.store._connection.execute(
+            "DELETE FROM documents WHERE id = ?", (document.id,)
+        )
+
+        assert counts(client.store)["chunks"] == 0
+        check_fts_integrity(client.store)
+        assert await client.search("cascades", mode="fts") == []
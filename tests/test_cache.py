@@ -0,0 +1,94 @@
+import pytest
+
+from haiku.rag.cache import LRUCache
+from haiku.rag.embeddings.base import EmbedderBase
+from haiku.rag.embeddings.cache import (
+    embed_queries,
+    embed_query,
+    query_embedding_cache,
+)
+
+
+def test_lru_cache_eviction_and_stats():
+    cache: LRUCache[int] = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" becomes most recently used
+    cache.set("c", 3)  # evicts "b"
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+    stats = cache.stats()
+    assert stats.hits == 2
+    assert stats.misses == 1
+    assert stats.size == 2
+    assert stats.hit_rate == pytest.approx(2 / 3)
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats().hits == 0
+
+
+def test_lru_cache_disabled():
+    cache: LRUCache[int] = LRUCache(maxsize=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_embed_query_cache():
+    class MockEmbedder(EmbedderBase):
+        calls = 0
+
+        async def embed(self, text: str) -> list[float]:
+            self.calls += 1
+            return [float(len(text))]
+
+    embedder = MockEmbedder("mock-model", 1)
+    query_embedding_cache.clear()
+
+    first = await embed_query(embedder, "what is  haiku.rag?")
+    # Whitespace differences normalize to the same cache entry
+    second = await embed_query(embedder, " what is haiku.rag? ")
+    assert first == second
+    assert embedder.calls == 1
+
+    await embed_query(embedder, "something else")
+    assert embedder.calls == 2
+
+    # A different model never shares cached embeddings
+    other = MockEmbedder("other-model", 1)
+    await embed_query(other, "what is haiku.rag?")
+    assert other.calls == 1
+
+    stats = query_embedding_cache.stats()
+    assert stats.hits == 1
+    assert stats.misses == 3
+    query_embedding_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_embed_queries_batches_misses():
+    class MockEmbedder(EmbedderBase):
+        batches: list[list[str]] = []
+
+        async def embed(self, text: str) -> list[float]:
+            return [float(len(text))]
+
+        async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+            self.batches.append(texts)
+            return [[float(len(text))] for text in texts]
+
+    embedder = MockEmbedder("mock-model", 1)
+    query_embedding_cache.clear()
+    await embed_query(embedder, "cached")
+
+    queries = ["cached", "one", "two", "one", "three"]
+    embeddings = await embed_queries(embedder, queries, batch_size=2)
+    assert embeddings == [[float(len(query))] for query in queries]
+    # Cached and duplicate queries are not sent to the provider again
+    assert embedder.batches == [["one", "two"], ["three"]]
+    query_embedding_cache.clear()
@@ -0,0 +1,92 @@
+import pytest
+
+from haiku.rag.client import HaikuRAG
+from haiku.rag.config import Config
+from haiku.rag.store.engine import Store
+
+
+def check_fts_integrity(store: Store) -> None:
+    assert store._connection is not None
+    # Fails if the index does not match the text of the chunks
+    store._connection.execute(
+        "INSERT INTO chunks_fts (chunks_fts, rank) VALUES ('integrity-check', 1)"
+    )
+    store._connection.commit()
+
+
+@pytest.mark.asyncio
+async def test_chunks_stored_as_offsets(monkeypatch):
+    """Test that chunks stored as offsets read, search and delete like others."""
+    monkeypatch.setattr(Config, "CHUNK_STORAGE", "offsets")
+    async with HaikuRAG(":memory:") as client:
+        db = client.store._connection
+        assert db is not None
+        content = " ".join(
+            f"Paragraph {i} describes lighthouse keepers." for i in range(200)
+        )
+        document = await client.create_document(content)
+        assert document.id is not None
+
+        chunks = await client.chunk_repository.get_by_document_id(document.id)
+        assert len(chunks) > 1
+        assert all(chunk.content in content for chunk in chunks)
+        assert chunks[0].content.startswith("Paragraph 0 ")
+        (stored,) = db.execute("SELECT SUM(LENGTH(content)) FROM chunks").fetchone()
+        assert stored == 0
+        check_fts_integrity(client.store)
+
+        results = await client.search("lighthouse keepers", mode="fts")
+        assert results and all(chunk.content in content for chunk, _ in results)
+
+        # Updating the document re-chunks it from the new content
+        document.content = "A single note about harbour masters."
+        await client.update_document(document)
+        check_fts_integrity(client.store)
+        assert await client.search("lighthouse", mode="fts") == []
+        results = await client.search("harbour masters", mode="fts")
+        assert [chunk.content for chunk, _ in results] == [document.content]
+
+        # A chunk given its own content no longer refers to the document
+        (chunk,) = await client.chunk_repository.get_by_document_id(document.id)
+        chunk.content = "A rewritten chunk about tides."
+        await client.chunk_repository.update(chunk)
+        check_fts_integrity(client.store)
+        assert chunk.id is not None
+        updated = await client.chunk_repository.get_by_id(chunk.id)
+        assert updated is not None and updated.content == chunk.content
+
+        await client.delete_document(document.id)
+        check_fts_integrity(client.store)
+        assert db.execute("SELECT COUNT(*) FROM chunks").fetchone() == (0,)
+
+
+@pytest.mark.asyncio
+async def test_rebuild_converts_chunk_storage(monkeypatch, tmp_path):
+    """Test that rebuilding the database stores existing chunks as offsets."""
+    db_path = tmp_path / "test.sqlite"
+    async with HaikuRAG(db_path) as client:
+        document = await client.create_document("A document about tides. " * 100)
+        before = [chunk.content for chunk in await client.chunk_repository.list_all()]
+
+    monkeypatch.setattr(Config, "CHUNK_STORAGE", "offsets")
+    async with HaikuRAG(db_path) as client:
+        async for _ in client.rebuild_database():
+            pass
+        assert client.store._connection is not None
+        (with_offsets,) = client.store._connection.execute(
+            "SELECT COUNT(*) FROM chunks WHERE end_offset IS NOT NULL"
+        ).fetchone()
+        after = [chunk.content for chunk in await client.chunk_repository.list_all()]
+        assert with_offsets == len(after) == len(before)
+        assert after == before
+        check_fts_integrity(client.store)
+        results = await client.search("tides", mode="fts")
+        assert {chunk.document_id for chunk, _ in results} == {document.id}
+
+
+@pytest.mark.asyncio
+async def test_unsupported_chunk_storage(monkeypatch):
+    monkeypatch.setattr(Config, "CHUNK_STORAGE", "compressed")
+    async with HaikuRAG(":memory:") as client:
+        with pytest.raises(ValueError, match="Unsupported chunk storage"):
+            await client.create_document("Some content.")
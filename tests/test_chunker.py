@@ -42,3 +42,17 @@ async def test_chunker(qa_corpus: Dataset):
         assert len(current_overlap_tokens) == min(
             chunker.chunk_overlap, len(current_tokens)
         )
+
+
+@pytest.mark.asyncio
+async def test_chunk_spans():
+    chunker = Chunker(chunk_size=16, chunk_overlap=4)
+    text = "The keeper climbs the stairs, and the lamp turns. " * 20
+
+    spans = await chunker.chunk_spans(text)
+    assert len(spans) > 1
+    assert spans[0][0] == 0 and spans[-1][1] == len(text)
+    assert [text[start:end] for start, end in spans] == await chunker.chunk(text)
+
+    assert await chunker.chunk_spans("Short text.") == [(0, 11)]
+    assert await chunker.chunk_spans("") == []
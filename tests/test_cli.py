@@ -29,7 +29,7 @@ def test_add_document_text():
 
         assert result.exit_code == 0
         mock_app_instance.add_document_from_text.assert_called_once_with(
-            text="test document"
+            text="test document", collection="default"
         )
 
 
@@ -69,16 +69,89 @@ def test_delete_document():
         mock_app_instance.delete_document.assert_called_once_with(doc_id=1)
 
 
+def test_maintain():
+    with patch("haiku.rag.cli.HaikuRAGApp") as mock_app:
+        mock_app_instance = MagicMock()
+        mock_app_instance.maintain = AsyncMock()
+        mock_app.return_value = mock_app_instance
+
+        result = runner.invoke(cli, ["maintain", "--full"])
+
+        assert result.exit_code == 0
+        mock_app_instance.maintain.assert_called_once_with(full=True)
+
+
 def test_search():
     with patch("haiku.rag.cli.HaikuRAGApp") as mock_app:
         mock_app_instance = MagicMock()
         mock_app_instance.search = AsyncMock()
         mock_app.return_value = mock_app_instance
 
-        result = runner.invoke(cli, ["search", "query"])
+        result = runner.invoke(
+            cli, ["search", "query", "--k-vector", "20", "--k-fts", "40"]
+        )
+
+        assert result.exit_code == 0
+        mock_app_instance.search.assert_called_once_with(
+            query="query",
+            limit=5,
+            k=60,
+            mode="hybrid",
+            collection=None,
+            k_vector=20,
+            k_fts=40,
+        )
+
+
+def test_search_batch(tmp_path):
+    queries_file = tmp_path / "queries.jsonl"
+    queries_file.write_text('{"query": "query"}\n')
+
+    with patch("haiku.rag.cli.HaikuRAGApp") as mock_app:
+        mock_app_instance = MagicMock()
+        mock_app_instance.search_batch = AsyncMock()
+        mock_app.return_value = mock_app_instance
+
+        result = runner.invoke(cli, ["search", "--batch", str(queries_file)])
+
+        assert result.exit_code == 0
+        mock_app_instance.search_batch.assert_called_once_with(
+            queries_file=queries_file,
+            limit=5,
+            k=60,
+            mode="hybrid",
+            collection=None,
+            k_vector=None,
+            k_fts=None,
+        )
+
+
+def test_search_mode():
+    with patch("haiku.rag.cli.HaikuRAGApp") as mock_app:
+        mock_app_instance = MagicMock()
+        mock_app_instance.search = AsyncMock()
+        mock_app.return_value = mock_app_instance
+
+        result = runner.invoke(cli, ["search", "query", "--mode", "fts"])
 
         assert result.exit_code == 0
-        mock_app_instance.search.assert_called_once_with(query="query", limit=5, k=60)
+        assert mock_app_instance.search.call_args.kwargs["mode"] == "fts"
+
+
+def test_search_invalid_mode():
+    with patch("haiku.rag.cli.HaikuRAGApp") as mock_app:
+        result = runner.invoke(cli, ["search", "query", "--mode", "foo"])
+
+        assert result.exit_code == 2
+        assert "Invalid value for '--mode'" in result.output
+        mock_app.assert_not_called()
+
+
+def test_search_without_query():
+    with patch("haiku.rag.cli.HaikuRAGApp"):
+        result = runner.invoke(cli, ["search"])
+
+        assert result.exit_code != 0
 
 
 def test_serve():
@@ -126,4 +199,4 @@ def test_serve_stdio_and_sse():
         result = runner.invoke(cli, ["serve", "--stdio", "--sse"])
 
         assert result.exit_code == 1
-        assert "Error: Cannot use both --stdio and --http options" in result.stdout
\ No newline at end of file
+        assert "Error: Cannot use both --stdio and --http options" in result.stdout
@@ -1,12 +1,13 @@
+import asyncio
 import tempfile
 from pathlib import Path
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import httpx
 import pytest
 from datasets import Dataset
 
-from haiku.rag.client import HaikuRAG
+from haiku.rag.client import HaikuRAG, search_cache
 
 
 @pytest.mark.asyncio
@@ -426,6 +427,181 @@ async def test_client_search():
         assert len(limited_results) <= 1
 
 
+@pytest.mark.asyncio
+async def test_client_search_cache(monkeypatch):
+    """Test that search results are cached until the index is written to."""
+    monkeypatch.setattr(search_cache, "maxsize", 16)
+    search_cache.clear()
+
+    async with HaikuRAG(":memory:") as client:
+        await client.create_document(content="Python is a programming language.")
+        generation = client.store.get_generation()
+
+        first = await client.search("programming", limit=3)
+        second = await client.search("programming", limit=3)
+        assert first == second
+        assert search_cache.stats().hits == 1
+
+        # Different search parameters are cached separately
+        await client.search("programming", limit=1)
+        assert search_cache.stats().hits == 1
+
+        # Any write advances the generation and invalidates cached results
+        await client.create_document(content="Rust is another programming language.")
+        assert client.store.get_generation() > generation
+
+        third = await client.search("programming", limit=3)
+        assert search_cache.stats().hits == 1
+        assert len(third) > len(first)
+
+    search_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_client_search_cache_returns_copies(monkeypatch):
+    """Test that modifying returned results does not change cached results."""
+    monkeypatch.setattr(search_cache, "maxsize", 16)
+    search_cache.clear()
+
+    async with HaikuRAG(":memory:") as client:
+        await client.create_document(
+            content="Python is a programming language.", metadata={"lang": "en"}
+        )
+
+        first = await client.search("programming", limit=3)
+        first[0][0].content = "modified"
+        first[0][0].document_meta["lang"] = "fr"
+
+        second = await client.search("programming", limit=3)
+        assert search_cache.stats().hits == 1
+        assert second[0][0].content == "Python is a programming language."
+        assert second[0][0].document_meta == {"lang": "en"}
+
+    search_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_client_search_without_cache_skips_generation(monkeypatch):
+    """Test that the cache key generation is only read while the cache is enabled."""
+    monkeypatch.setattr(search_cache, "maxsize", 0)
+    search_cache.clear()
+
+    async with HaikuRAG(":memory:") as client:
+        await client.create_document(content="Python is a programming language.")
+        get_generation = MagicMock(side_effect=client.store.get_generation)
+        monkeypatch.setattr(client.store, "get_generation", get_generation)
+
+        await client.search("programming", limit=3)
+        uncached_calls = get_generation.call_count
+
+        monkeypatch.setattr(search_cache, "maxsize", 16)
+        get_generation.reset_mock()
+        await client.search("language", limit=3)
+        assert get_generation.call_count == uncached_calls + 1
+
+    search_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_client_search_modes():
+    """Test explicit search modes and automatic routing of identifier queries."""
+    async with HaikuRAG(":memory:") as client:
+        doc = await client.create_document(
+            content="Call get_user_by_id to load a user from the database."
+        )
+        await client.create_document(content="Users are stored in a database table.")
+
+        for mode in ("hybrid", "vector", "fts"):
+            results = await client.search("user database", limit=2, mode=mode)
+            assert len(results) > 0
+
+        embed_mock = AsyncMock(side_effect=client.chunk_repository.embedder.embed)
+        client.chunk_repository.embedder.embed = embed_mock
+
+        # Identifiers found verbatim are answered by full-text search alone
+        results = await client.search("get_user_by_id", limit=2, mode="auto")
+        assert results[0][0].document_id == doc.id
+        assert embed_mock.call_count == 0
+
+        # Natural-language queries fall back to hybrid search
+        await client.search("how are users stored", limit=2, mode="auto")
+        assert embed_mock.call_count == 1
+
+        # So do identifiers that do not occur verbatim
+        await client.search("get_user_by_email", limit=2, mode="auto")
+        assert embed_mock.call_count == 2
+
+        with pytest.raises(ValueError):
+            await client.search("user", mode="semantic")  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_client_search_many():
+    """Test searching for several queries with batched query embeddings."""
+    async with HaikuRAG(":memory:") as client:
+        await client.create_document(content="Python is a programming language.")
+        await client.create_document(content="Paris is the capital of France.")
+
+        embedder = client.chunk_repository.embedder
+        embed_batch_mock = AsyncMock(side_effect=embedder.embed_batch)
+        embedder.embed_batch = embed_batch_mock
+
+        queries = ["python programming", "capital of France", "python programming"]
+        results = await client.search_many(queries, limit=1)
+
+        assert len(results) == len(queries)
+        assert results[0] == results[2]
+        assert "Python" in results[0][0][0].content
+        assert "Paris" in results[1][0][0].content
+        assert results[1] == await client.search("capital of France", limit=1)
+
+        # All distinct queries were embedded in a single provider request
+        assert embed_batch_mock.call_count == 1
+        assert len(embed_batch_mock.call_args.args[0]) == 2
+
+        # Vector searches are scored together in one pass over the index
+        vector_results = await client.search_many(queries, limit=1, mode="vector")
+        assert vector_results[1] == await client.search(
+            "capital of France", limit=1, mode="vector"
+        )
+
+        assert await client.search_many([]) == []
+
+
+@pytest.mark.asyncio
+async def test_client_concurrent_requests_are_coalesced():
+    """Test that identical concurrent searches and ingests share one execution."""
+    async with HaikuRAG(":memory:") as client:
+        await client.create_document(content="Python is a programming language.")
+
+        original_search = client.chunk_repository.search_chunks_hybrid
+        search_mock = AsyncMock(side_effect=original_search)
+        client.chunk_repository.search_chunks_hybrid = search_mock
+
+        results = await asyncio.gather(
+            *(client.search("programming", limit=2) for _ in range(5))
+        )
+        assert all(result == results[0] for result in results)
+        assert search_mock.call_count == 1
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir) / "test.txt"
+            temp_path.write_text("Concurrent ingestion of the same file")
+
+            docs = await asyncio.gather(
+                client.create_document_from_source(temp_path),
+                client.create_document_from_source(str(temp_path)),
+            )
+            assert docs[0].id == docs[1].id
+
+            matching = [
+                doc
+                for doc in await client.list_documents()
+                if doc.uri == temp_path.as_uri()
+            ]
+            assert len(matching) == 1
+
+
 @pytest.mark.asyncio
 async def test_client_async_context_manager():
     """Test HaikuRAG as async context manager."""
@@ -0,0 +1,70 @@
+import sqlite3
+
+import pytest
+import sqlite_vec
+
+from haiku.rag.client import HaikuRAG
+from haiku.rag.store.upgrades.v0_4_0 import add_document_collections
+
+
+@pytest.mark.asyncio
+async def test_search_within_collection():
+    """Test that searches in a collection only return that collection's chunks."""
+    async with HaikuRAG(":memory:") as client:
+        alpha = await client.create_document(
+            "The quarterly report covers revenue.", collection="alpha"
+        )
+        beta = await client.create_document(
+            "The quarterly report covers expenses.", collection="beta"
+        )
+        await client.create_document("An unrelated note about gardening.")
+
+        for mode in ("hybrid", "vector", "fts"):
+            results = await client.search(
+                "quarterly report", limit=5, mode=mode, collection="alpha"
+            )
+            assert {chunk.document_id for chunk, _ in results} == {alpha.id}
+
+            results = await client.search("quarterly report", limit=5, mode=mode)
+            assert {alpha.id, beta.id} <= {chunk.document_id for chunk, _ in results}
+
+        many = await client.search_many(
+            ["revenue", "expenses"], limit=5, mode="vector", collection="beta"
+        )
+        assert all(chunk.document_id == beta.id for r in many for chunk, _ in r)
+
+        documents = await client.list_documents(collection="beta")
+        assert [(d.id, d.collection) for d in documents] == [(beta.id, "beta")]
+        assert len(await client.list_documents()) == 3
+
+        # Moving a document to another collection moves its embeddings
+        beta.collection = "alpha"
+        await client.update_document(beta)
+        results = await client.search("expenses", limit=5, collection="alpha")
+        assert beta.id in {chunk.document_id for chunk, _ in results}
+        assert await client.search("expenses", limit=5, collection="beta") == []
+
+
+def test_add_document_collections_upgrade():
+    """Test that existing embeddings are moved to the default collection."""
+    db = sqlite3.connect(":memory:")
+    db.enable_load_extension(True)
+    sqlite_vec.load(db)
+    db.execute("CREATE TABLE documents (id INTEGER PRIMARY KEY, content TEXT)")
+    db.execute("""
+        CREATE VIRTUAL TABLE chunk_embeddings USING vec0(
+            chunk_id INTEGER PRIMARY KEY,
+            embedding FLOAT[2]
+        )
+    """)
+    db.execute("INSERT INTO documents (id, content) VALUES (1, 'doc')")
+    db.execute("INSERT INTO chunk_embeddings VALUES (7, '[1.0, 0.0]')")
+
+    add_document_collections(db)
+
+    assert db.execute("SELECT collection FROM documents").fetchall() == [("default",)]
+    rows = db.execute("""
+        SELECT chunk_id, collection FROM chunk_embeddings
+        WHERE embedding MATCH '[1.0, 0.0]' AND k = 1 AND collection = 'default'
+    """).fetchall()
+    assert rows == [(7, "default")]
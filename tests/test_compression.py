@@ -0,0 +1,97 @@
+import pytest
+
+from haiku.rag.client import HaikuRAG
+from haiku.rag.config import Config
+from haiku.rag.store.compression import compress, decompress
+from haiku.rag.store.engine import Store
+
+
+def stored_types(store: Store) -> list[str]:
+    assert store._connection is not None
+    return [
+        content_type
+        for (content_type,) in store._connection.execute(
+            "SELECT typeof(content) FROM documents ORDER BY id"
+        )
+    ]
+
+
+@pytest.mark.parametrize("codec", ["none", "zlib", "zstd"])
+def test_compress(codec):
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+    text = "Compressed text with accents: é, ü, ø. " * 50
+    stored = compress(text, codec)
+    assert decompress(stored) == text
+    if codec != "none":
+        assert isinstance(stored, bytes) and len(stored) < len(text.encode())
+
+    with pytest.raises(ValueError, match="Unsupported document compression"):
+        compress(text, "lz4")
+
+
+@pytest.mark.asyncio
+async def test_compressed_documents(monkeypatch, tmp_path):
+    """Test that compressed documents read back transparently and are converted."""
+    db_path = tmp_path / "test.sqlite"
+    async with HaikuRAG(db_path) as client:
+        plain = await client.create_document(
+            "A plain document about tides.", uri="doc://plain"
+        )
+
+    monkeypatch.setattr(Config, "DOCUMENT_COMPRESSION", "zlib")
+    async with HaikuRAG(db_path) as client:
+        compressed = await client.create_document(
+            "A compressed document about lighthouses.", uri="doc://compressed"
+        )
+        assert stored_types(client.store) == ["text", "blob"]
+
+        assert compressed.id is not None
+        document = await client.get_document_by_id(compressed.id)
+        assert document is not None and document.content == compressed.content
+        document = await client.get_document_by_uri("doc://compressed")
+        assert document is not None and document.content == compressed.content
+        documents = await client.document_repository.list_all()
+        assert {d.content for d in documents} == {plain.content, compressed.content}
+        results = await client.search("lighthouses", mode="fts")
+        assert [chunk.document_id for chunk, _ in results] == [compressed.id]
+
+        # Maintenance converts existing documents to the configured compression
+        report = await client.maintain()
+        assert report.documents_recompressed == 1
+        assert stored_types(client.store) == ["blob", "blob"]
+        assert (await client.maintain()).documents_recompressed == 0
+
+    monkeypatch.setattr(Config, "DOCUMENT_COMPRESSION", "none")
+    async with HaikuRAG(db_path) as client:
+        assert (await client.maintain()).documents_recompressed == 2
+        assert stored_types(client.store) == ["text", "text"]
+        documents = await client.document_repository.list_all()
+        assert {d.content for d in documents} == {plain.content, compressed.content}
+
+
+@pytest.mark.asyncio
+async def test_chunk_offsets_into_compressed_documents(monkeypatch, tmp_path):
+    """Test that documents whose chunks are offsets are stored uncompressed."""
+    monkeypatch.setattr(Config, "DOCUMENT_COMPRESSION", "zlib")
+    db_path = tmp_path / "test.sqlite"
+    async with HaikuRAG(db_path) as client:
+        document = await client.create_document("A document about tides. " * 100)
+        assert stored_types(client.store) == ["blob"]
+
+    monkeypatch.setattr(Config, "CHUNK_STORAGE", "offsets")
+    async with HaikuRAG(db_path) as client:
+        async for _ in client.rebuild_database():
+            pass
+        assert stored_types(client.store) == ["text"]
+        assert (await client.maintain()).documents_recompressed == 0
+
+        assert document.id is not None
+        chunks = await client.chunk_repository.get_by_document_id(document.id)
+        assert "".join(chunk.content for chunk in chunks).startswith(
+            "A document about tides."
+        )
+        other = await client.create_document("Another document about harbours.")
+        assert stored_types(client.store) == ["text", "text"]
+        results = await client.search("harbours", mode="fts")
+        assert [chunk.content for chunk, _ in results] == [other.content]
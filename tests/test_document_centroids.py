@@ -0,0 +1,166 @@
+import struct
+from unittest.mock import MagicMock
+
+import pytest
+
+from haiku.rag.config import Config
+from haiku.rag.store.engine import Store
+from haiku.rag.store.models.chunk import Chunk
+from haiku.rag.store.models.document import Document
+from haiku.rag.store.repositories.chunk import ChunkRepository
+from haiku.rag.store.repositories.document import DocumentRepository
+
+DOCUMENTS = [
+    [
+        "Python is a high-level programming language.",
+        "Python code is often shorter than Java code.",
+        "Python has a large standard library.",
+    ],
+    [
+        "The Eiffel Tower is a landmark in Paris.",
+        "Paris is the capital of France.",
+    ],
+    [
+        "Photosynthesis converts sunlight into chemical energy.",
+        "Plants release oxygen during photosynthesis.",
+    ],
+]
+
+
+@pytest.fixture
+def centroids_config(monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(Config, "VECTOR_DOCUMENT_CANDIDATES", 1)
+
+
+def centroid_of(store: Store, document_id: int) -> list[float]:
+    assert store._connection is not None
+    assert store.document_centroids is not None
+    (blob,) = store._connection.execute(
+        "SELECT embedding FROM document_embeddings WHERE document_id = ?",
+        (document_id,),
+    ).fetchone()
+    return list(struct.unpack(f"{store.document_centroids.dim}f", blob))
+
+
+async def mean_embedding(chunk_repo: ChunkRepository, document_id: int):
+    chunks = await chunk_repo.get_by_document_id(document_id)
+    embeddings = [await chunk_repo.embedder.embed(c.content) for c in chunks]
+    return [sum(values) / len(embeddings) for values in zip(*embeddings)]
+
+
+async def create_documents(store: Store) -> list[int]:
+    document_ids = []
+    chunk_repo = ChunkRepository(store)
+    for texts in DOCUMENTS:
+        # Documents are created without content, so that only these chunks exist
+        document = await DocumentRepository(store).create(Document(content=""))
+        assert document.id is not None
+        await chunk_repo.delete_by_document_id(document.id)
+        for text in texts:
+            await chunk_repo.create(Chunk(document_id=document.id, content=text))
+        document_ids.append(document.id)
+    return document_ids
+
+
+@pytest.mark.asyncio
+async def test_document_centroids_are_maintained(centroids_config):
+    """Test that centroids follow chunk creation, updates and deletion."""
+    store = Store(":memory:")
+    assert store.document_centroids is not None
+    chunk_repo = ChunkRepository(store)
+    document_ids = await create_documents(store)
+
+    for document_id in document_ids:
+        assert centroid_of(store, document_id) == pytest.approx(
+            await mean_embedding(chunk_repo, document_id), abs=1e-5
+        )
+
+    # Moving a chunk to another document updates both centroids
+    chunk = (await chunk_repo.get_by_document_id(document_ids[0]))[0]
+    chunk.document_id = document_ids[1]
+    chunk.content = "The Louvre is a museum in Paris."
+    await chunk_repo.update(chunk)
+    for document_id in document_ids[:2]:
+        assert centroid_of(store, document_id) == pytest.approx(
+            await mean_embedding(chunk_repo, document_id), abs=1e-5
+        )
+
+    # A document without chunks has no centroid
+    await chunk_repo.delete_by_document_id(document_ids[2])
+    assert store._connection is not None
+    assert store.document_centroids.is_current(store._connection)
+    (count,) = store._connection.execute(
+        "SELECT COUNT(*) FROM document_embeddings"
+    ).fetchone()
+    assert count == 2
+
+    # Rebuilding recomputes the same centroids
+    incremental = [centroid_of(store, document_id) for document_id in document_ids[:2]]
+    store.document_centroids.rebuild(store._connection)
+    for document_id, centroid in zip(document_ids, incremental):
+        assert centroid_of(store, document_id) == pytest.approx(centroid, abs=1e-5)
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_document_centroid_written_once_per_document(
+    centroids_config, monkeypatch
+):
+    """Test that creating a document's chunks updates its centroid in one write."""
+    store = Store(":memory:")
+    assert store.document_centroids is not None
+    set_centroid = MagicMock(side_effect=store.document_centroids._set)
+    monkeypatch.setattr(store.document_centroids, "_set", set_centroid)
+
+    content = " ".join(" ".join(texts) for texts in DOCUMENTS) * 20
+    document = await DocumentRepository(store).create(Document(content=content))
+    assert document.id is not None
+    chunk_repo = ChunkRepository(store)
+    assert len(await chunk_repo.get_by_document_id(document.id)) > 1
+    assert set_centroid.call_count == 1
+    assert centroid_of(store, document.id) == pytest.approx(
+        await mean_embedding(chunk_repo, document.id), abs=1e-5
+    )
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_two_stage_search(centroids_config, monkeypatch):
+    """Test that search is limited to the chunks of the nearest documents."""
+    store = Store(":memory:")
+    chunk_repo = ChunkRepository(store)
+    document_ids = await create_documents(store)
+
+    results = await chunk_repo.search_chunks(DOCUMENTS[1][0], limit=5)
+    assert results[0][0].content == DOCUMENTS[1][0]
+    assert {chunk.document_id for chunk, _ in results} == {document_ids[1]}
+
+    # Searching the chunks of every document is an exact search
+    monkeypatch.setattr(Config, "VECTOR_DOCUMENT_CANDIDATES", len(DOCUMENTS))
+    two_stage = await chunk_repo.search_chunks(DOCUMENTS[2][1], limit=5)
+    store.document_centroids = None
+    exact = await chunk_repo.search_chunks(DOCUMENTS[2][1], limit=5)
+    assert [c.id for c, _ in two_stage] == [c.id for c, _ in exact]
+    assert [s for _, s in two_stage] == pytest.approx([s for _, s in exact])
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_document_centroids_backfilled(centroids_config, monkeypatch, tmp_path):
+    """Test that enabling two-stage search on an existing database computes centroids."""
+    db_path = tmp_path / "test.sqlite"
+    monkeypatch.setattr(Config, "VECTOR_DOCUMENT_CANDIDATES", 0)
+    store = Store(db_path)
+    assert store.document_centroids is None
+    document_ids = await create_documents(store)
+    store.close()
+
+    monkeypatch.setattr(Config, "VECTOR_DOCUMENT_CANDIDATES", 1)
+    store = Store(db_path)
+    chunk_repo = ChunkRepository(store)
+    for document_id in document_ids:
+        assert centroid_of(store, document_id) == pytest.approx(
+            await mean_embedding(chunk_repo, document_id), abs=1e-5
+        )
+    store.close()
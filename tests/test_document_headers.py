@@ -0,0 +1,66 @@
+import pytest
+
+from haiku.rag.client import HaikuRAG
+from haiku.rag.config import Config
+from haiku.rag.store.engine import Store
+from haiku.rag.store.repositories.document import HEADER_COLUMNS
+
+
+def query_plan(store: Store, sql: str, params: dict | None = None) -> str:
+    assert store._connection is not None
+    rows = store._connection.execute(f"EXPLAIN QUERY PLAN {sql}", params or {})
+    return " ".join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+@pytest.mark.asyncio
+async def test_document_headers(monkeypatch, compression):
+    """Test listing documents and looking them up by URI without their content."""
+    monkeypatch.setattr(Config, "DOCUMENT_COMPRESSION", compression)
+    async with HaikuRAG(":memory:") as client:
+        document = await client.create_document(
+            "Größe matters. " * 100,
+            uri="doc://sizes",
+            metadata={"team": "red"},
+            collection="docs",
+        )
+        await client.create_document("Another document.", uri="doc://other")
+        assert document.id is not None
+
+        headers = await client.list_documents(collection="docs")
+        assert [header.id for header in headers] == [document.id]
+        (header,) = headers
+        assert header.uri == "doc://sizes"
+        assert header.metadata == {"team": "red"}
+        assert header.size == len(document.content)
+        assert not hasattr(header, "content")
+        assert len(await client.list_documents(where={"team": "red"})) == 1
+
+        found = await client.get_document_header_by_uri("doc://sizes")
+        assert found == header
+        assert await client.get_document_header_by_uri("doc://missing") is None
+
+        content = await client.document_repository.get_content(document.id)
+        assert content == document.content
+
+        document.content = "Shorter."
+        await client.update_document(document)
+        found = await client.get_document_header_by_uri("doc://sizes")
+        assert found is not None and found.size == len("Shorter.")
+
+
+@pytest.mark.asyncio
+async def test_headers_are_read_from_the_uri_index():
+    """Test that listing and URI lookups are answered by covering indexes."""
+    async with HaikuRAG(":memory:") as client:
+        plan = query_plan(
+            client.store,
+            f"SELECT {HEADER_COLUMNS} FROM documents ORDER BY created_at DESC",
+        )
+        assert "COVERING INDEX idx_documents_created_at" in plan
+        plan = query_plan(
+            client.store,
+            f"SELECT {HEADER_COLUMNS} FROM documents WHERE uri = :uri",
+            {"uri": "doc://sizes"},
+        )
+        assert "COVERING INDEX idx_documents_uri" in plan
@@ -1,7 +1,11 @@
+import asyncio
+
 import numpy as np
 import pytest
 
 from haiku.rag.embeddings import get_embedder
+from haiku.rag.embeddings.base import EmbedderBase
+from haiku.rag.embeddings.batching import BatchingEmbedder
 
 
 @pytest.mark.asyncio
@@ -126,3 +130,65 @@ async def test_voyageai_embedder(monkeypatch):
 
     except ImportError:
         pytest.skip("VoyageAI package not installed")
+
+
+@pytest.mark.asyncio
+async def test_ollama_embedder_uses_legacy_endpoint(monkeypatch):
+    """Test that single and batched embeddings come from the same endpoint."""
+    import haiku.rag.embeddings.ollama
+    from haiku.rag.embeddings.ollama import Embedder as OllamaEmbedder
+
+    class MockAsyncClient:
+        def __init__(self, host):
+            pass
+
+        async def embeddings(self, model, prompt):
+            return {"embedding": [float(len(prompt)), 2.0]}
+
+        async def embed(self, model, input):
+            raise AssertionError("/api/embed returns normalized vectors")
+
+    monkeypatch.setattr(haiku.rag.embeddings.ollama, "AsyncClient", MockAsyncClient)
+
+    embedder = OllamaEmbedder("mxbai-embed-large", 2)
+    assert await embedder.embed("abc") == [3.0, 2.0]
+    assert await embedder.embed_batch(["a", "abc"]) == [[1.0, 2.0], [3.0, 2.0]]
+
+
+@pytest.mark.asyncio
+async def test_batching_embedder():
+    class MockEmbedder(EmbedderBase):
+        def __init__(self):
+            super().__init__("mock", 2)
+            self.batches: list[list[str]] = []
+
+        async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+            self.batches.append(texts)
+            return [[float(len(text)), 1.0] for text in texts]
+
+    mock = MockEmbedder()
+    embedder = BatchingEmbedder(mock, window_ms=10, max_batch_size=4)
+    assert embedder._vector_dim == 2
+
+    # Concurrent calls within the window are sent as a single request
+    texts = ["a", "bb", "ccc", "bb"]
+    embeddings = await asyncio.gather(*(embedder.embed(text) for text in texts))
+    assert embeddings == [[1.0, 1.0], [2.0, 1.0], [3.0, 1.0], [2.0, 1.0]]
+    assert mock.batches == [["a", "bb", "ccc"]]
+
+    # Batches are capped at max_batch_size
+    mock.batches.clear()
+    texts = [str(i) * (i + 1) for i in range(6)]
+    embeddings = await asyncio.gather(*(embedder.embed(text) for text in texts))
+    assert embeddings == [[float(len(text)), 1.0] for text in texts]
+    assert [len(batch) for batch in mock.batches] == [4, 2]
+
+    # Provider errors are propagated to every caller in the batch
+    async def fail(texts: list[str]) -> list[list[float]]:
+        raise RuntimeError("provider down")
+
+    mock.embed_batch = fail
+    results = await asyncio.gather(
+        embedder.embed("x"), embedder.embed("y"), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
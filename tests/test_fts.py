@@ -0,0 +1,151 @@
+import sqlite3
+
+import pytest
+
+from haiku.rag.store.engine import Store
+from haiku.rag.store.fts import build_fts_query, looks_like_identifier
+from haiku.rag.store.models.document import Document
+from haiku.rag.store.repositories.chunk import ChunkRepository
+from haiku.rag.store.repositories.document import DocumentRepository
+from haiku.rag.store.upgrades.v0_4_0 import add_chunks_fts_sync_triggers
+
+
+def test_build_fts_query_syntax():
+    """Test stopword pruning, phrases, prefixes and identifiers."""
+    store = Store(":memory:")
+    assert store._connection is not None
+    db = store._connection
+
+    assert (
+        build_fts_query(db, "What is the capital of France?") == '"capital" OR "france"'
+    )
+    # Queries made only of stopwords still search for them
+    assert build_fts_query(db, "to be or not to be") == '"to" OR "be" OR "or" OR "not"'
+    assert build_fts_query(db, 'the "Eiffel Tower" in Paris') == (
+        '"Eiffel Tower" OR "paris"'
+    )
+    assert build_fts_query(db, "optim* the café") == '"optim"* OR "cafe"'
+    assert build_fts_query(db, "where is get_user_by_id used") == (
+        '"get_user_by_id" OR "used"'
+    )
+    assert build_fts_query(db, "?!") is None
+    assert build_fts_query(db, "") is None
+
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_build_fts_query_selectivity():
+    """Test that only the most selective terms are kept when over the term cap."""
+    store = Store(":memory:")
+    assert store._connection is not None
+    doc_repo = DocumentRepository(store)
+
+    await doc_repo.create(Document(content="common rare"))
+    await doc_repo.create(Document(content="common frequent"))
+    await doc_repo.create(Document(content="common frequent"))
+
+    query = build_fts_query(
+        store._connection, "common frequent rare missing", max_terms=2
+    )
+    # Terms absent from the index are dropped, the rest ordered by frequency
+    assert query == '"rare" OR "frequent"'
+
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_fts_search_question():
+    """Test FTS search with a question-style query."""
+    store = Store(":memory:")
+    doc_repo = DocumentRepository(store)
+    chunk_repo = ChunkRepository(store)
+
+    doc = await doc_repo.create(Document(content="Paris is the capital of France."))
+    await doc_repo.create(Document(content="It is what it is, and that is all."))
+
+    results = await chunk_repo.search_chunks_fts("What is the capital of France?")
+    assert [chunk.document_id for chunk, _ in results] == [doc.id]
+
+    assert await chunk_repo.search_chunks_fts("???") == []
+
+    store.close()
+
+
+def test_looks_like_identifier():
+    """Test detection of identifier-like queries."""
+    for query in [
+        "get_user_by_id",
+        "parseJSON",
+        "os.path.join",
+        "PROJ-1234",
+        "E1102",
+        "`build_fts_query`",
+    ]:
+        assert looks_like_identifier(query), query
+
+    for query in ["python", "How do I parse JSON?", "machine learning", "id", "42"]:
+        assert not looks_like_identifier(query), query
+
+
+@pytest.mark.asyncio
+async def test_fts_index_follows_chunks():
+    """Test that triggers keep the FTS index in sync with any write to chunks."""
+    store = Store(":memory:")
+    assert store._connection is not None
+    db = store._connection
+    doc_repo = DocumentRepository(store)
+    chunk_repo = ChunkRepository(store)
+
+    doc = await doc_repo.create(Document(content="Glaciers are retreating."))
+    assert doc.id is not None
+    chunk = (await chunk_repo.get_by_document_id(doc.id))[0]
+    chunk.content = "Volcanoes are erupting."
+    await chunk_repo.update(chunk)
+    assert await chunk_repo.search_chunks_fts("glaciers") == []
+    assert [c.id for c, _ in await chunk_repo.search_chunks_fts("volcanoes")] == [
+        chunk.id
+    ]
+
+    # Statements that bypass the repositories are indexed too
+    db.executemany(
+        "INSERT INTO chunks (document_id, content) VALUES (?, ?)",
+        [(doc.id, f"Bulk loaded chunk about geysers {i}.") for i in range(3)],
+    )
+    assert len(await chunk_repo.search_chunks_fts("geysers", limit=10)) == 3
+    db.execute("UPDATE chunks SET content = 'Deserts.' WHERE content LIKE 'Bulk%'")
+    assert await chunk_repo.search_chunks_fts("geysers") == []
+    db.execute("DELETE FROM chunks WHERE content = 'Deserts.'")
+    db.execute(
+        "INSERT INTO chunks_fts (chunks_fts, rank) VALUES ('integrity-check', 1)"
+    )
+
+    store.close()
+
+
+def test_add_chunks_fts_sync_triggers_upgrade():
+    """Test that the upgrade reindexes chunks and installs the triggers."""
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE chunks (id INTEGER PRIMARY KEY, content TEXT)")
+    db.execute(
+        "CREATE VIRTUAL TABLE chunks_fts USING fts5(content, content='chunks', "
+        "content_rowid='id')"
+    )
+    # The index no longer matches the content, as after an in-place update
+    db.execute("INSERT INTO chunks_fts (rowid, content) VALUES (1, 'stale')")
+    db.execute("INSERT INTO chunks (id, content) VALUES (1, 'current')")
+
+    add_chunks_fts_sync_triggers(db)
+    db.execute("INSERT INTO chunks (id, content) VALUES (2, 'inserted')")
+
+    def search(term: str) -> list[int]:
+        return [
+            rowid
+            for (rowid,) in db.execute(
+                "SELECT rowid FROM chunks_fts WHERE chunks_fts MATCH ?", (term,)
+            )
+        ]
+
+    assert search("stale") == []
+    assert search("current") == [1]
+    assert search("inserted") == [2]
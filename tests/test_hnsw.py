@@ -0,0 +1,171 @@
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from haiku.rag.config import Config
+from haiku.rag.store.engine import Store
+from haiku.rag.store.models.chunk import Chunk
+from haiku.rag.store.models.document import Document
+from haiku.rag.store.repositories.chunk import ChunkRepository
+from haiku.rag.store.repositories.document import DocumentRepository
+from haiku.rag.store.vector import SqliteVecIndex
+
+pytest.importorskip("hnswlib")
+
+from haiku.rag.store.vector.hnsw import HNSWIndex  # noqa: E402
+
+TEXTS = [
+    "Python is a high-level programming language.",
+    "Machine learning models learn patterns from data.",
+    "SQLite is an embedded relational database.",
+    "The Eiffel Tower is a landmark in Paris.",
+    "Photosynthesis converts sunlight into chemical energy.",
+    "The stock market closed higher on Friday.",
+]
+
+
+@pytest.fixture
+def hnsw_config(monkeypatch):
+    monkeypatch.setattr(Config, "VECTOR_INDEX", "hnsw")
+
+
+@pytest.mark.asyncio
+async def test_hnsw_search_matches_exact_search(hnsw_config, monkeypatch):
+    """Test that HNSW search returns the same chunks as the exact vec0 scan."""
+    store = Store(":memory:")
+    assert isinstance(store.vector_index, HNSWIndex)
+    document = await DocumentRepository(store).create(Document(content="doc"))
+    assert document.id is not None
+    chunk_repo = ChunkRepository(store)
+    for text in TEXTS:
+        await chunk_repo.create(Chunk(document_id=document.id, content=text))
+
+    hnsw_index = store.vector_index
+    exact_index = SqliteVecIndex(hnsw_index.dim)
+    for text in TEXTS:
+        approximate = await chunk_repo.search_chunks(text, limit=3)
+        store.vector_index = exact_index
+        exact = await chunk_repo.search_chunks(text, limit=3)
+        store.vector_index = hnsw_index
+
+        assert [c.id for c, _ in approximate] == [c.id for c, _ in exact]
+        assert [s for _, s in approximate] == pytest.approx([s for _, s in exact])
+
+    # Deleted chunks are removed from the index
+    top_chunk, _ = (await chunk_repo.search_chunks(TEXTS[0], limit=1))[0]
+    assert top_chunk.id is not None
+    await chunk_repo.delete(top_chunk.id)
+    results = await chunk_repo.search_chunks_hybrid(TEXTS[0], limit=3)
+    assert top_chunk.id not in {c.id for c, _ in results}
+
+    await chunk_repo.delete_all()
+    assert store.vector_index.stats(store._connection).count == 0
+    assert await chunk_repo.search_chunks(TEXTS[0]) == []
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_hnsw_index_persistence(hnsw_config):
+    """Test that the index is persisted and rebuilt when it is stale."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = Path(temp_dir) / "test.sqlite"
+        index_path = Path(f"{db_path}.hnsw")
+
+        store = Store(db_path)
+        document = await DocumentRepository(store).create(Document(content="doc"))
+        assert document.id is not None
+        chunk_repo = ChunkRepository(store)
+        for text in TEXTS:
+            await chunk_repo.create(Chunk(document_id=document.id, content=text))
+        num_chunks = len(await chunk_repo.list_all())
+        store.close()
+        assert index_path.exists()
+
+        # An up to date index is loaded from disk
+        store = Store(db_path)
+        assert isinstance(store.vector_index, HNSWIndex)
+        assert store.vector_index._saved_generation == store.get_generation()
+        assert len(store.vector_index) == num_chunks
+
+        # Writes by another connection are picked up before searching
+        other = Store(db_path)
+        other.vector_index = SqliteVecIndex(other.vector_index.dim)
+        other_repo = ChunkRepository(other)
+        await other_repo.create(
+            Chunk(document_id=document.id, content="Rust is a systems language.")
+        )
+        other.close()
+
+        chunk_repo = ChunkRepository(store)
+        results = await chunk_repo.search_chunks("Rust is a systems language.", 1)
+        assert results[0][0].content == "Rust is a systems language."
+        assert len(store.vector_index) == num_chunks + 1
+        store.close()
+
+
+@pytest.mark.asyncio
+async def test_hnsw_index_with_several_writers(hnsw_config):
+    """Test that HNSW stores writing to the same database see each other's chunks."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = Path(temp_dir) / "test.sqlite"
+
+        first = Store(db_path)
+        document = await DocumentRepository(first).create(Document(content="doc"))
+        assert document.id is not None
+        second = Store(db_path)
+        first_repo = ChunkRepository(first)
+        second_repo = ChunkRepository(second)
+
+        await first_repo.create(Chunk(document_id=document.id, content=TEXTS[0]))
+        await second_repo.create(Chunk(document_id=document.id, content=TEXTS[1]))
+        await first_repo.create(Chunk(document_id=document.id, content=TEXTS[2]))
+
+        for chunk_repo in (first_repo, second_repo):
+            for text in TEXTS[:3]:
+                results = await chunk_repo.search_chunks(text, limit=1)
+                assert results[0][0].content == text
+        num_chunks = len(await first_repo.list_all())
+        first.close()
+        second.close()
+
+        # The saved graph holds the chunks of both writers
+        store = Store(db_path)
+        assert isinstance(store.vector_index, HNSWIndex)
+        assert store.vector_index._saved_generation == store.get_generation()
+        assert len(store.vector_index) == num_chunks
+        store.close()
+
+
+@pytest.mark.asyncio
+async def test_hnsw_compact_rebuilds_graph(hnsw_config):
+    """Test that compacting rebuilds the graph once enough chunks are deleted."""
+    store = Store(":memory:")
+    assert isinstance(store.vector_index, HNSWIndex)
+    assert store._connection is not None
+    document = await DocumentRepository(store).create(Document(content="doc"))
+    assert document.id is not None
+    chunk_repo = ChunkRepository(store)
+    chunks = [
+        await chunk_repo.create(Chunk(document_id=document.id, content=text))
+        for text in TEXTS
+    ]
+    nodes = len(store.vector_index)
+
+    # Below the threshold, deleted nodes stay in the graph
+    assert chunks[0].id is not None
+    await chunk_repo.delete(chunks[0].id)
+    store.vector_index.compact(store._connection)
+    assert store.vector_index._graph.get_current_count() == nodes
+
+    for chunk in chunks[1:3]:
+        assert chunk.id is not None
+        await chunk_repo.delete(chunk.id)
+    assert store.vector_index.compact(store._connection) >= 3
+    assert store.vector_index._graph.get_current_count() == nodes - 3
+    assert len(store.vector_index) == nodes - 3
+
+    results = await chunk_repo.search_chunks(TEXTS[3], limit=3)
+    assert results[0][0].id == chunks[3].id
+    assert {chunk.id for chunk, _ in results} <= {chunk.id for chunk in chunks[3:]}
+    store.close()
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+
+from haiku.rag.client import HaikuRAG
+from haiku.rag.store.models.document import Document
+
+
+@pytest.mark.asyncio
+async def test_iter_documents_and_chunks():
+    """Test iterating over documents, headers and chunks in batches."""
+    async with HaikuRAG(":memory:") as client:
+        created = [
+            await client.create_document(
+                f"Document number {i}. " * 40, collection=f"c{i % 2}"
+            )
+            for i in range(10)
+        ]
+        # Documents created at the same time are still each returned once
+        same_time = datetime(2024, 1, 1)
+        for i in range(10, 15):
+            created.append(
+                await client.document_repository.create(
+                    Document(
+                        content=f"Document number {i}.",
+                        collection=f"c{i % 2}",
+                        created_at=same_time,
+                        updated_at=same_time,
+                    )
+                )
+            )
+
+        documents = [doc async for doc in client.iter_documents(batch_size=4)]
+        assert [doc.id for doc in documents] == [doc.id for doc in created]
+        assert [doc.content for doc in documents] == [doc.content for doc in created]
+        documents = [
+            doc async for doc in client.iter_documents(collection="c1", batch_size=3)
+        ]
+        assert [doc.id for doc in documents] == [doc.id for doc in created[1::2]]
+
+        headers = [
+            header async for header in client.iter_document_headers(batch_size=4)
+        ]
+        assert sorted(header.id for header in headers) == sorted(
+            doc.id or 0 for doc in created
+        )
+        keys = [(header.created_at, header.id) for header in headers]
+        assert keys == sorted(keys, reverse=True)
+        assert await client.count_documents() == 15
+        assert await client.count_documents(collection="c0") == 8
+        headers = [
+            header
+            async for header in client.iter_document_headers(
+                collection="c0", batch_size=2
+            )
+        ]
+        assert len(headers) == 8
+
+        chunks = [chunk async for chunk in client.iter_chunks(batch_size=3)]
+        expected = await client.chunk_repository.list_all()
+        assert [chunk.id for chunk in chunks] == sorted(
+            chunk.id or 0 for chunk in expected
+        )
+        chunks = [chunk async for chunk in client.iter_chunks(collection="c1")]
+        assert {chunk.document_id for chunk in chunks} == {
+            doc.id for doc in created[1::2]
+        }
@@ -0,0 +1,101 @@
+import pytest
+
+from haiku.rag.client import HaikuRAG
+from haiku.rag.config import Config
+
+
+@pytest.mark.parametrize("quantization", ["none", "int8"])
+@pytest.mark.asyncio
+async def test_maintain_repairs_orphans(monkeypatch, quantization):
+    """Test that chunks and embeddings left behind are removed."""
+    monkeypatch.setattr(Config, "VECTOR_QUANTIZATION", quantization)
+    async with HaikuRAG(":memory:") as client:
+        kept = await client.create_document("A document about lighthouses.")
+        removed = await client.create_document("A document about harbours.")
+        db = client.store._connection
+        assert db is not None
+
+        # Rows written while foreign keys were not enforced
+        db.execute("PRAGMA foreign_keys = OFF")
+        db.execute(
+            "UPDATE chunks SET document_id = -1 WHERE document_id = ?", (removed.id,)
+        )
+        db.execute("DELETE FROM documents WHERE id = ?", (removed.id,))
+        db.execute("PRAGMA foreign_keys = ON")
+        db.execute("DELETE FROM chunks WHERE document_id = ?", (kept.id,))
+        db.commit()
+
+        report = await client.maintain()
+        assert report.orphaned_chunks == 1
+        assert report.orphaned_embeddings == 1
+        assert report.missing_embeddings == 0
+        assert not report.fts_rebuilt
+        for table in ("chunks", "chunk_embeddings"):
+            assert db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] == 0
+        assert await client.search("harbours", mode="vector") == []
+
+        report = await client.maintain()
+        assert report.orphaned_chunks == report.orphaned_embeddings == 0
+
+
+@pytest.mark.asyncio
+async def test_maintain_rebuilds_fts_index():
+    """Test that an FTS index out of step with the chunks is rebuilt."""
+    async with HaikuRAG(":memory:") as client:
+        await client.create_document("A document about lighthouses.")
+        db = client.store._connection
+        assert db is not None
+        db.execute("DROP TRIGGER chunks_fts_update")
+        db.execute("UPDATE chunks SET content = 'A chunk about harbours.'")
+        db.commit()
+        assert await client.search("harbours", mode="fts") == []
+
+        report = await client.maintain()
+        assert report.fts_rebuilt
+        results = await client.search("harbours", mode="fts")
+        assert len(results) == 1
+
+
+# Settings selecting each vector index of get_vector_index
+VECTOR_INDEXES = {
+    "sqlite-vec": {},
+    "quantized": {"VECTOR_QUANTIZATION": "int8"},
+    "reduced": {"VECTOR_REDUCED_DIM": 8},
+    "pca": {"VECTOR_REDUCED_DIM": 8, "VECTOR_REDUCTION": "pca"},
+    "hnsw": {"VECTOR_INDEX": "hnsw"},
+    "numpy": {"VECTOR_INDEX": "numpy"},
+}
+
+
+@pytest.mark.parametrize("vector_index", VECTOR_INDEXES)
+@pytest.mark.asyncio
+async def test_maintain_full_reclaims_space(monkeypatch, tmp_path, vector_index):
+    """Test that a full run shrinks the database file with every vector index."""
+    if vector_index == "hnsw":
+        pytest.importorskip("hnswlib")
+    if vector_index in ("pca", "numpy"):
+        pytest.importorskip("numpy")
+    for setting, value in VECTOR_INDEXES[vector_index].items():
+        monkeypatch.setattr(Config, setting, value)
+    async with HaikuRAG(tmp_path / "test.sqlite") as client:
+        documents = [
+            await client.create_document(f"Document number {i} about tides. " * 50)
+            for i in range(20)
+        ]
+        kept = documents[0]
+        deleted = await client.delete_documents(
+            ids=[document.id or 0 for document in documents[1:]]
+        )
+        assert deleted == 19
+
+        report = await client.maintain(full=True)
+        assert report.size_after < report.size_before
+        assert report.reclaimed_bytes == report.size_before - report.size_after
+
+        results = await client.search("tides", limit=5, mode="vector")
+        assert {chunk.document_id for chunk, _ in results} == {kept.id}
+        results = await client.search("tides", limit=5, mode="fts")
+        assert {chunk.document_id for chunk, _ in results} == {kept.id}
+
+        report = await client.maintain(full=True)
+        assert report.vector_slots_freed == 0
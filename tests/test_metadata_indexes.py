@@ -0,0 +1,83 @@
+import pytest
+
+from haiku.rag.client import HaikuRAG
+from haiku.rag.config import Config
+from haiku.rag.store.engine import Store
+from haiku.rag.store.metadata import add_metadata_column
+
+
+def query_plan(store: Store, sql: str, params: dict | None = None) -> str:
+    assert store._connection is not None
+    rows = store._connection.execute(f"EXPLAIN QUERY PLAN {sql}", params or {})
+    return " ".join(row[-1] for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_list_documents_where(monkeypatch, tmp_path):
+    """Test listing documents by promoted and other metadata keys."""
+    db_path = tmp_path / "test.sqlite"
+    async with HaikuRAG(db_path) as client:
+        pdf = await client.create_document(
+            "A report.", metadata={"contentType": "application/pdf", "team": "red"}
+        )
+        html = await client.create_document(
+            "A page.", metadata={"contentType": "text/html", "team": "blue"}
+        )
+        await client.create_document("A note.", metadata={"team": "red"})
+
+        documents = await client.list_documents(where={"contentType": "text/html"})
+        assert [d.id for d in documents] == [html.id]
+        # Keys that are not promoted are still matched, without an index
+        documents = await client.list_documents(
+            where={"team": "red", "contentType": "application/pdf"}
+        )
+        assert [d.id for d in documents] == [pdf.id]
+        documents = await client.list_documents(where={"contentType": None})
+        assert [d.metadata for d in documents] == [{"team": "red"}]
+
+        plan = query_plan(
+            client.store,
+            "SELECT id FROM documents WHERE meta_contentType = :value",
+            {"value": "text/html"},
+        )
+        assert "USING INDEX idx_documents_meta_contentType" in plan
+        assert "team" not in client.store.document_metadata_keys
+
+    # Keys added to METADATA_INDEXES are promoted when the database is opened
+    monkeypatch.setattr(Config, "METADATA_INDEXES", ["team"])
+    async with HaikuRAG(db_path) as client:
+        assert "team" in client.store.document_metadata_keys
+        documents = await client.list_documents(where={"team": "red"})
+        assert len(documents) == 2
+        plan = query_plan(
+            client.store,
+            "SELECT id FROM documents WHERE meta_team = :value",
+            {"value": "red"},
+        )
+        assert "USING INDEX idx_documents_meta_team" in plan
+
+
+@pytest.mark.asyncio
+async def test_chunks_are_read_in_order_by_index():
+    """Test that the chunks of a document are read through the order index."""
+    async with HaikuRAG(":memory:") as client:
+        document = await client.create_document("word " * 2000)
+        assert document.id is not None
+        chunks = await client.chunk_repository.get_by_document_id(document.id)
+        assert [chunk.metadata["order"] for chunk in chunks] == list(range(len(chunks)))
+
+        plan = query_plan(
+            client.store,
+            "SELECT id FROM chunks WHERE document_id = 1 ORDER BY meta_order",
+        )
+        assert "USING INDEX idx_chunks_meta_order" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+def test_invalid_metadata_key():
+    """Test that metadata keys must be usable as column names."""
+    store = Store(":memory:")
+    assert store._connection is not None
+    with pytest.raises(ValueError, match="Invalid metadata key"):
+        add_metadata_column(store._connection, "documents", "team; DROP TABLE x")
+    store.close()
@@ -1,12 +1,14 @@
 import tempfile
+from datetime import datetime
 from pathlib import Path
 from unittest.mock import AsyncMock
 
 import pytest
+from watchfiles import Change
 
 from haiku.rag.client import HaikuRAG
 from haiku.rag.monitor import FileWatcher
-from haiku.rag.store.models.document import Document
+from haiku.rag.store.models.document import Document, DocumentHeader
 
 
 @pytest.mark.asyncio
@@ -20,7 +22,9 @@ async def test_file_watcher_upsert_document():
         mock_client = AsyncMock(spec=HaikuRAG)
         mock_doc = Document(id=1, content="Test content", uri=temp_path.as_uri())
         mock_client.create_document_from_source.return_value = mock_doc
-        mock_client.get_document_by_uri.return_value = None  # No existing document
+        mock_client.get_document_header_by_uri.return_value = (
+            None  # No existing document
+        )
 
         watcher = FileWatcher(paths=[temp_path.parent], client=mock_client)
 
@@ -28,7 +32,9 @@ async def test_file_watcher_upsert_document():
 
         assert result is not None
         assert result.id == 1
-        mock_client.get_document_by_uri.assert_called_once_with(temp_path.as_uri())
+        mock_client.get_document_header_by_uri.assert_called_once_with(
+            temp_path.as_uri()
+        )
         mock_client.create_document_from_source.assert_called_once_with(str(temp_path))
 
 
@@ -41,10 +47,15 @@ async def test_file_watcher_upsert_existing_document():
         temp_path.write_text("Test content for file watcher")
 
         mock_client = AsyncMock(spec=HaikuRAG)
-        existing_doc = Document(id=1, content="Old content", uri=temp_path.as_uri())
+        existing_doc = DocumentHeader(
+            id=1,
+            uri=temp_path.as_uri(),
+            created_at=datetime.now(),
+            updated_at=datetime.now(),
+        )
         updated_doc = Document(id=1, content="Updated content", uri=temp_path.as_uri())
 
-        mock_client.get_document_by_uri.return_value = existing_doc
+        mock_client.get_document_header_by_uri.return_value = existing_doc
         mock_client.create_document_from_source.return_value = updated_doc
 
         watcher = FileWatcher(paths=[temp_path.parent], client=mock_client)
@@ -53,39 +64,56 @@ async def test_file_watcher_upsert_existing_document():
 
         assert result is not None
         assert result.content == "Updated content"
-        mock_client.get_document_by_uri.assert_called_once_with(temp_path.as_uri())
+        mock_client.get_document_header_by_uri.assert_called_once_with(
+            temp_path.as_uri()
+        )
         mock_client.create_document_from_source.assert_called_once_with(str(temp_path))
 
 
 @pytest.mark.asyncio
-async def test_file_watcher_delete_document():
-    """Test FileWatcher._delete_document method."""
+async def test_file_watcher_delete_documents():
+    """Test FileWatcher._delete_documents method."""
     temp_path = Path("/tmp/test_file.txt")
 
     mock_client = AsyncMock(spec=HaikuRAG)
-    existing_doc = Document(id=1, content="Content to delete", uri=temp_path.as_uri())
-    mock_client.get_document_by_uri.return_value = existing_doc
-    mock_client.delete_document.return_value = True
+    mock_client.delete_documents.return_value = 1
 
     watcher = FileWatcher(paths=[temp_path.parent], client=mock_client)
 
-    await watcher._delete_document(temp_path)
+    await watcher._delete_documents([temp_path])
 
-    mock_client.get_document_by_uri.assert_called_once_with(temp_path.as_uri())
-    mock_client.delete_document.assert_called_once_with(1)
+    mock_client.delete_documents.assert_called_once_with(uris=[temp_path.as_uri()])
+    mock_client.delete_document.assert_not_called()
 
 
 @pytest.mark.asyncio
-async def test_file_watcher_delete_nonexistent_document():
-    """Test FileWatcher._delete_document with non-existent document."""
+async def test_file_watcher_delete_documents_error():
+    """Test that FileWatcher._delete_documents logs failures instead of raising."""
     temp_path = Path("/tmp/nonexistent_file.txt")
 
     mock_client = AsyncMock(spec=HaikuRAG)
-    mock_client.get_document_by_uri.return_value = None
+    mock_client.delete_documents.side_effect = ValueError("database is locked")
 
     watcher = FileWatcher(paths=[temp_path.parent], client=mock_client)
 
-    await watcher._delete_document(temp_path)
+    await watcher._delete_documents([temp_path])
+
+    mock_client.delete_documents.assert_called_once_with(uris=[temp_path.as_uri()])
+
+
+@pytest.mark.asyncio
+async def test_file_watcher_handler_deletes_in_bulk():
+    """Test that the deleted files of a batch of changes are deleted at once."""
+    paths = [Path(f"/tmp/removed/file{i}.txt") for i in range(3)]
+
+    mock_client = AsyncMock(spec=HaikuRAG)
+    mock_client.delete_documents.return_value = 3
+
+    watcher = FileWatcher(paths=[Path("/tmp/removed")], client=mock_client)
+
+    await watcher.handler({(Change.deleted, str(path)) for path in paths})
 
-    mock_client.get_document_by_uri.assert_called_once_with(temp_path.as_uri())
+    mock_client.delete_documents.assert_called_once()
+    uris = mock_client.delete_documents.call_args.kwargs["uris"]
+    assert sorted(uris) == sorted(path.as_uri() for path in paths)
     mock_client.delete_document.assert_not_called()
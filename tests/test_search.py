@@ -1,9 +1,18 @@
+import asyncio
+import tempfile
+from pathlib import Path
+
 import pytest
 from datasets import Dataset
 
+from haiku.rag.config import Config
+from haiku.rag.embeddings.cache import query_embedding_cache
 from haiku.rag.store.engine import Store
 from haiku.rag.store.models.document import Document
-from haiku.rag.store.repositories.chunk import ChunkRepository
+from haiku.rag.store.repositories.chunk import (
+    ChunkRepository,
+    reciprocal_rank_fusion,
+)
 from haiku.rag.store.repositories.document import DocumentRepository
 
 
@@ -86,3 +95,82 @@ async def test_chunks_include_document_info():
     assert chunk.document_id == created_document.id
 
     store.close()
+
+
+def test_reciprocal_rank_fusion():
+    """Test fusing ranked candidate lists with RRF."""
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 4]], k=60)
+    scores = dict(fused)
+
+    assert [chunk_id for chunk_id, _ in fused] == [3, 1, 2, 4]
+    assert scores[3] == pytest.approx(1 / 63 + 1 / 61)
+    assert scores[1] == pytest.approx(1 / 61)
+    assert scores[4] == pytest.approx(1 / 62)
+    assert reciprocal_rank_fusion([[], []]) == []
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_candidate_depth(monkeypatch):
+    """Test that hybrid search only fuses the bounded candidate lists."""
+    store = Store(":memory:")
+    doc_repo = DocumentRepository(store)
+    chunk_repo = ChunkRepository(store)
+
+    for i in range(10):
+        await doc_repo.create(Document(content=f"The shared word number {i}."))
+
+    results = await chunk_repo.search_chunks_hybrid(
+        "shared", limit=10, k_vector=2, k_fts=3
+    )
+    # At most k_vector + k_fts distinct candidates can be returned
+    assert 3 <= len(results) <= 5
+    assert all(chunk.document_uri is None for chunk, _ in results)
+    assert [score for _, score in results] == sorted(
+        (score for _, score in results), reverse=True
+    )
+
+    # The depths default to the configured number of candidates
+    monkeypatch.setattr(Config, "SEARCH_VECTOR_CANDIDATES", 1)
+    monkeypatch.setattr(Config, "SEARCH_FTS_CANDIDATES", 1)
+    results = await chunk_repo.search_chunks_hybrid("shared", limit=10)
+    assert 1 <= len(results) <= 2
+
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_overlaps_fts_with_embedding():
+    """Test that the FTS stage runs on a read connection while the query is embedded."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = Store(Path(temp_dir) / "test.sqlite")
+        doc_repo = DocumentRepository(store)
+        chunk_repo = ChunkRepository(store)
+        await doc_repo.create(Document(content="Overlapping stages of a search."))
+
+        events: list[str] = []
+        embedder = chunk_repo.embedder
+        original_embed = embedder.embed
+        original_fts = chunk_repo._fts_candidates
+
+        async def slow_embed(text: str) -> list[float]:
+            events.append("embed started")
+            await asyncio.sleep(0.1)
+            events.append("embed finished")
+            return await original_embed(text)
+
+        def recording_fts(db, fts_query, depth, collection=None, filters=None):
+            events.append("fts")
+            return original_fts(db, fts_query, depth, collection, filters)
+
+        query_embedding_cache.clear()
+        embedder.embed = slow_embed  # type: ignore[method-assign]
+        chunk_repo._fts_candidates = recording_fts  # type: ignore[method-assign]
+
+        results = await chunk_repo.search_chunks_hybrid("overlapping stages", limit=1)
+        assert len(results) == 1
+        assert events == ["embed started", "fts", "embed finished"]
+        # Reads ran on pooled reader connections, not the main connection
+        assert len(store._readers) > 0
+
+        store.close()
+        assert store._readers == []
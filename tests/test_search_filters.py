@@ -0,0 +1,152 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+import sqlite_vec
+
+from haiku.rag.client import HaikuRAG
+from haiku.rag.config import Config
+from haiku.rag.store.models.document import Document
+from haiku.rag.store.models.filter import SearchFilter
+from haiku.rag.store.upgrades.v0_4_0 import add_chunk_embedding_metadata
+
+
+async def create_documents(client: HaikuRAG) -> dict[str, list[int]]:
+    """Create many web pages and a few PDFs in two directories."""
+    ids: dict[str, list[int]] = {"html": [], "pdf": [], "reports": [], "2024": []}
+    for i in range(20):
+        document = await client.document_repository.create(
+            Document(
+                content=f"Page {i} of the annual report on solar energy.",
+                uri=f"https://example.com/page{i}.html",
+                metadata={"contentType": "text/html"},
+                created_at=datetime(2023, 1, 1 + i),
+            )
+        )
+        assert document.id is not None
+        ids["html"].append(document.id)
+    for i, directory in enumerate(["reports", "reports", "drafts"]):
+        document = await client.document_repository.create(
+            Document(
+                content=f"Chapter {i} of the annual report on wind energy.",
+                uri=f"file:///data/{directory}/report{i}.pdf",
+                metadata={"contentType": "application/pdf"},
+                created_at=datetime(2024, 6, 1 + i),
+            )
+        )
+        assert document.id is not None
+        ids["pdf"].append(document.id)
+        ids["2024"].append(document.id)
+        if directory == "reports":
+            ids["reports"].append(document.id)
+    return ids
+
+
+@pytest.mark.parametrize(
+    "setting, value",
+    [
+        ("VECTOR_QUANTIZATION", "none"),
+        ("VECTOR_QUANTIZATION", "int8"),
+        ("VECTOR_DOCUMENT_CANDIDATES", 2),
+    ],
+)
+@pytest.mark.asyncio
+async def test_filtered_search_returns_full_limit(monkeypatch, setting, value):
+    """Test that filters are applied within the scans rather than afterwards."""
+    monkeypatch.setattr(Config, setting, value)
+    async with HaikuRAG(":memory:") as client:
+        ids = await create_documents(client)
+
+        cases = [
+            (SearchFilter(content_type="application/pdf"), ids["pdf"]),
+            (SearchFilter(uri_prefix="file:///data/reports/"), ids["reports"]),
+            (SearchFilter(created_after=datetime(2024, 1, 1)), ids["2024"]),
+            (
+                SearchFilter(
+                    created_after=datetime(2023, 1, 5),
+                    created_before=datetime(2023, 1, 8),
+                ),
+                ids["html"][4:7],
+            ),
+        ]
+        for filters, expected in cases:
+            for mode in ("hybrid", "vector", "fts"):
+                results = await client.search(
+                    "annual report on solar energy",
+                    limit=len(expected),
+                    mode=mode,
+                    filters=filters,
+                )
+                # Every matching document is found, although most chunks that
+                # are closer to the query do not match the filter
+                assert sorted(chunk.document_id for chunk, _ in results) == expected
+
+            many = await client.search_many(
+                ["solar energy", "wind energy"],
+                limit=len(expected),
+                mode="vector",
+                filters=filters,
+            )
+            for results in many:
+                assert sorted(chunk.document_id for chunk, _ in results) == expected
+
+        # Filters combine with collections and with each other
+        results = await client.search(
+            "annual report",
+            limit=5,
+            collection="other",
+            filters=SearchFilter(content_type="application/pdf"),
+        )
+        assert results == []
+        results = await client.search(
+            "annual report",
+            limit=5,
+            filters=SearchFilter(
+                content_type="application/pdf", created_before=datetime(2024, 1, 1)
+            ),
+        )
+        assert results == []
+
+
+def test_add_chunk_embedding_metadata_upgrade():
+    """Test that existing embeddings get the metadata of their documents."""
+    db = sqlite3.connect(":memory:")
+    db.enable_load_extension(True)
+    sqlite_vec.load(db)
+    db.execute("""
+        CREATE TABLE documents (
+            id INTEGER PRIMARY KEY, uri TEXT, metadata TEXT, created_at TIMESTAMP
+        )
+    """)
+    db.execute("CREATE TABLE chunks (id INTEGER PRIMARY KEY, document_id INTEGER)")
+    db.execute("""
+        CREATE VIRTUAL TABLE chunk_embeddings USING vec0(
+            chunk_id INTEGER PRIMARY KEY,
+            collection TEXT PARTITION KEY,
+            embedding FLOAT[2]
+        )
+    """)
+    db.execute("""
+        INSERT INTO documents VALUES
+            (1, 'file:///a.pdf', '{"contentType": "application/pdf"}',
+             '2024-06-01 00:00:00'),
+            (2, NULL, '{}', '2024-06-02 00:00:00')
+    """)
+    db.execute("INSERT INTO chunks VALUES (7, 1), (8, 2)")
+    db.execute("""
+        INSERT INTO chunk_embeddings VALUES
+            (7, 'default', '[1.0, 0.0]'), (8, 'default', '[0.0, 1.0]')
+    """)
+
+    add_chunk_embedding_metadata(db)
+
+    rows = db.execute("""
+        SELECT chunk_id, content_type, uri, created_at FROM chunk_embeddings
+        WHERE embedding MATCH '[0.0, 1.0]' AND k = 2
+        AND content_type = 'application/pdf'
+    """).fetchall()
+    assert rows == [(7, "application/pdf", "file:///a.pdf", "2024-06-01 00:00:00")]
+    (uri,) = db.execute(
+        "SELECT uri FROM chunk_embeddings WHERE chunk_id = 8"
+    ).fetchone()
+    assert uri == ""
@@ -78,3 +78,26 @@ async def test_config_validation_on_db_load():
 
         finally:
             Config.CHUNK_SIZE = original_chunk_size
+
+
+def test_upgrades_recorded_before_config_validation():
+    """Test that upgrades are recorded even if the config then does not match."""
+    with tempfile.NamedTemporaryFile(suffix=".sqlite") as tmp:
+        db_path = Path(tmp.name)
+
+        store = Store(db_path)
+        current_version = store.get_user_version()
+        store.set_user_version("0.4.0")
+        store.close()
+
+        original_chunk_size = Config.CHUNK_SIZE
+        Config.CHUNK_SIZE = 999
+        try:
+            with pytest.raises(ConfigMismatchError):
+                Store(db_path)
+        finally:
+            Config.CHUNK_SIZE = original_chunk_size
+
+        store = Store(db_path)
+        assert store.get_user_version() == current_version
+        store.close()
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from haiku.rag.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_singleflight_shares_inflight_calls():
+    flights: SingleFlight[int] = SingleFlight()
+    calls = 0
+
+    async def work() -> int:
+        nonlocal calls
+        calls += 1
+        call = calls
+        await asyncio.sleep(0.01)
+        return call
+
+    results = await asyncio.gather(*(flights.do("key", work) for _ in range(5)))
+    assert results == [1] * 5
+    assert calls == 1
+    assert len(flights) == 0
+
+    # Once finished, the next call for the key runs again
+    assert await flights.do("key", work) == 2
+
+    # Different keys run independently
+    results = await asyncio.gather(flights.do("a", work), flights.do("b", work))
+    assert sorted(results) == [3, 4]
+
+
+@pytest.mark.asyncio
+async def test_singleflight_errors_and_cancellation():
+    flights: SingleFlight[int] = SingleFlight()
+
+    async def fail() -> int:
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        flights.do("key", fail), flights.do("key", fail), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+    async def slow() -> int:
+        await asyncio.sleep(0.02)
+        return 42
+
+    # Cancelling one caller does not cancel the shared execution
+    first = asyncio.ensure_future(flights.do("slow", slow))
+    second = asyncio.ensure_future(flights.do("slow", slow))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == 42
@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+
+from haiku.rag.client import HaikuRAG
+from haiku.rag.store.engine import Store
+from haiku.rag.store.upgrades.v0_4_0 import add_index_generation_table
+from haiku.rag.utils import semantic_version_to_int
+
+
+@pytest.mark.asyncio
+async def test_upgrades_can_run_again(tmp_path):
+    """Test that re-running the upgrades on an upgraded database changes nothing."""
+    db_path = tmp_path / "test.sqlite"
+    async with HaikuRAG(db_path) as client:
+        document = await client.create_document("A document about lighthouses.")
+        current_version = client.store.get_user_version()
+        client.store.set_user_version("0.3.0")
+
+    async with HaikuRAG(db_path) as client:
+        assert client.store.get_user_version() == current_version
+        assert client.store.get_generation() > 0
+        results = await client.search("lighthouses", limit=1)
+        assert [chunk.document_id for chunk, _ in results] == [document.id]
+
+
+def test_failed_upgrade_is_rolled_back(tmp_path, monkeypatch):
+    """Test that a failing step leaves the database and its version as they were."""
+    db_path = tmp_path / "test.sqlite"
+    Store(db_path).close()
+    db = sqlite3.connect(db_path)
+    db.execute("DROP TABLE index_generation")
+    db.execute(f"PRAGMA user_version = {semantic_version_to_int('0.3.4')}")
+    db.commit()
+    db.close()
+
+    def fail(db):
+        """Fail halfway through the upgrade"""
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(
+        "haiku.rag.store.engine.upgrades",
+        [("0.4.0", [add_index_generation_table, fail])],
+    )
+    with pytest.raises(RuntimeError):
+        Store(db_path)
+
+    db = sqlite3.connect(db_path)
+    assert db.execute("PRAGMA user_version").fetchone()[0] == (
+        semantic_version_to_int("0.3.4")
+    )
+    tables = {name for (name,) in db.execute("SELECT name FROM sqlite_master")}
+    assert "index_generation" not in tables
+    db.close()
@@ -0,0 +1,407 @@
+import sqlite3
+
+import pytest
+import sqlite_vec
+
+from haiku.rag.client import HaikuRAG
+from haiku.rag.config import Config
+from haiku.rag.store.engine import Store
+from haiku.rag.store.vector import SqliteVecIndex, get_vector_index
+from haiku.rag.store.vector.quantized import QuantizedIndex
+from haiku.rag.store.vector.reduced import ReducedIndex
+
+
+def test_sqlite_vec_index():
+    """Test storing, replacing, deleting and searching embeddings."""
+    store = Store(":memory:")
+    assert store._connection is not None
+    db = store._connection
+    index = store.vector_index
+    assert isinstance(index, SqliteVecIndex)
+
+    dim = index.dim
+    index.add(db, 1, [1.0] + [0.0] * (dim - 1))
+    index.add(db, 2, [0.0, 1.0] + [0.0] * (dim - 2))
+    index.add(db, 3, [0.9, 0.1] + [0.0] * (dim - 2))
+
+    results = index.search(db, [1.0] + [0.0] * (dim - 1), k=2)
+    assert [chunk_id for chunk_id, _ in results] == [1, 3]
+    assert results[0][1] == pytest.approx(0.0)
+
+    index.update(db, 2, [1.0] + [0.0] * (dim - 1))
+    index.delete(db, 1)
+    results = index.search(db, [1.0] + [0.0] * (dim - 1), k=2)
+    assert [chunk_id for chunk_id, _ in results] == [2, 3]
+
+    stats = index.stats(db)
+    assert stats.engine == "sqlite-vec"
+    assert stats.dim == dim
+    assert stats.count == 2
+
+    index.clear(db)
+    assert index.stats(db).count == 0
+    store.close()
+
+
+@pytest.mark.parametrize("quantization", ["none", "int8"])
+def test_compact_index(monkeypatch, quantization):
+    """Test that compaction frees the slots of deleted embeddings."""
+    monkeypatch.setattr(Config, "VECTOR_QUANTIZATION", quantization)
+    store = Store(":memory:")
+    assert store._connection is not None
+    db = store._connection
+    index = store.vector_index
+    dim = index.dim
+
+    # vec0 stores 1024 embeddings per chunk and only frees chunks left empty
+    for chunk_id in range(1, 1026):
+        index.add(db, chunk_id, [float(chunk_id)] + [1.0] * (dim - 1))
+    index.delete_many(db, list(range(1, 501)))
+    assert index.compact(db) == 1024
+    assert index.compact(db) == 0
+
+    assert index.stats(db).count == 525
+    results = index.search(db, [1.0] * dim, k=3)
+    assert all(chunk_id > 500 for chunk_id, _ in results)
+    store.close()
+
+
+def test_get_vector_index_unsupported(monkeypatch):
+    monkeypatch.setattr(Config, "VECTOR_INDEX", "faiss")
+    with pytest.raises(ValueError, match="Unsupported vector index"):
+        get_vector_index(":memory:")
+
+
+def test_numpy_index(monkeypatch):
+    """Test that the NumPy matrix index returns the same results as sqlite-vec."""
+    np = pytest.importorskip("numpy")
+    monkeypatch.setattr(Config, "VECTOR_INDEX", "numpy")
+    store = Store(":memory:")
+    assert store._connection is not None
+    db = store._connection
+    index = store.vector_index
+    assert index.name == "numpy"
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, index.dim)).astype(np.float32).tolist()
+    for chunk_id, vector in enumerate(vectors, start=1):
+        index.add(db, chunk_id, vector)
+    index.update(db, 1, vectors[1])
+    for chunk_id in range(10, 20):
+        index.delete(db, chunk_id)
+
+    exact = SqliteVecIndex(index.dim)
+    queries = rng.normal(size=(5, index.dim)).astype(np.float32).tolist()
+    batched = index.search_many(db, queries, k=5)
+    for query, results in zip(queries, batched):
+        expected = exact.search(db, query, k=5)
+        assert [chunk_id for chunk_id, _ in results] == [c for c, _ in expected]
+        assert [d for _, d in results] == pytest.approx([d for _, d in expected])
+        single = index.search(db, query, k=5)
+        assert [chunk_id for chunk_id, _ in single] == [c for c, _ in results]
+    assert index.stats(db).count == 40
+
+    # Compaction drops tombstoned rows without changing results
+    # 10 deleted rows and the replaced row of the update
+    assert index.compact(db) == 11
+    assert index._count == 40
+    compacted = index.search_many(db, queries, k=5)
+    assert [[c for c, _ in r] for r in compacted] == [
+        [c for c, _ in r] for r in batched
+    ]
+    store.close()
+
+
+def test_numpy_index_persistence(monkeypatch, tmp_path):
+    """Test that the memory-mapped matrix is reused when it is up to date."""
+    np = pytest.importorskip("numpy")
+    monkeypatch.setattr(Config, "VECTOR_INDEX", "numpy")
+    db_path = tmp_path / "test.sqlite"
+
+    store = Store(db_path)
+    assert store._connection is not None
+    dim = store.vector_index.dim
+    vectors = np.eye(dim, dtype=np.float32).tolist()
+    for chunk_id, vector in enumerate(vectors, start=1):
+        store.vector_index.add(store._connection, chunk_id, vector)
+    store.vector_index.delete(store._connection, 1)
+    store.bump_generation()
+    store._connection.commit()
+    store.close()
+    assert (tmp_path / "test.sqlite.vectors.f32").exists()
+
+    store = Store(db_path)
+    assert store._connection is not None
+    index = store.vector_index
+    assert index._saved_generation == store.get_generation()
+    assert index.stats(store._connection).count == dim - 1
+    assert index.search(store._connection, vectors[2], k=1)[0][0] == 3
+    store.close()
+
+
+def test_numpy_index_shared_file(monkeypatch, tmp_path):
+    """Test that stores mapping the same matrix file do not write into it."""
+    np = pytest.importorskip("numpy")
+    monkeypatch.setattr(Config, "VECTOR_INDEX", "numpy")
+    db_path = tmp_path / "test.sqlite"
+
+    store = Store(db_path)
+    assert store._connection is not None
+    dim = store.vector_index.dim
+    vectors = np.eye(dim, dtype=np.float32).tolist()
+    for chunk_id, vector in enumerate(vectors[:3], start=1):
+        store.vector_index.add(store._connection, chunk_id, vector)
+    store.bump_generation()
+    store._connection.commit()
+    store.close()
+
+    first = Store(db_path)
+    second = Store(db_path)
+    assert first._connection is not None and second._connection is not None
+    assert first.vector_index._saved_generation == first.get_generation()
+    assert second.vector_index._saved_generation == second.get_generation()
+
+    first.vector_index.add(first._connection, 4, vectors[3])
+    first.bump_generation()
+    first._connection.commit()
+
+    # Rows appended by the other store, here never committed, stay out of its file
+    second.vector_index.add(second._connection, 5, vectors[4])
+    first.sync_vector_index()
+    assert first.vector_index.search(first._connection, vectors[3], k=1)[0][0] == 4
+    second._connection.rollback()
+    second.close()
+
+    first.close()
+    store = Store(db_path)
+    assert store._connection is not None
+    assert store.vector_index.stats(store._connection).count == 4
+    assert store.vector_index.search(store._connection, vectors[3], k=1)[0][0] == 4
+    store.close()
+
+
+@pytest.mark.parametrize("quantization", ["int8", "bit"])
+def test_quantized_index(monkeypatch, quantization):
+    """Test that quantized search re-scores candidates with the full embeddings."""
+    np = pytest.importorskip("numpy")
+    monkeypatch.setattr(Config, "VECTOR_QUANTIZATION", quantization)
+    monkeypatch.setattr(Config, "VECTOR_RESCORE_FACTOR", 10)
+    store = Store(":memory:")
+    assert store._connection is not None
+    db = store._connection
+    index = store.vector_index
+    assert isinstance(index, QuantizedIndex)
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, index.dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    for chunk_id, vector in enumerate(vectors.tolist(), start=1):
+        index.add(db, chunk_id, vector)
+    index.update(db, 1, vectors[1].tolist())
+    index.delete(db, 10)
+
+    # With as many candidates as embeddings, re-scoring makes the search exact
+    exact = SqliteVecIndex(index.dim)
+    for query in vectors[:5].tolist():
+        results = index.search(db, query, k=5)
+        expected = exact.search(db, query, k=5)
+        assert [c for c, _ in results] == [c for c, _ in expected]
+        assert [d for _, d in results] == pytest.approx([d for _, d in expected])
+
+    stats = index.stats(db)
+    assert stats.engine == f"sqlite-vec-{quantization}"
+    assert stats.count == 49
+
+    # A database indexed without quantization is quantized when loaded
+    index.drop(db)
+    exact.create(db)
+    exact.add(db, 1, vectors[0].tolist())
+    assert not index.load(db, store.get_generation())
+    index.rebuild(db)
+    assert index.stats(db).count == 1
+    assert index.search(db, vectors[0].tolist(), k=1)[0][0] == 1
+
+    index.clear(db)
+    assert index.stats(db).count == 0
+    store.close()
+
+
+@pytest.mark.parametrize("reduction", ["truncate", "pca"])
+def test_reduced_index(monkeypatch, reduction):
+    """Test that reduced-dimension search re-ranks candidates on full embeddings."""
+    np = pytest.importorskip("numpy")
+    monkeypatch.setattr(Config, "VECTOR_REDUCED_DIM", 4)
+    monkeypatch.setattr(Config, "VECTOR_REDUCTION", reduction)
+    monkeypatch.setattr(Config, "VECTOR_RESCORE_FACTOR", 10)
+    store = Store(":memory:")
+    assert store._connection is not None
+    db = store._connection
+    index = store.vector_index
+    assert isinstance(index, ReducedIndex)
+    assert index.ready == (reduction == "truncate")
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, index.dim)).astype(np.float32).tolist()
+    for chunk_id, vector in enumerate(vectors, start=1):
+        index.add(db, chunk_id, vector)
+
+    # The projection is learned from the stored embeddings
+    index.train(db)
+    assert index.ready
+    vectors[0] = rng.normal(size=index.dim).astype(np.float32).tolist()
+    index.update(db, 1, vectors[0])
+    index.delete(db, 10)
+    (reduced,) = db.execute(f"SELECT COUNT(*) FROM {index.table}").fetchone()
+    assert reduced == 49
+
+    # With as many candidates as embeddings, re-ranking makes the search exact
+    for query in vectors[:5]:
+        results = index.search(db, query, k=5)
+        expected = index.exact_search(db, query, k=5)
+        assert [c for c, _ in results] == [c for c, _ in expected]
+        assert [d for _, d in results] == pytest.approx([d for _, d in expected])
+
+    report = index.measure_recall(db, k=5, samples=10)
+    assert report.engine == f"sqlite-vec-{reduction}4"
+    assert report.queries == 10
+    assert report.recall == 1.0
+
+    # A new connection loads the stored projection
+    other = ReducedIndex(index.dim, 4, reduction)
+    assert other.load(db, store.get_generation())
+    assert other.search(db, vectors[2], k=1)[0][0] == 3
+    store.close()
+
+
+def test_pca_projection_matches_svd(monkeypatch):
+    """Test that the streamed PCA learns the principal subspace of the embeddings."""
+    np = pytest.importorskip("numpy")
+    monkeypatch.setattr(Config, "VECTOR_REDUCED_DIM", 4)
+    monkeypatch.setattr(Config, "VECTOR_REDUCTION", "pca")
+    store = Store(":memory:")
+    assert store._connection is not None
+    db = store._connection
+    index = store.vector_index
+    assert isinstance(index, ReducedIndex)
+
+    # Embeddings with a few dominant directions, so the subspace is well defined
+    rng = np.random.default_rng(0)
+    scales = np.linspace(10, 0.1, index.dim)
+    matrix = (rng.normal(size=(5000, index.dim)) * scales + 3).astype(np.float32)
+    for chunk_id, vector in enumerate(matrix.tolist(), start=1):
+        index.add(db, chunk_id, vector)
+    index.train(db)
+    assert index._projection is not None
+
+    mean, components = index._projection
+    _, _, vt = np.linalg.svd(matrix - matrix.mean(axis=0), full_matrices=False)
+    assert mean == pytest.approx(matrix.mean(axis=0), abs=1e-3)
+    # Components match up to sign
+    assert np.abs(components @ vt[:4].T) == pytest.approx(np.eye(4), abs=1e-3)
+    store.close()
+
+
+def test_reduced_index_invalid_dimension(monkeypatch):
+    monkeypatch.setattr(Config, "VECTOR_REDUCED_DIM", 4096)
+    with pytest.raises(ValueError, match="Reduced dimension"):
+        get_vector_index(":memory:")
+
+
+@pytest.mark.asyncio
+async def test_rebuild_trains_reduced_index(monkeypatch):
+    """Test that rebuilding the database learns the projection and reports recall."""
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(Config, "VECTOR_REDUCED_DIM", 2)
+    monkeypatch.setattr(Config, "VECTOR_REDUCTION", "pca")
+    async with HaikuRAG(":memory:") as client:
+        for i in range(5):
+            await client.create_document(f"Document number {i} about topic {i}.")
+        assert not client.store.vector_index.ready
+
+        async for _ in client.rebuild_database():
+            pass
+        assert client.store.vector_index.ready
+
+        report = await client.measure_vector_recall(k=2, samples=3)
+        assert report.engine == "sqlite-vec-pca2"
+        assert report.queries == 3
+        assert 0.0 <= report.recall <= 1.0
+
+
+def test_compact_keeps_stored_dimension(monkeypatch, tmp_path):
+    """Test that compaction recreates the table with its stored dimension."""
+    db_path = tmp_path / "test.sqlite"
+    store = Store(db_path)
+    assert store._connection is not None
+    dim = store.vector_index.dim
+    store.vector_index.add(store._connection, 1, [1.0] * dim)
+    store._connection.commit()
+    store.close()
+
+    monkeypatch.setattr(Config, "EMBEDDINGS_VECTOR_DIM", dim * 2)
+    store = Store(db_path, skip_validation=True)
+    assert store._connection is not None
+    db = store._connection
+    store.vector_index.compact(db)
+    (schema,) = db.execute(
+        "SELECT sql FROM sqlite_master WHERE name = 'chunk_embeddings'"
+    ).fetchone()
+    assert f"FLOAT[{dim}]" in schema
+    assert db.execute("SELECT COUNT(*) FROM chunk_embeddings").fetchone() == (1,)
+    store.close()
+
+
+@pytest.mark.parametrize("quantization", ["none", "int8"])
+def test_failed_compaction_is_rolled_back(monkeypatch, tmp_path, quantization):
+    """Test that embeddings survive a compaction failing after the table is dropped."""
+    monkeypatch.setattr(Config, "VECTOR_QUANTIZATION", quantization)
+
+    class FailingConnection(sqlite3.Connection):
+        def execute(self, sql, *args):
+            if sql.lstrip().startswith("INSERT INTO chunk_embeddings ("):
+                raise sqlite3.OperationalError("disk I/O error")
+            return super().execute(sql, *args)
+
+    db_path = tmp_path / "test.sqlite"
+    store = Store(db_path)
+    dim = store.vector_index.dim
+    store.close()
+
+    store = Store(db_path)
+    db = sqlite3.connect(db_path, factory=FailingConnection)
+    db.enable_load_extension(True)
+    sqlite_vec.load(db)
+    for chunk_id in range(1, 11):
+        store.vector_index.add(db, chunk_id, [float(chunk_id)] + [1.0] * (dim - 1))
+    db.commit()
+
+    with pytest.raises(sqlite3.OperationalError):
+        store.vector_index.compact(db)
+    db.close()
+
+    assert store._connection is not None
+    count = store._connection.execute("SELECT COUNT(*) FROM chunk_embeddings")
+    assert count.fetchone() == (10,)
+    results = store.vector_index.search(store._connection, [1.0] * dim, k=1)
+    assert [chunk_id for chunk_id, _ in results] == [1]
+    store.close()
+
+
+@pytest.mark.parametrize("vector_index", ["numpy", "hnsw"])
+@pytest.mark.asyncio
+async def test_writes_from_several_clients_are_searchable(
+    monkeypatch, tmp_path, vector_index
+):
+    """Test that an index kept in memory picks up the writes of other clients."""
+    pytest.importorskip("numpy" if vector_index == "numpy" else "hnswlib")
+    monkeypatch.setattr(Config, "VECTOR_INDEX", vector_index)
+    db_path = tmp_path / "test.sqlite"
+    async with HaikuRAG(db_path) as first, HaikuRAG(db_path) as second:
+        lighthouse = await first.create_document("A document about lighthouses.")
+        harbour = await second.create_document("A document about harbours.")
+        glacier = await first.create_document("A document about glaciers.")
+
+        for client in (first, second):
+            for document in (lighthouse, harbour, glacier):
+                results = await client.search(document.content, limit=1, mode="vector")
+                assert [chunk.document_id for chunk, _ in results] == [document.id]